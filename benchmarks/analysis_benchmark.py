@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Audio Analysis Benchmark
+
+Generates synthetic test signals at runtime (no audio files or network
+needed), runs the analysis entry points against them and reports runtime
+scaling, memory and beat-tracking accuracy.
+
+Signals:
+    click   - Click track at a known BPM (accented downbeats), with ground-truth beats
+    sweep   - Repeating exponential sine sweeps (no beats; checks spectral paths)
+    noise   - Noise bursts at random intervals (no steady tempo)
+
+Targets:
+    analyzer  - AudioAnalyzer.analyze (with per-step profile)
+    segments  - segment_analyzer.analyze_segments
+    raw       - inspect_essentia_raw.analyze_raw
+
+Each (target, signal, length) run happens in a fresh process so peak RSS is
+measured per run rather than accumulated.
+
+Usage:
+    python benchmarks/analysis_benchmark.py --quick
+    python benchmarks/analysis_benchmark.py --lengths 30 120 600 1800 --targets analyzer
+    python benchmarks/analysis_benchmark.py --output bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from queue import Empty
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+SAMPLE_RATE = 44100
+SIGNALS = ('click', 'sweep', 'noise')
+TARGETS = ('analyzer', 'segments', 'raw')
+
+# Seconds between checks that a benchmark child is still alive
+POLL_INTERVAL = 0.5
+DEFAULT_LENGTHS = (30, 120, 600, 1800)
+QUICK_LENGTHS = (30, 60)
+DEFAULT_BPMS = (120.0, 95.0)
+
+# Samples rendered per write (bounds generator memory for long signals)
+BLOCK_SECONDS = 10.0
+
+# Beat F-measure tolerance window (MIREX convention)
+BEAT_TOLERANCE = 0.07
+
+
+# ============================================================================
+# Signal generation
+# ============================================================================
+
+def _click(sr: int, accent: bool) -> np.ndarray:
+    """A 30 ms decaying tone burst; downbeats are louder and higher."""
+    t = np.arange(int(0.03 * sr)) / sr
+    freq = 1500.0 if accent else 1000.0
+    amp = 0.9 if accent else 0.5
+    return (amp * np.sin(2 * np.pi * freq * t) * np.exp(-t / 0.006)).astype(np.float32)
+
+
+def _render_events(path: str, duration: float, sr: int,
+                   onsets: np.ndarray, events: List[np.ndarray]):
+    """Write a signal made of short events at given onset times, block by block."""
+    n_total = int(duration * sr)
+    block = int(BLOCK_SECONDS * sr)
+    starts = np.round(onsets * sr).astype(np.int64)
+    with sf.SoundFile(path, 'w', samplerate=sr, channels=1, subtype='PCM_16') as f:
+        for b0 in range(0, n_total, block):
+            b1 = min(b0 + block, n_total)
+            out = np.zeros(b1 - b0, dtype=np.float32)
+            max_len = max((len(e) for e in events), default=0)
+            lo = np.searchsorted(starts, b0 - max_len)
+            hi = np.searchsorted(starts, b1)
+            for i in range(lo, hi):
+                event = events[i]
+                s = starts[i] - b0
+                e0, e1 = max(0, -s), min(len(event), b1 - b0 - s)
+                if e1 > e0:
+                    out[s + e0:s + e1] += event[e0:e1]
+            f.write(np.clip(out, -1.0, 1.0))
+
+
+def generate_click_track(path: str, duration: float, bpm: float,
+                         sr: int = SAMPLE_RATE) -> Dict[str, Any]:
+    """Click track in 4/4 starting at t=0.5s. Returns ground truth."""
+    beats = np.arange(0.5, duration - 0.05, 60.0 / bpm)
+    clicks = {True: _click(sr, True), False: _click(sr, False)}
+    events = [clicks[i % 4 == 0] for i in range(len(beats))]
+    _render_events(path, duration, sr, beats, events)
+    return {'bpm': float(bpm), 'beats': beats.tolist()}
+
+
+def generate_noise_bursts(path: str, duration: float, seed: int = 0,
+                          sr: int = SAMPLE_RATE) -> Dict[str, Any]:
+    """White-noise bursts of 50-300 ms separated by random 0.2-2 s gaps."""
+    rng = np.random.default_rng(seed)
+    onsets, events = [], []
+    t = 0.3
+    while t < duration - 0.3:
+        length = int(rng.uniform(0.05, 0.3) * sr)
+        envelope = np.exp(-np.arange(length) / (0.3 * length)).astype(np.float32)
+        events.append(rng.uniform(0.2, 0.7) * envelope * rng.standard_normal(length).astype(np.float32))
+        onsets.append(t)
+        t += length / sr + rng.uniform(0.2, 2.0)
+    _render_events(path, duration, sr, np.array(onsets), events)
+    return {'onsets': onsets}
+
+
+def generate_sweeps(path: str, duration: float, period: float = 30.0,
+                    f0: float = 60.0, f1: float = 12000.0,
+                    sr: int = SAMPLE_RATE) -> Dict[str, Any]:
+    """Exponential sine sweeps from f0 to f1, restarting every `period` seconds."""
+    n_total = int(duration * sr)
+    block = int(BLOCK_SECONDS * sr)
+    rate = np.log(f1 / f0) / period
+    with sf.SoundFile(path, 'w', samplerate=sr, channels=1, subtype='PCM_16') as f:
+        for b0 in range(0, n_total, block):
+            t = (np.arange(b0, min(b0 + block, n_total)) / sr) % period
+            phase = 2 * np.pi * f0 * (np.exp(rate * t) - 1.0) / rate
+            f.write((0.4 * np.sin(phase)).astype(np.float32))
+    return {}
+
+
+def generate_signal(kind: str, path: str, duration: float, bpm: float = 120.0,
+                    seed: int = 0) -> Dict[str, Any]:
+    """Write a synthetic signal to `path` and return its ground truth."""
+    if kind == 'click':
+        return generate_click_track(path, duration, bpm)
+    if kind == 'sweep':
+        return generate_sweeps(path, duration)
+    if kind == 'noise':
+        return generate_noise_bursts(path, duration, seed)
+    raise ValueError(f"Unknown signal: {kind}")
+
+
+# ============================================================================
+# Accuracy metrics
+# ============================================================================
+
+def beat_f_measure(estimated: List[float], reference: List[float],
+                   tolerance: float = BEAT_TOLERANCE) -> Dict[str, float]:
+    """
+    Beat F-measure with one-to-one matching inside +/- tolerance.
+
+    Returns:
+        {'f_measure', 'precision', 'recall'}
+    """
+    est = np.sort(np.asarray(estimated, dtype=np.float64))
+    ref = np.sort(np.asarray(reference, dtype=np.float64))
+    if len(est) == 0 or len(ref) == 0:
+        return {'f_measure': 0.0, 'precision': 0.0, 'recall': 0.0}
+
+    # Greedy matching in time order is optimal when tolerance < half the beat period
+    matched = 0
+    used = np.zeros(len(est), dtype=bool)
+    for r in ref:
+        i = np.searchsorted(est, r - tolerance)
+        while i < len(est) and est[i] <= r + tolerance:
+            if not used[i]:
+                used[i] = True
+                matched += 1
+                break
+            i += 1
+
+    precision = matched / len(est)
+    recall = matched / len(ref)
+    f = 2 * precision * recall / (precision + recall) if matched else 0.0
+    return {'f_measure': f, 'precision': precision, 'recall': recall}
+
+
+def bpm_error(estimated: float, reference: float) -> Dict[str, float]:
+    """Relative BPM error, plus the error allowing double/half-tempo octave mistakes."""
+    if reference <= 0:
+        return {'bpm_error': 0.0, 'bpm_error_octave': 0.0}
+    rel = abs(estimated - reference) / reference
+    octave = min(abs(estimated * k - reference) / reference for k in (0.5, 1.0, 2.0))
+    return {'bpm_error': rel, 'bpm_error_octave': octave}
+
+
+# ============================================================================
+# Benchmark runs
+# ============================================================================
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _run_target(target: str, path: str) -> Dict[str, Any]:
+    """Run one analysis entry point and pull out tempo/beat estimates."""
+    if target == 'analyzer':
+        from choreography.audio_analyzer import AudioAnalyzer
+        analysis = AudioAnalyzer().analyze(path, profile=True)
+        if analysis is None:
+            raise RuntimeError("AudioAnalyzer returned None")
+        return {'bpm': analysis['bpm'], 'beats': analysis['beats'],
+                'profile': analysis.get('profile', [])}
+    if target == 'segments':
+        from choreography.segment_analyzer import analyze_segments
+        segments = analyze_segments(path)
+        return {'segments': len(segments)}
+    if target == 'raw':
+        from choreography.inspect_essentia_raw import analyze_raw
+        raw = analyze_raw(path)
+        return {'bpm': raw['rhythm']['bpm'], 'beats': raw['rhythm']['beats']}
+    raise ValueError(f"Unknown target: {target}")
+
+
+def _worker(target: str, path: str, verbose: bool, queue):
+    """Child process body: import, run, report timing and memory."""
+    try:
+        import essentia
+        essentia.log.infoActive = False
+        # Import before measuring so module loading is not counted
+        import choreography.audio_analyzer  # noqa: F401
+        import choreography.inspect_essentia_raw  # noqa: F401
+        baseline_rss = _max_rss_mb()
+        sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        with sink:
+            result = _run_target(target, path)
+        result.update({
+            'wall_time': time.perf_counter() - wall_start,
+            'cpu_time': time.process_time() - cpu_start,
+            'peak_rss_mb': _max_rss_mb(),
+            'baseline_rss_mb': baseline_rss,
+        })
+        queue.put(result)
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_once(target: str, path: str, timeout: Optional[float] = None,
+             verbose: bool = False) -> Dict[str, Any]:
+    """
+    Run a target on a file in a fresh process.
+
+    Polls the result queue so a child that dies without reporting (e.g.
+    OOM-killed) or exceeds the timeout gives an error row instead of
+    blocking the benchmark.
+    """
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_worker, args=(target, path, verbose, queue))
+    proc.start()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=POLL_INTERVAL)
+        except Empty:
+            if not proc.is_alive():
+                # The child may have put its result just before exiting
+                try:
+                    result = queue.get(timeout=POLL_INTERVAL)
+                except Empty:
+                    result = {'error': f"worker exited with code {proc.exitcode} without a result"}
+            elif deadline is not None and time.monotonic() > deadline:
+                proc.terminate()
+                result = {'error': f"timed out after {timeout}s"}
+    proc.join()
+    return result
+
+
+def run_benchmark(lengths: List[float], signals: List[str], targets: List[str],
+                  bpms: List[float], timeout: Optional[float] = None,
+                  verbose: bool = False) -> List[Dict[str, Any]]:
+    """
+    Run every target on every signal at every length.
+
+    Returns:
+        List of result rows (JSON-serializable)
+    """
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='analysis_bench_') as tmp:
+        for length in lengths:
+            for signal in signals:
+                variants = bpms if signal == 'click' else [None]
+                for bpm in variants:
+                    path = os.path.join(tmp, f"{signal}_{int(length)}s.wav")
+                    truth = generate_signal(signal, path, length, bpm=bpm or 120.0)
+                    label = f"{signal}@{bpm:g}" if bpm else signal
+
+                    for target in targets:
+                        print(f"[Benchmark] {target:<9} {label:<10} {length:>6.0f}s ...", end=' ', flush=True)
+                        result = run_once(target, path, timeout, verbose)
+                        row = {'target': target, 'signal': label, 'length': float(length)}
+
+                        if 'error' in result:
+                            row['error'] = result['error']
+                            print(f"ERROR ({result['error']})")
+                            rows.append(row)
+                            continue
+
+                        row.update({k: result[k] for k in
+                                    ('wall_time', 'cpu_time', 'peak_rss_mb', 'baseline_rss_mb')})
+                        row['realtime_factor'] = length / row['wall_time'] if row['wall_time'] > 0 else 0.0
+                        if 'profile' in result:
+                            row['profile'] = result['profile']
+
+                        if 'bpm' in truth and 'bpm' in result:
+                            row['bpm_estimate'] = float(result['bpm'])
+                            row.update(bpm_error(result['bpm'], truth['bpm']))
+                            row.update(beat_f_measure(result['beats'], truth['beats']))
+
+                        print(f"{row['wall_time']:.1f}s, {row['peak_rss_mb']:.0f} MB")
+                        rows.append(row)
+
+                    os.remove(path)
+    return rows
+
+
+def scaling_exponents(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Fit runtime ~ length^k per target (log-log least squares).
+
+    k near 1 means linear scaling; noticeably above 1 flags superlinear steps.
+    """
+    exponents = {}
+    for target in sorted({r['target'] for r in rows}):
+        points = [(r['length'], r['wall_time']) for r in rows
+                  if r['target'] == target and 'wall_time' in r and r['wall_time'] > 0]
+        lengths = sorted({p[0] for p in points})
+        if len(lengths) < 2:
+            continue
+        # Average over signals at each length
+        x = np.log(lengths)
+        y = np.log([np.mean([w for l, w in points if l == length]) for length in lengths])
+        exponents[target] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """Render benchmark rows as a text table."""
+    lines = [
+        f"{'Target':<9}  {'Signal':<10}  {'Length':>7}  {'Wall (s)':>9}  {'x RT':>7}  "
+        f"{'Peak MB':>8}  {'BPM':>7}  {'BPM err':>8}  {'Beat F':>7}",
+        "-" * 88,
+    ]
+    for r in rows:
+        if 'error' in r:
+            lines.append(f"{r['target']:<9}  {r['signal']:<10}  {r['length']:>6.0f}s  ERROR: {r['error']}")
+            continue
+        bpm = f"{r['bpm_estimate']:>7.1f}" if 'bpm_estimate' in r else f"{'-':>7}"
+        err = f"{r['bpm_error_octave'] * 100:>7.1f}%" if 'bpm_error_octave' in r else f"{'-':>8}"
+        fm = f"{r['f_measure']:>7.3f}" if 'f_measure' in r else f"{'-':>7}"
+        lines.append(
+            f"{r['target']:<9}  {r['signal']:<10}  {r['length']:>6.0f}s  {r['wall_time']:>9.2f}  "
+            f"{r['realtime_factor']:>6.1f}x  {r['peak_rss_mb']:>8.0f}  {bpm}  {err}  {fm}"
+        )
+
+    profiled = [r for r in rows if r.get('profile')]
+    if profiled:
+        lines.append("")
+        lines.append("Slowest analyzer step per run:")
+        for r in profiled:
+            top = max((p for p in r['profile'] if '/' not in p['step']), key=lambda p: p['wall_time'])
+            share = top['wall_time'] / r['wall_time'] * 100 if r['wall_time'] > 0 else 0.0
+            lines.append(f"  {r['signal']:<10} {r['length']:>6.0f}s  {top['step']} "
+                         f"({top['wall_time']:.2f}s, {share:.0f}%)")
+
+    exponents = scaling_exponents(rows)
+    if exponents:
+        lines.append("")
+        lines.append("Runtime scaling (wall ~ length^k):")
+        for target, k in exponents.items():
+            lines.append(f"  {target:<9} k = {k:.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audio analysis on synthetic signals")
+    parser.add_argument('--lengths', type=float, nargs='+',
+                        help=f"Signal lengths in seconds (default: {' '.join(map(str, DEFAULT_LENGTHS))})")
+    parser.add_argument('--quick', action='store_true',
+                        help=f"Short lengths only ({' '.join(map(str, QUICK_LENGTHS))}s)")
+    parser.add_argument('--signals', nargs='+', choices=SIGNALS, default=list(SIGNALS))
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    parser.add_argument('--bpms', type=float, nargs='+', default=list(DEFAULT_BPMS),
+                        help='Click track tempos')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Per-run timeout in seconds')
+    parser.add_argument('--output', type=str, help='Write JSON results to this path')
+    parser.add_argument('--verbose', action='store_true', help='Show analyzer output')
+    args = parser.parse_args()
+
+    lengths = args.lengths or (QUICK_LENGTHS if args.quick else DEFAULT_LENGTHS)
+    rows = run_benchmark(list(lengths), args.signals, args.targets, args.bpms,
+                         args.timeout, args.verbose)
+
+    print("\n" + "=" * 88)
+    print("ANALYSIS BENCHMARK")
+    print("=" * 88)
+    print(format_report(rows))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rows': rows, 'scaling': scaling_exponents(rows)}, f, indent=2)
+        print(f"\n✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
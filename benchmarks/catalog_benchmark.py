@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Move Catalog Benchmark
+
+Times the move queries the tools and the duration solver make - name lookup,
+moves of a type, moves in a duration range, moves closest to a duration -
+as linear scans over the metadata dict (the previous implementation) and as
+MoveCatalog index queries, and checks both return the same moves.
+
+The real library has ~100 moves; --sizes scales it up with synthetic moves
+(durations resampled from the real ones) to show how each approach grows.
+
+Usage:
+    python benchmarks/catalog_benchmark.py
+    python benchmarks/catalog_benchmark.py --sizes 100 1000 10000 100000
+    python benchmarks/catalog_benchmark.py --output catalog_bench.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Callable
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from choreography.move_catalog import MoveCatalog
+
+
+METADATA_FILE = Path(__file__).parent.parent / "choreography" / "move_metadata.json"
+DEFAULT_SIZES = (100, 1000, 10000)
+QUERIES_PER_RUN = 200
+
+
+def load_metadata(size: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """The real move metadata, padded with synthetic moves up to `size` entries."""
+    with open(METADATA_FILE) as f:
+        metadata = json.load(f)
+
+    rng = np.random.default_rng(seed)
+    real = list(metadata.values())
+    for i in range(len(metadata), size):
+        base = real[rng.integers(len(real))]
+        metadata[f"synthetic_{i}"] = {
+            'duration': float(base['duration'] * rng.uniform(0.8, 1.25)),
+            'type': base['type'],
+            'library': 'synthetic',
+        }
+    return metadata
+
+
+# ============================================================================
+# Queries (dict scans as previously implemented vs. catalog indexes)
+# ============================================================================
+
+def scan_by_type(metadata, move_type):
+    return [name for name, data in metadata.items() if data['type'] == move_type]
+
+
+def scan_in_range(metadata, min_dur, max_dur):
+    return [name for name, data in metadata.items() if min_dur <= data['duration'] <= max_dur]
+
+
+def scan_nearest(metadata, duration, k, move_type, max_duration):
+    candidates = [(name, data['duration']) for name, data in metadata.items()
+                  if data['type'] == move_type and data['duration'] <= max_duration]
+    candidates.sort(key=lambda x: (abs(x[1] - duration), x[1], x[0]))
+    return [name for name, _ in candidates[:k]]
+
+
+def _time(fn: Callable, args_list: List[tuple]) -> float:
+    """Mean microseconds per call over args_list."""
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def run_size(size: int, seed: int = 0) -> Dict[str, Any]:
+    """Benchmark one catalog size; returns per-query timings in microseconds."""
+    metadata = load_metadata(size, seed)
+    build_start = time.perf_counter()
+    catalog = MoveCatalog(metadata)
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    rng = np.random.default_rng(seed + 1)
+    names = list(metadata)
+    types = catalog.types
+    lookups = [(names[i],) for i in rng.integers(len(names), size=QUERIES_PER_RUN)]
+    by_type = [(types[i],) for i in rng.integers(len(types), size=QUERIES_PER_RUN)]
+    ranges = [(lo, lo + w) for lo, w in zip(rng.uniform(1, 10, QUERIES_PER_RUN),
+                                            rng.uniform(0.1, 1.0, QUERIES_PER_RUN))]
+    nearest = [(d, 5, types[i], d + 1.5) for d, i in zip(rng.uniform(1, 12, QUERIES_PER_RUN),
+                                                         rng.integers(len(types), size=QUERIES_PER_RUN))]
+
+    # Same answers (catalog lists are duration-sorted, so compare as sets)
+    for args in ranges[:20]:
+        assert set(scan_in_range(metadata, *args)) == set(catalog.names_in_range(*args))
+    for (move_type,) in by_type[:5]:
+        assert set(scan_by_type(metadata, move_type)) == set(catalog.names_by_type(move_type))
+    for d, k, move_type, max_d in nearest[:20]:
+        assert scan_nearest(metadata, d, k, move_type, max_d) == \
+            catalog.nearest(d, k, move_type, max_duration=max_d)
+
+    queries = {
+        'lookup': (lambda n: metadata[n]['duration'], catalog.duration, lookups),
+        'by_type': (lambda t: scan_by_type(metadata, t), catalog.names_by_type, by_type),
+        'in_range': (lambda lo, hi: scan_in_range(metadata, lo, hi), catalog.names_in_range, ranges),
+        'nearest': (lambda d, k, t, m: scan_nearest(metadata, d, k, t, m),
+                    lambda d, k, t, m: catalog.nearest(d, k, t, max_duration=m), nearest),
+    }
+    row = {'size': size, 'build_ms': build_ms}
+    for name, (scan_fn, catalog_fn, args_list) in queries.items():
+        row[name] = {'scan_us': _time(scan_fn, args_list), 'catalog_us': _time(catalog_fn, args_list)}
+    return row
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """Render benchmark rows as a fixed-width table."""
+    lines = [
+        f"{'Moves':>8}  {'Query':<9}  {'Scan (us)':>10}  {'Catalog (us)':>12}  {'Speedup':>8}",
+        "-" * 56,
+    ]
+    for row in rows:
+        for name in ('lookup', 'by_type', 'in_range', 'nearest'):
+            scan, indexed = row[name]['scan_us'], row[name]['catalog_us']
+            speedup = scan / indexed if indexed > 0 else float('inf')
+            lines.append(f"{row['size']:>8}  {name:<9}  {scan:>10.1f}  {indexed:>12.1f}  {speedup:>7.1f}x")
+        lines.append(f"{row['size']:>8}  {'build':<9}  {'':>10}  {row['build_ms'] * 1000:>12.0f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MoveCatalog queries against dict scans")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Catalog sizes (real moves padded with synthetic ones)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, help='Write JSON results to this path')
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        print(f"[Benchmark] {size} moves ...", flush=True)
+        rows.append(run_size(size, args.seed))
+
+    print("\n" + "=" * 56)
+    print("MOVE CATALOG BENCHMARK")
+    print("=" * 56)
+    print(format_report(rows))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
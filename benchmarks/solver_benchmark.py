@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Duration Solver Benchmark
+
+Runs solve_duration_constraint's previous randomized greedy search and the
+exact DP solver (duration_solver.solve) on the same targets over the real
+move metadata, and reports for each: how often it found a solution within
+tolerance, the mean fit error of its best solution, and the time per call.
+
+Usage:
+    python benchmarks/solver_benchmark.py
+    python benchmarks/solver_benchmark.py --targets 40 --max-target 90
+    python benchmarks/solver_benchmark.py --tolerance 0.3
+    python benchmarks/solver_benchmark.py --output solver_bench.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from choreography import duration_solver
+from choreography.move_catalog import MoveCatalog
+
+
+METADATA_FILE = Path(__file__).parent.parent / "choreography" / "move_metadata.json"
+TOLERANCE = 1.5
+NUM_SOLUTIONS = 3
+
+
+def greedy_solve(catalog: MoveCatalog, target: float, move_type: Optional[str],
+                 tolerance: float = TOLERANCE, num_solutions: int = NUM_SOLUTIONS) -> List[float]:
+    """The previous randomized greedy search; returns the errors of the solutions found."""
+    names, _ = catalog.sorted_moves(move_type)
+    errors = []
+    for _ in range(num_solutions * 3):
+        total = 0.0
+        entries = 0
+        while total < target - tolerance:
+            remaining = target - total
+            n_candidates = catalog.count_at_most(remaining + tolerance, move_type)
+            if n_candidates == 0:
+                break
+            if random.random() < 0.7:
+                move_name = random.choice(catalog.nearest(remaining, 5, move_type,
+                                                          max_duration=remaining + tolerance))
+            else:
+                move_name = names[random.randrange(n_candidates)]
+            move_dur = catalog.duration(move_name)
+            max_cycles = int((remaining + tolerance) / move_dur)
+            cycles = random.randint(1, min(3, max_cycles)) if max_cycles > 1 else 1
+            total += move_dur * cycles
+            entries += 1
+        if entries and abs(total - target) <= tolerance:
+            errors.append(abs(total - target))
+        if len(errors) >= num_solutions:
+            break
+    return sorted(errors)
+
+
+def dp_solve(catalog: MoveCatalog, target: float, move_type: Optional[str],
+             tolerance: float = TOLERANCE, num_solutions: int = NUM_SOLUTIONS) -> List[float]:
+    """The exact solver; returns the errors of its solutions."""
+    _, durations = catalog.sorted_moves(move_type)
+    return [result['error'] for result in duration_solver.solve(durations, target, tolerance, k=num_solutions)]
+
+
+def run(catalog: MoveCatalog, targets: List[float], tolerance: float = TOLERANCE,
+        seed: int = 0) -> Dict[str, Any]:
+    """Benchmark both solvers on every (target, move type)."""
+    random.seed(seed)
+    results = {}
+    for name, solver in (('greedy', greedy_solve), ('dp', dp_solve)):
+        found, best_errors, elapsed, calls = 0, [], 0.0, 0
+        for target in targets:
+            for move_type in catalog.types:
+                start = time.perf_counter()
+                errors = solver(catalog, target, move_type, tolerance)
+                elapsed += time.perf_counter() - start
+                calls += 1
+                if errors:
+                    found += 1
+                    best_errors.append(errors[0])
+        results[name] = {
+            'found_rate': found / calls,
+            'mean_best_error': float(np.mean(best_errors)) if best_errors else None,
+            'ms_per_call': elapsed / calls * 1000,
+        }
+    return results
+
+
+def format_report(results: Dict[str, Any]) -> str:
+    """Render results as a fixed-width table."""
+    lines = [f"{'Solver':<8}  {'Found':>6}  {'Best error (s)':>14}  {'ms/call':>8}", "-" * 42]
+    for name, row in results.items():
+        error = f"{row['mean_best_error']:.3f}" if row['mean_best_error'] is not None else '-'
+        lines.append(f"{name:<8}  {row['found_rate']:>6.0%}  {error:>14}  {row['ms_per_call']:>8.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the duration solvers")
+    parser.add_argument('--targets', type=int, default=30, help='Number of random targets')
+    parser.add_argument('--max-target', type=float, default=60.0, help='Largest target duration (s)')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Accepted error (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, help='Write JSON results to this path')
+    args = parser.parse_args()
+
+    catalog = MoveCatalog.from_file(METADATA_FILE)
+    rng = np.random.default_rng(args.seed)
+    targets = list(rng.uniform(2.0, args.max_target, args.targets))
+    results = run(catalog, targets, args.tolerance, args.seed)
+
+    print("\n" + "=" * 42)
+    print(f"DURATION SOLVER BENCHMARK ({len(catalog)} moves, {len(targets)} targets, ±{args.tolerance}s)")
+    print("=" * 42)
+    print(format_report(results))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Background Audio Analysis
+
+Runs AudioAnalyzer in a separate worker process so interactive front ends
+(desktop_viewer) keep rendering while a track is analyzed. Essentia holds the
+GIL for long stretches, so a thread in the viewer process would still stall
+the render loop; a process does not, and can be cancelled by terminating it.
+
+    jobs = AnalysisJobManager()
+    jobs.start(audio_path)
+    ...
+    finished = jobs.poll()  # call once per frame; never blocks
+    if finished and finished['state'] == DONE:
+        use(finished['result'])
+
+The worker is a fresh interpreter started through this module
+(`python -m choreography.analysis_worker`), so it imports only the
+choreography package and Essentia. A multiprocessing spawn worker would
+instead re-import the front end's main module on every job (for the viewer:
+GLFW, MuJoCo, OpenGL, imgui, pygame, the agent and its module-level objects).
+
+The worker streams (stage, fraction) progress messages, pickled, over its
+stdout; a reader thread queues them and the manager only ever reads that
+queue without blocking.
+"""
+
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+from typing import Dict, Any, Optional
+
+
+WORKER_MODULE = 'choreography.analysis_worker'
+
+# Directory holding the choreography package, put on the worker's PYTHONPATH
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Job states
+IDLE = 'idle'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+def _analysis_process(send, audio_path: str, options: Dict[str, Any]):
+    """Analyze one file and post progress and the result through send(message)."""
+    # Imported here so the front end never loads Essentia
+    from .audio_analyzer import AudioAnalyzer
+
+    def progress(stage, fraction):
+        send(('progress', stage, fraction))
+
+    try:
+        analysis = AudioAnalyzer(progress_callback=progress).analyze(audio_path, **options)
+    except Exception as e:
+        send(('error', str(e)))
+        return
+
+    if analysis is None:
+        send(('error', 'Analysis failed (see log)'))
+    else:
+        send(('result', analysis))
+
+
+def _worker_main():
+    """Worker entry point: read one (audio_path, options) job from stdin, pickle messages to stdout."""
+    # Messages keep the real stdout; the analyzer's log prints go to stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def send(message):
+        pickle.dump(message, channel)
+        channel.flush()
+
+    audio_path, options = pickle.load(sys.stdin.buffer)
+    _analysis_process(send, audio_path, options)
+    channel.close()
+
+
+def _read_messages(stream, messages: queue.Queue):
+    """Queue the worker's messages until it closes its stdout (exits or is killed)."""
+    with stream:
+        while True:
+            try:
+                messages.put(pickle.load(stream))
+            except (EOFError, OSError, ValueError, pickle.UnpicklingError):
+                return
+
+
+class AnalysisJobManager:
+    """Runs one audio analysis at a time in a worker process."""
+
+    def __init__(self):
+        """Initialize an idle manager (the worker is started per job)."""
+        self._process = None
+        self._reader = None
+        self._messages = None
+        self._reset(IDLE, audio_path=None)
+        self.job_id = 0
+
+    def _reset(self, state: str, audio_path: Optional[str]):
+        self.state = state
+        self.audio_path = audio_path
+        self.stage = ''
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.state == RUNNING
+
+    def start(self, audio_path: str, **options) -> int:
+        """
+        Start analyzing a file, cancelling any job still running.
+
+        Args:
+            audio_path: Path to audio file
+            **options: Passed to AudioAnalyzer.analyze() (start, end, chunk_duration, ...)
+
+        Returns:
+            Job id (increments per start)
+        """
+        if self.is_running:
+            self.cancel()
+
+        self.job_id += 1
+        self._reset(RUNNING, audio_path)
+        self.stage = 'starting'
+        # A fresh interpreter (never a fork), safe next to GLFW/OpenGL and websocket threads
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [PACKAGE_ROOT, env.get('PYTHONPATH')]))
+        self._process = subprocess.Popen([sys.executable, '-m', WORKER_MODULE],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+        pickle.dump((audio_path, options), self._process.stdin)
+        self._process.stdin.close()
+
+        self._messages = queue.Queue()
+        self._reader = threading.Thread(
+            target=_read_messages,
+            args=(self._process.stdout, self._messages),
+            name=f"audio-analysis-{self.job_id}",
+            daemon=True,
+        )
+        self._reader.start()
+        print(f"[AnalysisJobs] Job {self.job_id} started: {audio_path}")
+        return self.job_id
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """
+        Read pending worker messages without blocking.
+
+        Returns:
+            The finished job exactly once, when it completes or fails:
+            {'job_id', 'audio_path', 'state', 'result', 'error'}; otherwise None
+        """
+        if not self.is_running:
+            return None
+
+        # Checked before draining: once the worker has exited and the reader
+        # has hit end of stream, everything it posted is already in the queue
+        alive = self._process.poll() is None or self._reader.is_alive()
+        while self.is_running:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'progress':
+                self.stage, self.progress = message[1], message[2]
+            elif kind == 'result':
+                self.state, self.result, self.progress = DONE, message[1], 1.0
+            elif kind == 'error':
+                self.state, self.error = FAILED, message[1]
+
+        if self.is_running and not alive:
+            self.state = FAILED
+            self.error = f"Analysis worker exited unexpectedly (code {self._process.returncode})"
+
+        if self.is_running:
+            return None
+
+        self._cleanup(wait=False)
+        print(f"[AnalysisJobs] Job {self.job_id} {self.state}"
+              + (f": {self.error}" if self.error else ""))
+        return {
+            'job_id': self.job_id,
+            'audio_path': self.audio_path,
+            'state': self.state,
+            'result': self.result,
+            'error': self.error,
+        }
+
+    def cancel(self) -> bool:
+        """
+        Stop the running job (the worker is terminated).
+
+        Returns:
+            True if a job was cancelled
+        """
+        if not self.is_running:
+            return False
+        self._process.terminate()
+        self._cleanup()
+        self.state = CANCELLED
+        self.stage = 'cancelled'
+        print(f"[AnalysisJobs] Job {self.job_id} cancelled")
+        return True
+
+    def shutdown(self):
+        """Cancel any running job; call before the application exits."""
+        self.cancel()
+
+    def _cleanup(self, wait: bool = True):
+        """
+        Release the worker process, its reader thread and the queue.
+
+        Args:
+            wait: Wait for the (terminated) worker and its reader. A finished
+                worker is only shutting its interpreter down, so the render
+                loop does not wait for it; subprocess reaps it on the next start().
+        """
+        if self._process is not None:
+            if wait:
+                try:
+                    self._process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+                    self._process.wait()
+            self._process = None
+        if self._reader is not None:
+            # Ends by itself at end of stream (the worker closed stdout)
+            if wait:
+                self._reader.join(timeout=5)
+            self._reader = None
+        self._messages = None
+
+
+if __name__ == '__main__':
+    _worker_main()
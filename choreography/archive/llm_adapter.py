@@ -13,6 +13,7 @@ except ImportError:
 
 # Import context builder
 from choreography.context_builder import ChoreographyContext
+from choreography.beat_grid import BeatGrid
 
 
 class ChoreographyLLM:
@@ -168,8 +169,11 @@ class ChoreographyLLM:
                     "cycles": entry.get('cycles', 1)
                 })
 
-        # Calculate actual total duration using BPM formula
-        actual_duration = self.context.calculate_total_duration(choreography_for_calc, bpm)
+        # Calculate actual total duration on the detected beats (BPM formula if there are none)
+        actual_duration = self.context.calculate_total_duration(
+            choreography_for_calc, bpm,
+            beat_grid=BeatGrid.from_analysis(audio_features),
+            start_time=audio_features.get('offset', 0.0))
         expected_duration = audio_features['duration']
         beat_duration = 60.0 / bpm
 
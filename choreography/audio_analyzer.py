@@ -2,89 +2,186 @@
 
 import essentia.standard as es
 import numpy as np
-from .segment_analyzer import analyze_segments
+from .segment_analyzer import (analyze_segments, extract_segmentation_features,
+                               concat_segmentation_features, segment_from_features)
+from .feature_store import FeatureStore, FRAME_FEATURES, extract_frame_features
+from .vocal_detector import detect_vocal_sections
+from .beat_grid import BeatGrid
+from .profiling import StepProfiler
+from .audio_io import load_mono, iter_chunks, get_duration
+
+
+# Context (seconds) shared by neighbouring chunks in chunked analysis; covers
+# beat-tracker warm-up and the HPSS median filter at chunk edges
+CHUNK_OVERLAP = 12.0
+
+# Approximate fraction of a full analysis completed when each top-level step
+# starts (from profiled runs; rhythm_patterns and segments dominate)
+STAGE_PROGRESS = {
+    'load': 0.0,
+    'audio_end': 0.05,
+    'rhythm': 0.06,
+    'danceability': 0.15,
+    'acoustic_dynamics': 0.20,
+    'key': 0.22,
+    'spectral_features': 0.25,
+    'onset_rate': 0.30,
+    'frame_features': 0.33,
+    'vocal_texture': 0.45,
+    'pitch_content': 0.50,
+    'timbre': 0.55,
+    'rhythm_patterns': 0.60,
+    'dissonance': 0.80,
+    'chunks': 0.0,
+    'segments': 0.82,
+    'vocal_instrumental': 0.93,
+    'harmonic_percussive': 0.95,
+    'tempo_stability': 0.97,
+    'beat_grid': 0.98,
+}
+
+
+def _merge_weighted(values, weights, max_keys=()):
+    """
+    Combine per-chunk extractor results, weighted by chunk duration.
+
+    Floats are averaged; dicts are merged key by key (keys in `max_keys`
+    take the maximum instead, e.g. ranges).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    first = values[0]
+    if isinstance(first, dict):
+        merged = {}
+        for key in first:
+            column = [v[key] for v in values]
+            if key in max_keys:
+                merged[key] = float(np.max(column))
+            else:
+                merged[key] = _merge_weighted(column, weights, max_keys)
+        return merged
+    return float(np.average(np.asarray(values, dtype=np.float64), weights=weights))
 
 
 class AudioAnalyzer:
     """Analyzes audio files to extract features for choreography generation."""
 
-    def __init__(self):
-        """Initialize the audio analyzer with Essentia algorithms."""
+    def __init__(self, progress_callback=None):
+        """
+        Initialize the audio analyzer with Essentia algorithms.
+
+        Args:
+            progress_callback: Optional callable(stage, fraction) told about
+                progress during analyze(); fraction is an estimate in [0, 1]
+        """
         self.mono_loader = None
         self.rhythm_extractor = None
+        self.progress_callback = progress_callback
 
-    def analyze(self, audio_path):
+    def _report_progress(self, stage, fraction):
+        """Forward progress to the callback (errors in the callback never abort analysis)."""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(stage, float(min(max(fraction, 0.0), 1.0)))
+        except Exception as e:
+            print(f"[AudioAnalyzer] Progress callback failed: {e}")
+
+    def _on_step(self, name):
+        """StepProfiler hook: report top-level steps as progress."""
+        if name in STAGE_PROGRESS:
+            self._report_progress(name, STAGE_PROGRESS[name])
+
+    def analyze(self, audio_path, profile=False, start=None, end=None, chunk_duration=None):
         """
         Analyze an audio file and extract comprehensive features.
 
         Args:
             audio_path: Path to audio file (.mp3, .wav, .flac, etc.)
+            profile: Record wall time, CPU time and peak memory for every
+                extraction step and segmentation phase (adds a 'profile' key)
+            start: Analyze only from this time in seconds. The file is seeked,
+                so only the window is decoded. All times in the result (beats,
+                segments, sections, frame features) are file times; 'offset'
+                holds the window start and 'duration' the window's content length.
+            end: Analyze only up to this time in seconds
+            chunk_duration: Stream the audio in chunks of this many seconds
+                (plus CHUNK_OVERLAP of shared context) instead of decoding it
+                whole, so peak memory does not grow with track length.
+                Per-chunk results are merged into the same schema.
 
         Returns:
             dict: Audio analysis containing BPM, beats, segments, mood, etc.
         """
+        profiler = StepProfiler(enabled=profile, on_step=self._on_step)
         try:
-            # Load audio
-            audio = es.MonoLoader(filename=audio_path)()
-
-            # Detect and trim silence at the end
-            actual_audio_end = self._detect_audio_end(audio)
+            offset = float(start or 0.0)
+
+            if chunk_duration:
+                # Stream the file in overlapping chunks (bounded memory)
+                with profiler.step('chunks'):
+                    results = self._analyze_chunks(audio_path, chunk_duration, offset, end)
+                with profiler.step('segments'):
+                    segments, structure_tree = self._segment_chunked_features(
+                        results.pop('segmentation_features'), results, offset, profiler)
+            else:
+                # Load audio
+                with profiler.step('load'):
+                    audio, _ = load_mono(audio_path, start=start, end=end)
 
-            # Get actual content duration (excluding silent tail)
-            duration = actual_audio_end
-            total_duration = len(audio) / 44100.0  # Full file duration including silence
+                results = self._extract_signal_features(audio, offset, profiler)
 
-            # Extract rhythm features
-            bpm, beats, beats_confidence, _, beats_intervals = self._extract_rhythm(audio)
+                # Extract segments (music structure)
+                with profiler.step('segments'):
+                    segments, structure_tree = self._extract_segments(audio_path, profiler, audio=audio, offset=offset)
+                del audio
 
-            # Extract segments (music structure)
-            segments = self._extract_segments(audio_path)
-
-            # Extract danceability (PRIMARY energy metric for choreography!)
-            danceability = self._extract_danceability(audio)
+            # Get actual content duration (excluding silent tail)
+            duration = results['duration']
+            total_duration = results['total_duration']  # Full file (or window) duration including silence
+
+            bpm = results['bpm']
+            beats = results['beats']
+            beats_confidence = results['beats_confidence']
+            beats_intervals = results['beats_intervals']
+            danceability = results['danceability']
+            loudness = results['loudness']
+            dynamic_complexity = results['dynamic_complexity']
+            key, scale, key_strength = results['key'], results['scale'], results['key_strength']
+            spectral = results['spectral']
+            onset_rate = results['onset_rate']
+            frame_features = results['frame_features']
+            pitch_content = results['pitch_content']
+            timbre = results['timbre']
+            rhythm_patterns = results['rhythm_patterns']
+            dissonance = results['dissonance']
 
             # Derive choreography energy from danceability + BPM
             # Danceability already measures rhythmic strength, tempo appropriateness
             # This is what matters for choosing moves, NOT acoustic loudness
             energy = self._calculate_choreography_energy(danceability, bpm)
 
-            # Extract acoustic dynamics (for reference only, not used for move selection)
-            loudness, dynamic_complexity = self._extract_acoustic_dynamics(audio)
-
-            # Extract key and scale
-            key, scale, key_strength = self._extract_key(audio)
-
-            # Extract spectral features
-            spectral = self._extract_spectral_features(audio)
-
-            # Extract onset density
-            onset_rate = self._extract_onset_rate(audio)
-
             # Extract vocal/instrumental characteristics
-            vocal_instrumental = self._extract_vocal_instrumental(audio)
+            with profiler.step('vocal_instrumental'):
+                vocal_instrumental = self._extract_vocal_instrumental(
+                    frame_features, duration, results['vocal_texture'])
 
             # Extract harmonic/percussive components
-            harmonic_percussive = self._extract_harmonic_percussive(audio)
-
-            # Extract pitch/melody content
-            pitch_content = self._extract_pitch_content(audio)
-
-            # Extract timbre characteristics
-            timbre = self._extract_timbre(audio)
-
-            # Extract rhythm patterns
-            rhythm_patterns = self._extract_rhythm_patterns(audio)
-
-            # Extract dissonance
-            dissonance = self._extract_dissonance(audio)
+            with profiler.step('harmonic_percussive'):
+                harmonic_percussive = self._extract_harmonic_percussive(frame_features)
 
             # Extract tempo stability
-            tempo_stability = self._extract_tempo_stability(beats_intervals)
+            with profiler.step('tempo_stability'):
+                tempo_stability = self._extract_tempo_stability(beats_intervals)
+
+            # Index the beats (time <-> beat conversion, downbeats)
+            with profiler.step('beat_grid'):
+                beat_grid = self._build_beat_grid(beats, frame_features)
 
             # Build analysis result
             analysis = {
                 'audio_file': audio_path,
                 'duration': float(duration),
+                'offset': offset,
                 'sample_rate': 44100,
 
                 # Rhythm
@@ -93,11 +190,13 @@ class AudioAnalyzer:
                 'beats_confidence': beats_confidence.tolist() if isinstance(beats_confidence, np.ndarray) else beats_confidence,
                 'beats_intervals': beats_intervals.tolist() if isinstance(beats_intervals, np.ndarray) else beats_intervals,
                 'beat_count': len(beats) if beats is not None else 0,
+                'beat_grid': beat_grid.to_dict() if beat_grid is not None else None,
                 'onset_rate': float(onset_rate) if np.isscalar(onset_rate) else (float(onset_rate[0]) if len(onset_rate) > 0 else 0.0),
 
                 # Structure
                 'segments': segments,
                 'segment_count': len(segments),
+                'structure_tree': structure_tree,  # section -> phrase -> bar (see build_structure_tree)
 
                 # Energy
                 'energy': float(energy),
@@ -135,13 +234,21 @@ class AudioAnalyzer:
 
                 # Tempo stability
                 'tempo_stability': float(tempo_stability),
+
+                # Per-frame time series (see FeatureStore)
+                'frame_features': frame_features.to_dict() if frame_features is not None else None,
             }
 
+            if profile:
+                analysis['profile'] = profiler.report()
+
             # Print comprehensive debug summary
             print("\n" + "="*60)
             print("AUDIO ANALYSIS SUMMARY")
             print("="*60)
             print(f"File: {audio_path}")
+            if offset or end is not None:
+                print(f"Window: {offset:.1f}s - {offset + total_duration:.1f}s")
             print(f"Content Duration: {duration:.1f}s (Total file: {total_duration:.1f}s)")
 
             print(f"\n🎵 CHOREOGRAPHY ENERGY:")
@@ -157,6 +264,8 @@ class AudioAnalyzer:
 
             print(f"\n🎤 VOCAL/INSTRUMENTAL:")
             print(f"  Vocal probability: {vocal_instrumental['vocal_probability']:.3f}")
+            print(f"  Vocal sections: {len(vocal_instrumental['vocal_sections'])}, "
+                  f"instrumental sections: {len(vocal_instrumental['instrumental_sections'])}")
             print(f"  Pitch salience: {vocal_instrumental['pitch_salience']:.3f}")
             print(f"  Spectral complexity: {vocal_instrumental['spectral_complexity']:.3f}")
 
@@ -188,8 +297,13 @@ class AudioAnalyzer:
             print(f"  Rolloff: {spectral['rolloff']:.0f} Hz")
             print(f"  Flatness: {spectral['flatness']:.3f}")
 
+            if profile:
+                print(f"\n⏱  PROFILE:")
+                print(profiler.format_table())
+
             print("="*60 + "\n")
 
+            self._report_progress('done', 1.0)
             return analysis
 
         except Exception as e:
@@ -198,34 +312,270 @@ class AudioAnalyzer:
             traceback.print_exc()
             return None
 
+    def _extract_signal_features(self, audio, offset=0.0, profiler=None):
+        """
+        Run every extractor that works directly on the signal.
+
+        Args:
+            audio: Mono 44.1 kHz samples (whole file or window)
+            offset: File time in seconds of the first sample
+            profiler: Optional StepProfiler
+
+        Returns:
+            dict of extractor results (beats in file times); see analyze()
+        """
+        if profiler is None:
+            profiler = StepProfiler(enabled=False)
+        results = {'total_duration': len(audio) / 44100.0}
+
+        # Detect and trim silence at the end
+        with profiler.step('audio_end'):
+            results['duration'] = self._detect_audio_end(audio)
+
+        # Extract rhythm features
+        with profiler.step('rhythm'):
+            bpm, beats, beats_confidence, _, beats_intervals = self._extract_rhythm(audio)
+        results.update(bpm=bpm, beats=beats + offset, beats_confidence=beats_confidence,
+                       beats_intervals=beats_intervals)
+
+        # Extract danceability (PRIMARY energy metric for choreography!)
+        with profiler.step('danceability'):
+            results['danceability'] = self._extract_danceability(audio)
+
+        # Extract acoustic dynamics (for reference only, not used for move selection)
+        with profiler.step('acoustic_dynamics'):
+            results['loudness'], results['dynamic_complexity'] = self._extract_acoustic_dynamics(audio)
+
+        # Extract key and scale
+        with profiler.step('key'):
+            results['key'], results['scale'], results['key_strength'] = self._extract_key(audio)
+
+        # Extract spectral features
+        with profiler.step('spectral_features'):
+            results['spectral'] = self._extract_spectral_features(audio)
+
+        # Extract onset density
+        with profiler.step('onset_rate'):
+            onset_rate = self._extract_onset_rate(audio)
+            results['onset_rate'] = float(onset_rate) if np.isscalar(onset_rate) else (
+                float(onset_rate[0]) if len(onset_rate) > 0 else 0.0)
+
+        # Extract per-frame time series (shared by the vocal and HPSS summaries)
+        with profiler.step('frame_features'):
+            results['frame_features'] = self._extract_frame_features(audio, offset)
+
+        # Whole-signal texture measures reported alongside the vocal sections
+        with profiler.step('vocal_texture'):
+            results['vocal_texture'] = self._extract_vocal_texture(audio)
+
+        # Extract pitch/melody content
+        with profiler.step('pitch_content'):
+            results['pitch_content'] = self._extract_pitch_content(audio)
+
+        # Extract timbre characteristics
+        with profiler.step('timbre'):
+            results['timbre'] = self._extract_timbre(audio)
+
+        # Extract rhythm patterns
+        with profiler.step('rhythm_patterns'):
+            results['rhythm_patterns'] = self._extract_rhythm_patterns(audio)
+
+        # Extract dissonance
+        with profiler.step('dissonance'):
+            results['dissonance'] = self._extract_dissonance(audio)
+
+        return results
+
+    def _analyze_chunks(self, audio_path, chunk_duration, start=0.0, end=None):
+        """
+        Run the signal extractors chunk by chunk and merge the results.
+
+        Each chunk is decoded with CHUNK_OVERLAP seconds of context around the
+        range it owns. Context-sensitive extractors (beat tracking, frame-level
+        HPSS, segmentation frames) see the padded chunk and keep only results
+        inside the owned range; summary extractors run on the owned samples and
+        are merged weighted by duration. Only one chunk of audio is held at a time.
+
+        Returns:
+            dict like _extract_signal_features(), plus 'segmentation_features'
+        """
+        chunks = []
+        beats = []
+        frame_parts = {name: [] for name in FRAME_FEATURES}
+        segmentation_parts = []
+        energy_sum = 0.0
+        frame_energy_stats = np.zeros(3)  # count, sum, sum of squares
+        key_votes = {}
+        content_end = start
+        store = None
+
+        # Chunks cover 0 -> STAGE_PROGRESS['segments'] of the progress range
+        window_end = end if end is not None else get_duration(audio_path)
+        expected_chunks = 1
+        if window_end:
+            # iter_chunks folds a tail shorter than a quarter chunk into the last chunk
+            expected_chunks = max(1, int(np.ceil((window_end - start) / chunk_duration - 0.25)))
+
+        for audio, chunk_start, own_start, own_end in iter_chunks(
+                audio_path, chunk_duration, CHUNK_OVERLAP, start, end):
+            print(f"[AudioAnalyzer] Chunk {len(chunks) + 1}: {own_start:.1f}s - {own_end:.1f}s")
+            self._report_progress(f"chunks ({len(chunks) + 1}/{expected_chunks})",
+                                  STAGE_PROGRESS['segments'] * len(chunks) / expected_chunks)
+            lo = int(round((own_start - chunk_start) * 44100))
+            hi = int(round((own_end - chunk_start) * 44100))
+            owned = audio[lo:hi]
+            weight = own_end - own_start
+
+            # Beats: track over the padded chunk, keep the owned range
+            bpm, chunk_beats, confidence, _, _ = self._extract_rhythm(audio)
+            chunk_beats = chunk_beats + chunk_start
+            beats.append(chunk_beats[(chunk_beats >= own_start) & (chunk_beats < own_end)])
+
+            # Frame-level features: padded chunk gives the HPSS filter its context
+            store = self._extract_frame_features(audio, chunk_start)
+            if store is not None:
+                for name in FRAME_FEATURES:
+                    frame_parts[name].append(
+                        store.column(name)[store.frame_index(own_start):store.frame_index(own_end)])
+
+            seg = extract_segmentation_features(audio, 44100, chunk_start)
+            keep = (seg['times'] >= own_start) & (seg['times'] < own_end)
+            segmentation_parts.append({name: values[keep] for name, values in seg.items()})
+
+            # Loudness is energy^0.67, so chunks combine through their energies
+            energy_sum += float(np.sum(owned.astype(np.float64) ** 2))
+            frame_energy_stats += self._frame_energy_stats(owned)
+
+            key, scale, strength = self._extract_key(owned)
+            key_votes.setdefault((key, scale), []).append((strength, weight))
+
+            onset_rate = self._extract_onset_rate(owned)
+            chunks.append({
+                'weight': weight,
+                'bpm': float(bpm),
+                'beats_confidence': float(confidence),
+                'danceability': float(self._extract_danceability(owned)),
+                'spectral': self._extract_spectral_features(owned),
+                'onset_rate': float(onset_rate) if np.isscalar(onset_rate) else (
+                    float(onset_rate[0]) if len(onset_rate) > 0 else 0.0),
+                'vocal_texture': self._extract_vocal_texture(owned),
+                'pitch_content': self._extract_pitch_content(owned),
+                'timbre': self._extract_timbre(owned),
+                'rhythm_patterns': self._extract_rhythm_patterns(owned),
+                'dissonance': self._extract_dissonance(owned),
+            })
+
+            content_end = chunk_start + self._detect_audio_end(audio)
+            total_end = own_end
+            del audio, owned
+
+        if not chunks:
+            raise ValueError(f"No audio to analyze in {audio_path}")
+
+        weights = np.array([c['weight'] for c in chunks])
+
+        def merged(key):
+            return _merge_weighted([c[key] for c in chunks], weights, max_keys=('pitch_range',))
+
+        beats = np.concatenate(beats)
+        beats_intervals = np.diff(beats)
+
+        # Duration-weighted median of chunk tempos (robust to a chunk that halves/doubles)
+        chunk_bpms = np.array([c['bpm'] for c in chunks])
+        order = np.argsort(chunk_bpms)
+        half = np.searchsorted(np.cumsum(weights[order]), weights.sum() / 2)
+        bpm = float(chunk_bpms[order][half])
+
+        count, total, total_sq = frame_energy_stats
+        mean_energy = total / count if count else 0.0
+        std_energy = np.sqrt(max(total_sq / count - mean_energy ** 2, 0.0)) if count else 0.0
+
+        # Key: strength-and-duration weighted vote across chunks
+        (key, scale), votes = max(key_votes.items(), key=lambda kv: sum(s * w for s, w in kv[1]))
+        key_strength = sum(s * w for s, w in votes) / sum(w for _, w in votes)
+
+        frame_features = None
+        if store is not None:
+            frame_features = FeatureStore({name: np.concatenate(parts) for name, parts in frame_parts.items()},
+                                          store.sample_rate, store.hop_size, store.frame_size, start)
+
+        print(f"[AudioAnalyzer] Merged {len(chunks)} chunks: {len(beats)} beats, BPM {bpm:.1f}")
+
+        return {
+            'duration': content_end - start,
+            'total_duration': total_end - start,
+            'bpm': bpm,
+            'beats': beats,
+            'beats_confidence': merged('beats_confidence'),
+            'beats_intervals': beats_intervals,
+            'danceability': merged('danceability'),
+            'loudness': energy_sum ** 0.67,
+            'dynamic_complexity': std_energy / (mean_energy + 1e-6),
+            'key': key,
+            'scale': scale,
+            'key_strength': key_strength,
+            'spectral': merged('spectral'),
+            'onset_rate': merged('onset_rate'),
+            'frame_features': frame_features,
+            'vocal_texture': merged('vocal_texture'),
+            'pitch_content': merged('pitch_content'),
+            'timbre': merged('timbre'),
+            'rhythm_patterns': merged('rhythm_patterns'),
+            'dissonance': merged('dissonance'),
+            'segmentation_features': concat_segmentation_features(segmentation_parts),
+        }
+
+    def _segment_chunked_features(self, features, results, offset, profiler=None):
+        """
+        Cluster the merged segmentation frames of a chunked analysis into segments.
+
+        Returns:
+            (segments, structure_tree); the tree is None on the single-segment fallback
+        """
+        try:
+            return segment_from_features(features, results['beats'], results['total_duration'],
+                                         offset=offset, profiler=profiler, return_tree=True)
+        except Exception as e:
+            print(f"Error extracting segments: {e}")
+            duration = results['total_duration']
+            return [{'start': offset, 'end': offset + duration, 'label': 'full', 'energy': 0.5,
+                     'spectral_centroid': 2000.0, 'spectral_rolloff': 1000.0,
+                     'beats_count': 0, 'duration': duration, 'repeat_group': 0}], None
+
     def _extract_rhythm(self, audio):
         """Extract BPM and beat positions."""
         rhythm_extractor = es.RhythmExtractor2013(method="multifeature")
         bpm, beats, beats_confidence, _, beats_intervals = rhythm_extractor(audio)
         return bpm, beats, beats_confidence, _, beats_intervals
 
-    def _extract_segments(self, audio_path):
+    def _extract_segments(self, audio_path, profiler=None, audio=None, offset=0.0):
         """
         Extract music structure segments using real spectral clustering + Essentia features.
 
-        Returns segments with:
+        `audio` is the already-decoded signal (the whole file, or the window
+        starting at `offset` seconds), so the file is not decoded again.
+
+        Returns (segments, structure_tree); segments have:
         - Boundaries detected via agglomerative clustering on MFCCs
         - Labels inferred from position and energy patterns
         - Per-segment energy, spectral centroid, spectral rolloff, beat count
+
+        The tree (section -> phrase -> bar) is None on the single-segment fallback.
         """
         try:
             # Use the new segment_analyzer module
-            segments = analyze_segments(audio_path, target_segments=None)
-            return segments
+            return analyze_segments(audio_path, target_segments=None, profiler=profiler,
+                                    start=offset, audio=audio, return_tree=True)
 
         except Exception as e:
             print(f"Error extracting segments: {e}")
             # Fallback to single-segment
-            audio = es.MonoLoader(filename=audio_path)()
+            if audio is None:
+                audio = es.MonoLoader(filename=audio_path)()
             duration = len(audio) / 44100.0
-            return [{'start': 0.0, 'end': duration, 'label': 'full', 'energy': 0.5,
+            return [{'start': offset, 'end': offset + duration, 'label': 'full', 'energy': 0.5,
                      'spectral_centroid': 2000.0, 'spectral_rolloff': 1000.0,
-                     'beats_count': 0, 'duration': duration}]
+                     'beats_count': 0, 'duration': duration, 'repeat_group': 0}], None
 
     def _calculate_choreography_energy(self, danceability, bpm):
         """
@@ -294,6 +644,14 @@ class AudioAnalyzer:
             return 0.0, 0.0
 
 
+    def _frame_energy_stats(self, audio):
+        """(count, sum, sum of squares) of windowed frame energies, as used for dynamic complexity."""
+        energy_extractor = es.Energy()
+        w = es.Windowing(type='hann')
+        energies = np.array([energy_extractor(w(frame))
+                             for frame in es.FrameGenerator(audio, frameSize=2048, hopSize=1024)])
+        return np.array([len(energies), energies.sum(), np.sum(energies.astype(np.float64) ** 2)])
+
     def _extract_danceability(self, audio):
         """Extract danceability score."""
         try:
@@ -430,56 +788,64 @@ class AudioAnalyzer:
             # Fallback to full duration
             return len(audio) / sample_rate
 
-    def _extract_vocal_instrumental(self, audio):
-        """Detect vocal vs instrumental content."""
-        try:
-            # Use pitch salience to detect vocals
-            pitch_salience_func = es.PitchSalienceFunction()
-            pitch_salience_values = pitch_salience_func(audio)
+    def _extract_vocal_instrumental(self, frame_features, duration, texture):
+        """
+        Detect vocal vs instrumental content over time.
 
-            # Average pitch salience as vocal indicator
-            avg_salience = float(np.mean(pitch_salience_values))
+        Vocal/instrumental intervals come from frame-wise pitch salience and
+        harmonic ratio (see vocal_detector.py), so this reuses the shared frame
+        pass. vocal_probability is the share of the content covered by vocals.
+        `texture` is the _extract_vocal_texture() result for the same audio.
+        """
+        result = {'pitch_salience': 0.0, 'spectral_complexity': 0.0, 'zero_crossing_rate': 0.0,
+                  'vocal_probability': 0.5, 'vocal_sections': [], 'instrumental_sections': []}
+        result.update(texture)
+        try:
+            if frame_features is not None and len(frame_features) > 0:
+                sections = detect_vocal_sections(frame_features, end_time=frame_features.offset + duration)
+                result['pitch_salience'] = float(np.mean(frame_features.column('pitch_salience')))
+                result['vocal_probability'] = sections['vocal_fraction']
+                result['vocal_sections'] = sections['vocal_sections']
+                result['instrumental_sections'] = sections['instrumental_sections']
+
+            return result
+        except Exception as e:
+            print(f"Error extracting vocal/instrumental: {e}")
+            return result
 
+    def _extract_vocal_texture(self, audio):
+        """Spectral complexity and zero crossing rate of the whole signal."""
+        try:
             # Spectral complexity (higher = more instrumental/complex)
             spec_complex = es.SpectralComplexity()
-            complexity = float(spec_complex(audio))
-
             # Zero crossing rate (higher = more noisy/percussive)
             zcr = es.ZeroCrossingRate()
-            zcr_value = float(zcr(audio))
-
-            return {
-                'pitch_salience': avg_salience,
-                'spectral_complexity': complexity,
-                'zero_crossing_rate': zcr_value,
-                'vocal_probability': min(1.0, avg_salience * 2)  # Heuristic
-            }
+            return {'spectral_complexity': float(spec_complex(audio)),
+                    'zero_crossing_rate': float(zcr(audio))}
         except Exception as e:
-            print(f"Error extracting vocal/instrumental: {e}")
-            return {'pitch_salience': 0.0, 'spectral_complexity': 0.0, 'zero_crossing_rate': 0.0, 'vocal_probability': 0.5}
+            print(f"Error extracting vocal texture: {e}")
+            return {'spectral_complexity': 0.0, 'zero_crossing_rate': 0.0}
 
-    def _extract_harmonic_percussive(self, audio):
-        """Separate harmonic and percussive components."""
+    def _extract_harmonic_percussive(self, frame_features):
+        """Summarize harmonic and percussive energy from the frame-level HPSS ratios."""
         try:
-            # HPSS = Harmonic-Percussive Source Separation
-            hpss = es.HPSS()
-            harmonic, percussive = hpss(audio)
-
-            # Calculate energy in each component
-            harmonic_energy = float(np.sqrt(np.mean(harmonic ** 2)))
-            percussive_energy = float(np.sqrt(np.mean(percussive ** 2)))
-
-            total_energy = harmonic_energy + percussive_energy
-            if total_energy > 0:
-                harmonic_ratio = harmonic_energy / total_energy
-                percussive_ratio = percussive_energy / total_energy
+            if frame_features is None or len(frame_features) == 0:
+                raise ValueError("no frame features")
+
+            # Energy-weighted so silent frames do not pull the ratio towards 0.5
+            energy = frame_features.column('energy').astype(np.float64)
+            percussive = frame_features.column('percussive_ratio').astype(np.float64)
+            total_energy = float(np.sqrt(np.mean(energy ** 2)))
+
+            if energy.sum() > 0:
+                percussive_ratio = float(np.average(percussive, weights=energy))
             else:
-                harmonic_ratio = 0.5
                 percussive_ratio = 0.5
+            harmonic_ratio = 1.0 - percussive_ratio
 
             return {
-                'harmonic_energy': harmonic_energy,
-                'percussive_energy': percussive_energy,
+                'harmonic_energy': total_energy * harmonic_ratio,
+                'percussive_energy': total_energy * percussive_ratio,
                 'harmonic_ratio': harmonic_ratio,
                 'percussive_ratio': percussive_ratio
             }
@@ -579,6 +945,40 @@ class AudioAnalyzer:
             print(f"Error extracting dissonance: {e}")
             return 0.5
 
+    def _extract_frame_features(self, audio, offset=0.0):
+        """
+        Extract per-frame energy, centroid, pitch salience and percussive ratio.
+
+        Args:
+            audio: Mono 44.1 kHz samples
+            offset: File time in seconds of the first sample
+
+        Returns:
+            FeatureStore, or None if extraction failed
+        """
+        try:
+            store = extract_frame_features(audio, sample_rate=44100, offset=offset)
+            print(f"[AudioAnalyzer] Frame features: {len(store)} frames at {store.frame_period * 1000:.1f}ms hop")
+            return store
+        except Exception as e:
+            print(f"Error extracting frame features: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def _build_beat_grid(self, beats, frame_features):
+        """Build the BeatGrid for the detected beats, or None if there are too few."""
+        try:
+            if beats is None or len(beats) < 2:
+                return None
+            grid = BeatGrid.from_beats(beats, frame_features)
+            print(f"[AudioAnalyzer] Beat grid: {len(grid)} beats, downbeat phase {grid.downbeat_phase} "
+                  f"(confidence {grid.downbeat_confidence:.2f})")
+            return grid
+        except Exception as e:
+            print(f"Error building beat grid: {e}")
+            return None
+
     def _extract_tempo_stability(self, beats_intervals):
         """Measure how stable the tempo is (low variance = steady tempo)."""
         try:
@@ -0,0 +1,131 @@
+"""
+Audio Loading Helpers
+
+Decodes mono audio at the analysis sample rate, optionally limited to a time
+window. Windowed loads seek in the file and decode only the requested range,
+so choreographing a few minutes of a one-hour mix does not decode the hour.
+"""
+
+import numpy as np
+import soundfile as sf
+import essentia.standard as es
+from typing import Optional, Tuple
+
+
+ANALYSIS_SAMPLE_RATE = 44100
+
+
+def _to_mono(data: np.ndarray) -> np.ndarray:
+    """Average channels of a (frames, channels) array."""
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+
+def _resample(audio: np.ndarray, source_rate: float, target_rate: float) -> np.ndarray:
+    """Resample with Essentia (same resampler MonoLoader uses)."""
+    if int(source_rate) == int(target_rate) or len(audio) == 0:
+        return audio
+    resampler = es.Resample(inputSampleRate=float(source_rate), outputSampleRate=float(target_rate))
+    return np.asarray(resampler(audio), dtype=np.float32)
+
+
+def get_duration(audio_path: str) -> Optional[float]:
+    """File duration in seconds from the header, or None if soundfile cannot read it."""
+    try:
+        info = sf.info(audio_path)
+        return info.frames / float(info.samplerate)
+    except Exception:
+        return None
+
+
+def load_mono(audio_path: str, sample_rate: int = ANALYSIS_SAMPLE_RATE,
+              start: Optional[float] = None,
+              end: Optional[float] = None) -> Tuple[np.ndarray, int]:
+    """
+    Load an audio file as mono float32, optionally only the window [start, end).
+
+    Full-file loads go through Essentia's MonoLoader, exactly as before. Windowed
+    loads seek with soundfile and read only the requested frames; formats
+    soundfile cannot open fall back to Essentia's EasyLoader (which decodes up
+    to `end`).
+
+    Args:
+        audio_path: Path to audio file
+        sample_rate: Output sample rate
+        start: Window start in seconds (default: file start)
+        end: Window end in seconds (default: file end)
+
+    Returns:
+        (audio, sample_rate)
+    """
+    if start is None and end is None:
+        return es.MonoLoader(filename=audio_path, sampleRate=sample_rate)(), sample_rate
+
+    start = max(0.0, float(start or 0.0))
+    if end is not None and end <= start:
+        raise ValueError(f"Empty analysis window: start={start}, end={end}")
+
+    try:
+        with sf.SoundFile(audio_path) as f:
+            native_rate = f.samplerate
+            first = min(int(round(start * native_rate)), f.frames)
+            last = f.frames if end is None else min(int(round(end * native_rate)), f.frames)
+            f.seek(first)
+            data = f.read(last - first, dtype='float32', always_2d=True)
+        return _resample(_to_mono(data), native_rate, sample_rate), sample_rate
+    except RuntimeError as e:
+        print(f"[AudioIO] soundfile cannot seek in {audio_path} ({e}), decoding with Essentia")
+
+    loader = es.EasyLoader(filename=audio_path, sampleRate=sample_rate,
+                           startTime=start, endTime=end if end is not None else 1e6)
+    return np.asarray(loader(), dtype=np.float32), sample_rate
+
+
+def iter_chunks(audio_path: str, chunk_duration: float, overlap: float,
+                start: float = 0.0, end: Optional[float] = None,
+                sample_rate: int = ANALYSIS_SAMPLE_RATE, align: int = 1024):
+    """
+    Stream a file as overlapping mono chunks, decoding one chunk at a time.
+
+    Chunk k "owns" [start + k*step, start + (k+1)*step) and is padded with
+    overlap/2 seconds of context on each side (clipped at the window edges).
+    Owned ranges tile the window without gaps or overlap, so per-chunk results
+    restricted to them can be concatenated. Steps and padding are whole
+    multiples of `align` samples, so frame grids with that hop line up across
+    chunks.
+
+    Args:
+        audio_path: Path to audio file
+        chunk_duration: Owned length of each chunk in seconds
+        overlap: Total context shared by neighbouring chunks in seconds
+        start: Window start in seconds
+        end: Window end in seconds (default: file end, from the header)
+        sample_rate: Output sample rate
+        align: Sample multiple for chunk steps and padding
+
+    Yields:
+        (audio, chunk_start, own_start, own_end) with times in seconds;
+        audio[0] is at chunk_start
+    """
+    if end is None:
+        end = get_duration(audio_path)
+        if end is None:
+            raise ValueError(f"Cannot read duration of {audio_path}; pass end explicitly")
+
+    step = max(align, int(round(chunk_duration * sample_rate / align)) * align)
+    pad = int(round(overlap / 2 * sample_rate / align)) * align
+    total = int(round((end - start) * sample_rate))
+
+    # A short tail is folded into the last chunk rather than analyzed alone
+    bounds = list(range(0, total, step))
+    if len(bounds) > 1 and total - bounds[-1] < step // 4:
+        bounds.pop()
+    bounds.append(total)
+
+    for own_lo, own_hi in zip(bounds[:-1], bounds[1:]):
+        lo = max(own_lo - pad, 0)
+        hi = min(own_hi + pad, total)
+        audio, _ = load_mono(audio_path, sample_rate,
+                             start=start + lo / sample_rate, end=start + hi / sample_rate)
+        yield audio, start + lo / sample_rate, start + own_lo / sample_rate, start + own_hi / sample_rate
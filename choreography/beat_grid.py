@@ -0,0 +1,236 @@
+"""
+Beat Grid
+
+Indexes the detected beat times so code can convert between seconds and
+beats without assuming a constant tempo (the old `60 / bpm` approximation
+drifts on live-played or tempo-shifting tracks).
+
+- time_to_beat(t): fractional beat index at time t (binary search, O(log n))
+- beat_to_time(b): time of a (fractional) beat index (O(1) interpolation)
+- nearest_beat(t): closest detected beat
+- Downbeats: bar phase estimated from which beat position in the bar is
+  accented most (frame energy at the beat)
+
+Outside the detected beats the grid extrapolates with the median beat period
+at each end, so queries are defined everywhere.
+"""
+
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Only for annotations: feature_store needs essentia, the grid itself does not
+    from .feature_store import FeatureStore
+
+
+DEFAULT_BEATS_PER_BAR = 4
+
+
+class BeatGrid:
+    """Sorted beat times with fast time <-> beat conversion and bar positions."""
+
+    def __init__(self, beats, beats_per_bar: int = DEFAULT_BEATS_PER_BAR,
+                 downbeat_phase: int = 0, downbeat_confidence: float = 0.0):
+        """
+        Initialize the grid.
+
+        Args:
+            beats: Beat times in seconds (at least two)
+            beats_per_bar: Beats in one bar
+            downbeat_phase: Index (mod beats_per_bar) of the first downbeat
+            downbeat_confidence: 0-1 confidence of the downbeat estimate
+        """
+        beats = np.unique(np.asarray(beats, dtype=np.float64))
+        if len(beats) < 2:
+            raise ValueError("BeatGrid needs at least two beats")
+
+        self.beats = beats
+        self.beats_per_bar = int(beats_per_bar)
+        self.downbeat_phase = int(downbeat_phase) % self.beats_per_bar
+        self.downbeat_confidence = float(downbeat_confidence)
+
+        # Extrapolation periods at either end (median of the nearest intervals)
+        intervals = np.diff(beats)
+        edge = min(8, len(intervals))
+        self._head_period = float(np.median(intervals[:edge]))
+        self._tail_period = float(np.median(intervals[-edge:]))
+
+    def __len__(self) -> int:
+        return len(self.beats)
+
+    @property
+    def period(self) -> float:
+        """Median beat period in seconds."""
+        return float(np.median(np.diff(self.beats)))
+
+    @property
+    def bpm(self) -> float:
+        """Tempo from the median beat period."""
+        return 60.0 / self.period
+
+    @property
+    def downbeats(self) -> np.ndarray:
+        """Times of the detected beats that start a bar."""
+        return self.beats[self.downbeat_phase::self.beats_per_bar]
+
+    def time_to_beat(self, t):
+        """
+        Fractional beat index at time t (beat i is at self.beats[i]).
+
+        Accepts a scalar or an array; returns the same shape.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        beats = self.beats
+        last = len(beats) - 1
+
+        i = np.clip(np.searchsorted(beats, t, side='right') - 1, 0, last - 1)
+        inside = i + (t - beats[i]) / (beats[i + 1] - beats[i])
+        result = np.where(t < beats[0], (t - beats[0]) / self._head_period,
+                          np.where(t > beats[-1], last + (t - beats[-1]) / self._tail_period, inside))
+        return float(result) if result.ndim == 0 else result
+
+    def beat_to_time(self, beat):
+        """
+        Time in seconds of a (fractional) beat index.
+
+        Accepts a scalar or an array; returns the same shape.
+        """
+        b = np.asarray(beat, dtype=np.float64)
+        beats = self.beats
+        last = len(beats) - 1
+
+        i = np.clip(np.floor(b).astype(np.int64), 0, last - 1)
+        inside = beats[i] + (b - i) * (beats[i + 1] - beats[i])
+        result = np.where(b < 0, beats[0] + b * self._head_period,
+                          np.where(b > last, beats[-1] + (b - last) * self._tail_period, inside))
+        return float(result) if result.ndim == 0 else result
+
+    def nearest_beat(self, t: float) -> Tuple[int, float]:
+        """
+        Closest detected beat to time t.
+
+        Returns:
+            (beat_index, beat_time)
+        """
+        i = int(np.searchsorted(self.beats, t))
+        if i == 0:
+            return 0, float(self.beats[0])
+        if i == len(self.beats):
+            return i - 1, float(self.beats[-1])
+        if t - self.beats[i - 1] <= self.beats[i] - t:
+            return i - 1, float(self.beats[i - 1])
+        return i, float(self.beats[i])
+
+    def position(self, t: float) -> Dict[str, Any]:
+        """
+        Musical position at time t.
+
+        Returns:
+            {
+                'beat': float,  # Fractional beat index
+                'bar': int,  # Bar number (bar 0 starts at the first downbeat)
+                'beat_in_bar': int,  # 0 = downbeat
+                'phase': float  # 0-1 progress through the current beat
+            }
+        """
+        beat = self.time_to_beat(t)
+        whole = int(np.floor(beat))
+        relative = whole - self.downbeat_phase
+        return {
+            'beat': beat,
+            'bar': relative // self.beats_per_bar,
+            'beat_in_bar': relative % self.beats_per_bar,
+            'phase': beat - whole,
+        }
+
+    def span(self, start_time: float, n_beats: float) -> float:
+        """Seconds taken by n_beats beats starting at start_time, following the detected tempo."""
+        return self.beat_to_time(self.time_to_beat(start_time) + n_beats) - start_time
+
+    def to_dict(self, decimals: int = 4) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dict (stored under 'beat_grid' in the analysis)."""
+        return {
+            'beats': np.round(self.beats, decimals).tolist(),
+            'beats_per_bar': self.beats_per_bar,
+            'downbeat_phase': self.downbeat_phase,
+            'downbeat_confidence': round(self.downbeat_confidence, 4),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BeatGrid':
+        """Rebuild a grid from to_dict() output."""
+        return cls(
+            beats=data['beats'],
+            beats_per_bar=data.get('beats_per_bar', DEFAULT_BEATS_PER_BAR),
+            downbeat_phase=data.get('downbeat_phase', 0),
+            downbeat_confidence=data.get('downbeat_confidence', 0.0),
+        )
+
+    @classmethod
+    def from_beats(cls, beats, store: Optional['FeatureStore'] = None,
+                   beats_per_bar: int = DEFAULT_BEATS_PER_BAR) -> 'BeatGrid':
+        """Build a grid from beat times, estimating downbeats from frame energy if available."""
+        phase, confidence = 0, 0.0
+        if store is not None and 'energy' in store and len(store) > 0:
+            phase, confidence = estimate_downbeat_phase(beats, store, beats_per_bar)
+        return cls(beats, beats_per_bar, phase, confidence)
+
+    @classmethod
+    def from_analysis(cls, analysis: Dict[str, Any]) -> Optional['BeatGrid']:
+        """
+        Get the grid of an AudioAnalyzer result.
+
+        Uses the stored 'beat_grid' when present, otherwise builds one from
+        'beats' (older analyses), falling back to a constant-tempo grid from
+        'bpm'. Returns None if the analysis has no tempo information at all.
+        """
+        if not analysis:
+            return None
+        if analysis.get('beat_grid'):
+            return cls.from_dict(analysis['beat_grid'])
+
+        beats = np.asarray(analysis.get('beats', []), dtype=np.float64)
+        if beats.size >= 2:
+            from .feature_store import FeatureStore
+            return cls.from_beats(beats, FeatureStore.from_analysis(analysis))
+
+        bpm = analysis.get('bpm', 0.0)
+        if bpm > 0:
+            offset = analysis.get('offset', 0.0)
+            period = 60.0 / bpm
+            n_beats = max(2, int(np.ceil(analysis.get('duration', 0.0) / period)) + 1)
+            return cls(offset + np.arange(n_beats) * period)
+        return None
+
+
+def estimate_downbeat_phase(beats, store: 'FeatureStore',
+                            beats_per_bar: int = DEFAULT_BEATS_PER_BAR) -> Tuple[int, float]:
+    """
+    Estimate which beat position in the bar is the downbeat.
+
+    Downbeats usually carry the strongest accents (kick, bass, chord changes),
+    so the phase whose beats have the highest mean energy rise wins.
+
+    Args:
+        beats: Beat times in seconds
+        store: Frame features with 'energy'
+        beats_per_bar: Beats in one bar
+
+    Returns:
+        (phase, confidence) where confidence is 0-1 (margin of the winning phase)
+    """
+    beats = np.asarray(beats, dtype=np.float64)
+    if len(beats) < 2 * beats_per_bar:
+        return 0, 0.0
+
+    energy = store.column('energy').astype(np.float64)
+    idx = np.clip(((beats - store.offset) / store.frame_period).astype(np.int64), 1, len(energy) - 2)
+    # Accent = energy just after the beat minus energy just before it
+    accent = np.maximum(energy[idx], energy[idx + 1]) - energy[idx - 1]
+
+    scores = np.array([accent[p::beats_per_bar].mean() for p in range(beats_per_bar)])
+    phase = int(np.argmax(scores))
+    ordered = np.sort(scores)
+    spread = ordered[-1] - ordered[0]
+    confidence = float((ordered[-1] - ordered[-2]) / spread) if spread > 0 else 0.0
+    return phase, confidence
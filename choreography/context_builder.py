@@ -5,9 +5,11 @@ Similar to parameter_prep pattern from main LAURA system
 """
 
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from reachy_mini.motion.recorded_move import RecordedMoves, RecordedMove
+from choreography.move_library import open_library
 from choreography.move_metadata import get_beat_count, calculate_move_duration
+from choreography.beat_grid import BeatGrid
 
 
 class ChoreographyContext:
@@ -20,28 +22,31 @@ class ChoreographyContext:
     def __init__(self):
         """Initialize context builder and load datasets."""
         print("[ChoreographyContext] Loading move datasets...")
-        self.dances = RecordedMoves(self.DANCES_DATASET)
-        self.emotions = RecordedMoves(self.EMOTIONS_DATASET)
+        self.dances = open_library(self.DANCES_DATASET)
+        self.emotions = open_library(self.EMOTIONS_DATASET)
 
         # Extract metadata
-        self.dance_metadata = self._extract_metadata(self.dances)
-        self.emotion_metadata = self._extract_metadata(self.emotions)
+        self.dance_metadata = self._extract_metadata(self.dances, "dance")
+        self.emotion_metadata = self._extract_metadata(self.emotions, "emotion")
 
         print(f"[ChoreographyContext] Loaded {len(self.dance_metadata)} dances")
         print(f"[ChoreographyContext] Loaded {len(self.emotion_metadata)} emotions")
 
-    def _extract_metadata(self, recorded_moves: RecordedMoves) -> Dict[str, Dict[str, Any]]:
+    def _extract_metadata(self, recorded_moves: RecordedMoves, move_type: str) -> Dict[str, Dict[str, Any]]:
         """
         Extract beat count and metadata for all moves in a library.
 
+        Beat counts are the measured ones from the move metadata cache where
+        available (see move_metadata.get_beat_count).
+
         Args:
             recorded_moves: RecordedMoves instance
+            move_type: "dance" or "emotion"
 
         Returns:
             Dict mapping move_name -> {beat_count, description}
         """
         metadata = {}
-        move_type = "dance" if "dances" in self.DANCES_DATASET else "emotion"
 
         for move_name in recorded_moves.list_moves():
             try:
@@ -119,19 +124,29 @@ class ChoreographyContext:
 
         return dances_text + emotions_text
 
-    def calculate_total_duration(self, choreography: List[Dict[str, Any]], bpm: float) -> float:
+    def calculate_total_duration(self, choreography: List[Dict[str, Any]], bpm: float,
+                                 beat_grid: Optional[BeatGrid] = None,
+                                 start_time: float = 0.0) -> float:
         """
         Calculate actual total duration using BPM timing formula.
 
         Formula: Move Duration = cycles × beat_count × (60/BPM)
 
+        With a beat grid, moves are instead laid on the detected beats starting
+        at start_time, so tempo drift in the track is followed.
+
         Args:
             choreography: List of moves with move_name, move_type, cycles
             bpm: Beats per minute for tempo
+            beat_grid: Detected beats (BeatGrid.from_analysis(analysis))
+            start_time: Track time where the choreography starts (beat grid only)
 
         Returns:
             Total duration in seconds
         """
+        if beat_grid is not None:
+            return self._calculate_grid_duration(choreography, beat_grid, start_time)
+
         total = 0.0
         beat_duration = 60.0 / bpm
 
@@ -153,3 +168,24 @@ class ChoreographyContext:
                     print(f"[ChoreographyContext] Warning: Unknown move {move_name}")
 
         return total
+
+    def _calculate_grid_duration(self, choreography: List[Dict[str, Any]],
+                                 beat_grid: BeatGrid, start_time: float) -> float:
+        """Total duration with every move spanning its beats on the detected beat grid."""
+        t = start_time
+
+        for move in choreography:
+            move_name = move.get("move_name")
+            move_type = move.get("move_type", "emotion")
+            cycles = move.get("cycles", 1)
+
+            if move_name == "idle" or move_name == "manual":
+                t += move.get("duration", 1.0)
+            else:
+                beat_count = self.get_beat_count(move_name, move_type)
+                if beat_count:
+                    t += beat_grid.span(t, cycles * beat_count)
+                else:
+                    print(f"[ChoreographyContext] Warning: Unknown move {move_name}")
+
+        return t - start_time
@@ -0,0 +1,308 @@
+"""
+Exact Duration Solver
+
+Finds the move combinations whose total duration fits a target window, by
+dynamic programming over durations discretized to RESOLUTION (10 ms):
+
+- Each move is used at most once per solution, with 1..max_cycles cycles
+  (a group knapsack: per move, skip it or take it with c cycles)
+- The forward pass keeps the cheapest way to reach every discretized total
+  after each move: a few vectorized np.minimum calls per move
+- Every total is visited, so a solution is returned whenever one exists in
+  the window, and an empty result means none exists
+- The k best solutions are then enumerated lazily over the stored layers
+  (recursive k-shortest-paths enumeration): the next-best path of a node
+  is only computed when a caller asks for it, so k solutions cost
+  O(k * moves) heap operations on top of the forward pass
+
+Solutions are ranked by cost, in grid steps: the fit error, plus
+ENTRY_COST per move and CYCLE_COST per extra cycle, so close fits made of
+few distinct moves come first. Equal costs break on move order and cycle
+count, so results are deterministic.
+
+solve_beats() runs the same search over a BeatGrid instead of seconds: the
+units are beats (or bars), each move with c cycles occupies the whole number
+of beats closest to its length, so every move boundary lands on a beat (or
+downbeat), and the cost adds how far the move's own length is from its slot
+(the misalignment, in seconds). The enumeration stops at a time budget.
+"""
+
+import heapq
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+
+# Duration grid (s)
+RESOLUTION = 0.01
+
+MAX_CYCLES = 3
+
+# Largest k served (bounds the enumeration work per call)
+MAX_SOLUTIONS = 50
+
+# Costs in grid steps: a move costs like 0.1 s of fit error, an extra cycle
+# like 0.4 s, so distinct moves are preferred to repeating one
+ENTRY_COST = 10
+CYCLE_COST = 40
+
+# Seconds solve_beats() may spend enumerating solutions (the first is always returned)
+TIME_BUDGET = 0.05
+
+_INF = 1 << 40
+
+
+class _PathEnumerator:
+    """Lazy k-best paths to the nodes (layer, total) of the forward DP."""
+
+    def __init__(self, layers: np.ndarray, option_units: np.ndarray, option_costs: np.ndarray):
+        self.layers = layers
+        self.option_units = option_units
+        self.option_costs = option_costs
+        # (layer, total) -> paths found so far [(cost, option, source rank)], and candidates
+        self.paths: Dict[Tuple[int, int], List[Tuple[int, int, int]]] = {}
+        self.candidates: Dict[Tuple[int, int], List[Tuple[int, int, int]]] = {}
+
+    def _predecessor(self, layer: int, total: int, option: int) -> int:
+        return total - int(self.option_units[layer - 1, option])
+
+    def path(self, layer: int, total: int, rank: int) -> Optional[Tuple[int, int, int]]:
+        """The rank-th cheapest (cost, option, source rank) reaching total after `layer` moves."""
+        if layer == 0:
+            return (0, 0, 0) if total == 0 and rank == 0 else None
+
+        key = (layer, total)
+        if key not in self.paths:
+            # Best path of each predecessor; the overall best is the first path
+            heap = []
+            for option, option_cost in enumerate(self.option_costs[layer - 1]):
+                source = self._predecessor(layer, total, option)
+                if (option and source >= total) or source < 0:
+                    continue
+                if self.layers[layer - 1, source] < _INF:
+                    heap.append((int(self.layers[layer - 1, source]) + int(option_cost), option, 0))
+            heapq.heapify(heap)
+            self.paths[key] = [heapq.heappop(heap)] if heap else []
+            self.candidates[key] = heap
+
+        paths, heap = self.paths[key], self.candidates[key]
+        while len(paths) <= rank and paths:
+            # The next path either continues the last one's predecessor with
+            # its next-best path, or is already a candidate
+            _, option, source_rank = paths[-1]
+            following = self.path(layer - 1, self._predecessor(layer, total, option), source_rank + 1)
+            if following is not None:
+                heapq.heappush(heap, (following[0] + int(self.option_costs[layer - 1, option]),
+                                      option, source_rank + 1))
+            if not heap:
+                break
+            paths.append(heapq.heappop(heap))
+        return paths[rank] if rank < len(paths) else None
+
+    def entries(self, total: int, rank: int) -> List[Tuple[int, int]]:
+        """(move index, cycles) of the rank-th path to total after all moves, in index order."""
+        entries = []
+        for layer in range(len(self.option_units), 0, -1):
+            _, option, rank = self.path(layer, total, rank)
+            if option:
+                entries.append((layer - 1, option))
+                total = self._predecessor(layer, total, option)
+        return entries[::-1]
+
+
+def solve_options(option_units, option_costs, low: int, high: int, target: int, k: int = 3,
+                  error_cost: int = 1, deadline: Optional[float] = None
+                  ) -> List[Tuple[int, int, List[Tuple[int, int]]]]:
+    """
+    The k cheapest choices of one option per move with a total in [low, high].
+
+    Option 0 of every move is "skip it" (0 units, cost 0); an option with no
+    units (<= 0) is unavailable.
+
+    Args:
+        option_units: (moves, options) length of each option in integer units
+        option_costs: (moves, options) cost of each option
+        low: Smallest accepted total (at least 1: a solution has a move)
+        high: Largest accepted total
+        target: Ideal total; error_cost * |total - target| is added to the cost
+        k: Number of solutions (at most MAX_SOLUTIONS)
+        error_cost: Cost per unit of distance from target
+        deadline: time.perf_counter() value after which no further solutions
+            are enumerated (the best one is always returned)
+
+    Returns:
+        [(cost, total, [(move index, option), ...]), ...] cheapest first,
+        moves in index order
+    """
+    option_units = np.array(option_units, dtype=np.int64).reshape(len(option_units), -1)
+    option_costs = np.array(option_costs, dtype=np.int64).reshape(option_units.shape)
+    option_units[:, 0], option_costs[:, 0] = 0, 0
+    k = int(np.clip(k, 1, MAX_SOLUTIONS))
+    low, high = max(int(low), 1), int(high)
+    if high < low or len(option_units) == 0:
+        return []
+
+    # layers[m, t]: cheapest cost of reaching total t with moves 0..m-1
+    layers = np.full((len(option_units) + 1, high + 1), _INF, dtype=np.int64)
+    layers[0, 0] = 0
+    for move, (units, costs) in enumerate(zip(option_units, option_costs)):
+        previous, current = layers[move], layers[move + 1]
+        current[:] = previous
+        for shift, cost in zip(units[1:].tolist(), costs[1:].tolist()):
+            if 0 < shift <= high:
+                np.minimum(current[shift:], previous[:-shift] + cost, out=current[shift:])
+    np.minimum(layers, _INF, out=layers)
+
+    # Best-first over the window: each total's paths in rank order, plus its fit error
+    enumerator = _PathEnumerator(layers, option_units, option_costs)
+    last = len(option_units)
+    target = int(target)
+    heap = [(int(layers[last, total]) + abs(total - target) * error_cost, abs(total - target) * error_cost, total, 0)
+            for total in range(low, high + 1) if layers[last, total] < _INF]
+    heapq.heapify(heap)
+
+    solutions = []
+    while heap and len(solutions) < k:
+        if solutions and deadline is not None and time.perf_counter() > deadline:
+            break
+        score, error, total, rank = heapq.heappop(heap)
+        solutions.append((score, total, enumerator.entries(total, rank)))
+        following = enumerator.path(last, total, rank + 1)
+        if following is not None:
+            heapq.heappush(heap, (following[0] + error, error, total, rank + 1))
+    return solutions
+
+
+def solve_units(units, low: int, high: int, target: int, k: int = 3,
+                max_cycles: int = MAX_CYCLES, entry_cost: int = ENTRY_COST,
+                cycle_cost: int = CYCLE_COST) -> List[Tuple[int, int, List[Tuple[int, int]]]]:
+    """
+    The k cheapest move combinations with a total in [low, high] (integer units).
+
+    Args:
+        units: (moves,) length of one cycle of each move, in grid units
+        low: Smallest accepted total (at least 1: a solution has a move)
+        high: Largest accepted total
+        target: Ideal total; |total - target| is added to the cost
+        k: Number of solutions (at most MAX_SOLUTIONS)
+        max_cycles: Most cycles of one move
+        entry_cost: Cost per move in a solution
+        cycle_cost: Cost per cycle beyond the first
+
+    Returns:
+        [(cost, total, [(move index, cycles), ...]), ...] cheapest first,
+        moves in index order
+    """
+    units = np.maximum(np.asarray(units, dtype=np.int64), 1)
+    # Option c = play the move c times (0 = skip it)
+    cycles = np.arange(max(1, max_cycles) + 1)
+    costs = np.where(cycles > 0, entry_cost + (cycles - 1) * cycle_cost, 0)
+    return solve_options(units[:, None] * cycles, np.broadcast_to(costs, (len(units), len(cycles))),
+                         low, high, target, k)
+
+
+def solve(durations, target: float, tolerance: float, k: int = 3,
+          max_cycles: int = MAX_CYCLES, resolution: float = RESOLUTION) -> List[Dict[str, Any]]:
+    """
+    The k best move combinations whose total duration is within tolerance of target.
+
+    Durations are rounded to the grid, so totals are exact to within
+    resolution / 2 per move.
+
+    Args:
+        durations: (moves,) duration of one cycle of each move (s)
+        target: Target duration (s)
+        tolerance: Accepted error (s)
+        k: Number of solutions (at most MAX_SOLUTIONS)
+        max_cycles: Most cycles of one move
+        resolution: Grid step (s)
+
+    Returns:
+        [{'entries': [(move index, cycles), ...], 'duration', 'error', 'cost'}, ...]
+        best first; 'cost' is in seconds of fit error
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    units = np.maximum(np.rint(durations / resolution), 1).astype(np.int64)
+    low = int(np.ceil((target - tolerance) / resolution - 1e-9))
+    high = int(np.floor((target + tolerance) / resolution + 1e-9))
+
+    results = []
+    for cost, _, entries in solve_units(units, low, high, int(round(target / resolution)), k, max_cycles):
+        duration = float(sum(durations[move] * cycles for move, cycles in entries))
+        results.append({
+            'entries': entries,
+            'duration': duration,
+            'error': abs(duration - target),
+            'cost': cost * resolution,
+        })
+    return results
+
+
+def solve_beats(durations, grid, start: float, end: float, k: int = 3,
+                beats_per_unit: int = 1, tolerance: int = 0, max_cycles: int = MAX_CYCLES,
+                time_budget: float = TIME_BUDGET) -> Dict[str, Any]:
+    """
+    The k best move combinations filling a time window beat by beat.
+
+    The window is snapped to the grid (to downbeats when beats_per_unit is
+    the bar length; each end to the first unit at most a quarter unit
+    before it), and each option (move, c cycles) takes the whole number
+    of units nearest to c times the move's duration at the window's mean
+    tempo. Its misalignment - how far the move's own end is from the unit
+    boundary it is assigned - is added to the cost, in 10 ms steps like the
+    entry and cycle costs. Options shorter than half a unit are unavailable.
+
+    Args:
+        durations: (moves,) duration of one cycle of each move (s)
+        grid: BeatGrid of the track
+        start: Window start (track time, s)
+        end: Window end (track time, s)
+        k: Number of solutions (at most MAX_SOLUTIONS)
+        beats_per_unit: 1 = boundaries on beats, grid.beats_per_bar = on downbeats
+        tolerance: Accepted error in units (0 = end exactly on the window's last unit)
+        max_cycles: Most cycles of one move
+        time_budget: Seconds the enumeration may take (the best solution is always returned)
+
+    Returns:
+        {
+            'first_beat': int,  # Beat index the first move starts on
+            'beats': int,  # Beats in the snapped window
+            'beat_period': float,  # Mean beat period in the window (s)
+            'solutions': [{'entries': [(move index, cycles), ...], 'beats': [beats per entry],
+                           'misalignment': float (s, sum over entries), 'cost': float (s)}, ...]
+        }
+    """
+    deadline = time.perf_counter() + time_budget
+    durations = np.asarray(durations, dtype=np.float64)
+    phase = grid.downbeat_phase if beats_per_unit > 1 else 0
+    # Both ends snap to the first unit at most a quarter unit before them, so
+    # adjacent windows share their boundary beat
+    first, last = (int(np.ceil((grid.time_to_beat(t) - phase) / beats_per_unit - 0.25)) for t in (start, end))
+    first_beat = phase + first * beats_per_unit
+    n_units = last - first
+    result = {'first_beat': first_beat, 'beats': max(n_units, 0) * beats_per_unit,
+              'beat_period': 0.0, 'solutions': []}
+    if n_units < 1 or len(durations) == 0:
+        return result
+
+    unit_period = (grid.beat_to_time(first_beat + n_units * beats_per_unit) - grid.beat_to_time(first_beat)) / n_units
+    result['beat_period'] = unit_period / beats_per_unit
+
+    cycles = np.arange(max(1, max_cycles) + 1)
+    lengths = durations[:, None] * cycles
+    option_units = np.rint(lengths / unit_period).astype(np.int64)
+    misalignment = np.abs(lengths - option_units * unit_period)
+    option_costs = (np.rint(misalignment / RESOLUTION).astype(np.int64)
+                    + np.where(cycles > 0, ENTRY_COST + (cycles - 1) * CYCLE_COST, 0))
+
+    error_cost = int(round(unit_period / RESOLUTION))
+    for cost, _, entries in solve_options(option_units, option_costs, n_units - tolerance, n_units + tolerance,
+                                          n_units, k, error_cost, deadline):
+        result['solutions'].append({
+            'entries': entries,
+            'beats': [int(option_units[move, c]) * beats_per_unit for move, c in entries],
+            'misalignment': float(sum(misalignment[move, c] for move, c in entries)),
+            'cost': cost * RESOLUTION,
+        })
+    return result
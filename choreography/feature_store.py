@@ -0,0 +1,256 @@
+"""
+Frame-Level Feature Store
+
+Keeps per-frame time series (energy, spectral centroid, pitch salience,
+percussive ratio) at a fixed hop in compact float32 arrays, so tools can ask
+questions about any time range of the track without re-analyzing the audio.
+
+Range queries are indexed: a time maps directly to a frame index, and means /
+standard deviations come from prefix sums in O(1) per query.
+"""
+
+import numpy as np
+import essentia.standard as es
+from scipy.ndimage import median_filter
+from typing import Dict, Any, List, Optional, Sequence
+
+
+# Features produced by extract_frame_features(), in storage order
+FRAME_FEATURES = ('energy', 'centroid', 'pitch_salience', 'percussive_ratio')
+
+# Aggregations supported by FeatureStore.range()
+AGGREGATIONS = ('mean', 'std', 'min', 'max')
+
+# Median filter lengths for harmonic/percussive separation (frames / pooled bins).
+# The separation runs on a reduced spectrogram (bins pooled in pairs, capped at
+# ~11 kHz) - the ratio only needs energies, and median filters dominate the cost.
+HPSS_TIME_KERNEL = 17
+HPSS_FREQ_KERNEL = 9
+HPSS_MAX_BIN = 512
+HPSS_POOL = 2
+
+# Frames processed per spectrogram block (bounds memory of the STFT)
+BLOCK_FRAMES = 1024
+
+
+class FeatureStore:
+    """Compact per-frame feature arrays with indexed time-range queries."""
+
+    def __init__(self, features: Dict[str, np.ndarray], sample_rate: int = 44100,
+                 hop_size: int = 1024, frame_size: int = 2048, offset: float = 0.0):
+        """
+        Initialize the store.
+
+        Args:
+            features: {feature_name: 1-D array}, all arrays the same length
+            sample_rate: Sample rate the frames were computed at
+            hop_size: Hop between frames in samples
+            frame_size: Frame length in samples
+            offset: Time in seconds of frame 0 (non-zero for windowed analysis)
+        """
+        lengths = {len(values) for values in features.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Feature arrays have different lengths: {sorted(lengths)}")
+
+        self.sample_rate = int(sample_rate)
+        self.hop_size = int(hop_size)
+        self.frame_size = int(frame_size)
+        self.offset = float(offset)
+        self.features = {name: np.asarray(values, dtype=np.float32)
+                         for name, values in features.items()}
+        self._prefix = {}
+
+    def __len__(self) -> int:
+        if not self.features:
+            return 0
+        return len(next(iter(self.features.values())))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.features
+
+    @property
+    def names(self) -> List[str]:
+        """Names of the stored features."""
+        return list(self.features.keys())
+
+    @property
+    def frame_period(self) -> float:
+        """Time between consecutive frames in seconds."""
+        return self.hop_size / self.sample_rate
+
+    @property
+    def times(self) -> np.ndarray:
+        """Start time of every frame in seconds."""
+        return self.offset + np.arange(len(self), dtype=np.float64) * self.frame_period
+
+    def column(self, name: str) -> np.ndarray:
+        """Get the full time series for a feature."""
+        return self.features[name]
+
+    def frame_index(self, t: float) -> int:
+        """
+        Map a time in seconds to the index of the first frame starting at or after it.
+
+        Clamped to [0, len(self)], so it can be used directly as a slice bound.
+        """
+        index = int(np.ceil((t - self.offset) / self.frame_period - 1e-9))
+        return min(max(index, 0), len(self))
+
+    def _prefix_sums(self, name: str):
+        """Lazily build (cumsum(x), cumsum(x^2)) for a feature, with a leading zero."""
+        if name not in self._prefix:
+            values = self.features[name].astype(np.float64)
+            csum = np.concatenate(([0.0], np.cumsum(values)))
+            csum_sq = np.concatenate(([0.0], np.cumsum(values * values)))
+            self._prefix[name] = (csum, csum_sq)
+        return self._prefix[name]
+
+    def range(self, start: float, end: float,
+              features: Optional[Sequence[str]] = None,
+              aggregations: Sequence[str] = AGGREGATIONS) -> Dict[str, Any]:
+        """
+        Aggregate features over the frames in [start, end).
+
+        Args:
+            start: Range start in seconds
+            end: Range end in seconds
+            features: Feature names to aggregate (default: all)
+            aggregations: Any of 'mean', 'std', 'min', 'max'
+
+        Returns:
+            {
+                'start': float,
+                'end': float,
+                'frames': int,
+                'features': {name: {aggregation: float}}
+            }
+        """
+        unknown = set(aggregations) - set(AGGREGATIONS)
+        if unknown:
+            raise ValueError(f"Unknown aggregations: {sorted(unknown)}")
+
+        names = list(features) if features is not None else self.names
+        lo = self.frame_index(start)
+        hi = max(self.frame_index(end), lo)
+        count = hi - lo
+
+        result = {}
+        for name in names:
+            stats = {}
+            if count == 0:
+                stats = {agg: 0.0 for agg in aggregations}
+            else:
+                if 'mean' in aggregations or 'std' in aggregations:
+                    csum, csum_sq = self._prefix_sums(name)
+                    mean = (csum[hi] - csum[lo]) / count
+                    if 'mean' in aggregations:
+                        stats['mean'] = float(mean)
+                    if 'std' in aggregations:
+                        var = (csum_sq[hi] - csum_sq[lo]) / count - mean * mean
+                        stats['std'] = float(np.sqrt(max(var, 0.0)))
+                if 'min' in aggregations:
+                    stats['min'] = float(np.min(self.features[name][lo:hi]))
+                if 'max' in aggregations:
+                    stats['max'] = float(np.max(self.features[name][lo:hi]))
+            result[name] = stats
+
+        return {
+            'start': float(start),
+            'end': float(end),
+            'frames': int(count),
+            'features': result,
+        }
+
+    def to_dict(self, decimals: int = 6) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dict (stored under 'frame_features' in the analysis)."""
+        return {
+            'sample_rate': self.sample_rate,
+            'hop_size': self.hop_size,
+            'frame_size': self.frame_size,
+            'offset': self.offset,
+            'frame_count': len(self),
+            'features': {name: np.round(values, decimals).tolist()
+                         for name, values in self.features.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FeatureStore':
+        """Rebuild a store from to_dict() output."""
+        return cls(
+            features=data['features'],
+            sample_rate=data.get('sample_rate', 44100),
+            hop_size=data.get('hop_size', 1024),
+            frame_size=data.get('frame_size', 2048),
+            offset=data.get('offset', 0.0),
+        )
+
+    @classmethod
+    def from_analysis(cls, analysis: Dict[str, Any]) -> Optional['FeatureStore']:
+        """Build a store from an AudioAnalyzer result, or None if it has no frame features."""
+        data = analysis.get('frame_features') if analysis else None
+        if not data:
+            return None
+        return cls.from_dict(data)
+
+
+def extract_frame_features(audio: np.ndarray, sample_rate: int = 44100,
+                           frame_size: int = 2048, hop_size: int = 1024,
+                           offset: float = 0.0) -> FeatureStore:
+    """
+    Compute all frame-level features in a single pass over the signal.
+
+    The STFT is processed in blocks of BLOCK_FRAMES frames, with enough context
+    frames on each side for the harmonic/percussive median filter, so the full
+    spectrogram is never held in memory.
+
+    Args:
+        audio: Mono audio samples
+        sample_rate: Sample rate in Hz
+        frame_size: Frame length in samples
+        hop_size: Hop between frames in samples
+        offset: Time in seconds of the first sample (for windowed analysis)
+
+    Returns:
+        FeatureStore with FRAME_FEATURES
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if len(audio) < frame_size:
+        return FeatureStore({name: np.zeros(0, dtype=np.float32) for name in FRAME_FEATURES},
+                            sample_rate, hop_size, frame_size, offset)
+
+    frames = np.lib.stride_tricks.sliding_window_view(audio, frame_size)[::hop_size]
+    n_frames = len(frames)
+    window = np.hanning(frame_size).astype(np.float32)
+    freqs = np.fft.rfftfreq(frame_size, 1.0 / sample_rate).astype(np.float32)
+    pitch_salience = es.PitchSalience(sampleRate=sample_rate)
+
+    out = {name: np.empty(n_frames, dtype=np.float32) for name in FRAME_FEATURES}
+    context = HPSS_TIME_KERNEL // 2
+
+    for block_start in range(0, n_frames, BLOCK_FRAMES):
+        block_end = min(block_start + BLOCK_FRAMES, n_frames)
+        ctx_start = max(block_start - context, 0)
+        ctx_end = min(block_end + context, n_frames)
+
+        block = frames[ctx_start:ctx_end]
+        mag = np.abs(np.fft.rfft(block * window, axis=1)).astype(np.float32)
+
+        # Harmonic/percussive separation by median filtering (Fitzgerald 2010)
+        pooled = mag[:, :HPSS_MAX_BIN].reshape(len(mag), -1, HPSS_POOL).sum(axis=2)
+        harmonic = median_filter(pooled, size=(HPSS_TIME_KERNEL, 1), mode='nearest')
+        percussive = median_filter(pooled, size=(1, HPSS_FREQ_KERNEL), mode='nearest')
+
+        inner = slice(block_start - ctx_start, block_end - ctx_start)
+        mag = mag[inner]
+        h_energy = np.sum(harmonic[inner] ** 2, axis=1)
+        p_energy = np.sum(percussive[inner] ** 2, axis=1)
+
+        rows = slice(block_start, block_end)
+        out['energy'][rows] = np.sqrt(np.mean(frames[rows].astype(np.float64) ** 2, axis=1))
+        mag_sum = np.sum(mag, axis=1)
+        out['centroid'][rows] = np.where(mag_sum > 0, mag @ freqs / np.maximum(mag_sum, 1e-12), 0.0)
+        out['percussive_ratio'][rows] = np.where(
+            h_energy + p_energy > 0, p_energy / np.maximum(h_energy + p_energy, 1e-12), 0.5)
+        out['pitch_salience'][rows] = [pitch_salience(row) for row in mag]
+
+    return FeatureStore(out, sample_rate, hop_size, frame_size, offset)
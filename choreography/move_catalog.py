@@ -0,0 +1,342 @@
+"""
+Indexed Move Catalog
+
+Read-only view of the move metadata (move_metadata.json) with precomputed
+indexes, so the queries the solver and tools make on every step do not scan
+the whole dict:
+
+- name lookup: dict, O(1)
+- moves of a type: precomputed, O(1) + output
+- moves in a duration range (optionally of one type): bisect on per-type
+  duration-sorted lists, O(log n) + output
+- moves nearest a duration: binary search + two-pointer walk, O(log n + k)
+- numeric fields (motion descriptors, motion_energy): arrays aligned with the
+  duration index, so filtering on them is one vectorized comparison
+- move-to-move similarity (move_matrices.npz sidecar): table lookups for
+  similar-move queries and sequence variety
+- transition costs (same sidecar): end-pose to start-pose distance of every
+  ordered pair, for preferring smooth chains and flagging jarring ones
+
+MoveCatalog is a Mapping of name -> metadata dict, so code written against
+the plain metadata dict (`.items()`, `[name]`, `.get()`) keeps working.
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+import numpy as np
+
+
+MOVE_TYPES = ('dance', 'emotion')
+
+# Transition cost (radian-equivalents, see move_trajectories.transition_matrix)
+# above which the jump between two moves is visibly abrupt
+JARRING_TRANSITION = 0.6
+
+
+class MoveCatalog(Mapping):
+    """Move metadata with sorted per-type duration indexes."""
+
+    def __init__(self, metadata: Dict[str, Dict[str, Any]],
+                 matrices: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Build the indexes.
+
+        Args:
+            metadata: {move_name: {'duration': float, 'type': str, 'library': str, ...}}
+            matrices: Optional {'names', 'hashes', 'similarity', 'transition'}
+                arrays (see move_metadata_cache.load_matrices); rows whose hash
+                no longer matches the metadata are ignored
+        """
+        self._metadata = dict(metadata)
+
+        # Key None indexes all moves; other keys index one type. Queries bisect
+        # the plain lists (cheaper than NumPy calls at library sizes); the
+        # arrays are for vectorized callers.
+        self._name_lists: Dict[Optional[str], List[str]] = {}
+        self._duration_lists: Dict[Optional[str], List[float]] = {}
+        self._names: Dict[Optional[str], np.ndarray] = {}
+        self._durations: Dict[Optional[str], np.ndarray] = {}
+        types = sorted({data['type'] for data in self._metadata.values()})
+        for move_type in [None] + types:
+            entries = sorted((float(data['duration']), name) for name, data in self._metadata.items()
+                             if move_type is None or data['type'] == move_type)
+            self._duration_lists[move_type] = [d for d, _ in entries]
+            self._name_lists[move_type] = [n for _, n in entries]
+            self._durations[move_type] = np.array(self._duration_lists[move_type], dtype=np.float64)
+            self._names[move_type] = np.array(self._name_lists[move_type], dtype=object)
+        self._fields: Dict[Tuple[str, Optional[str]], np.ndarray] = {}
+
+        # Move name -> row of the similarity/transition matrices (current moves only)
+        self._similarity = None
+        self._transition = None
+        self._matrix_rows: Dict[str, int] = {}
+        if matrices is not None:
+            self._similarity = np.asarray(matrices['similarity'], dtype=np.float32)
+            if 'transition' in matrices:
+                self._transition = np.asarray(matrices['transition'], dtype=np.float32)
+            for row, (name, move_hash) in enumerate(zip(matrices['names'], matrices['hashes'])):
+                name = str(name)
+                data = self._metadata.get(name)
+                if data is not None and str(data.get('hash')) == str(move_hash):
+                    self._matrix_rows[name] = row
+
+    @classmethod
+    def from_file(cls, path) -> 'MoveCatalog':
+        """Load a catalog from a move_metadata.json file."""
+        with open(Path(path), 'r') as f:
+            return cls(json.load(f))
+
+    # Mapping interface (name -> metadata dict)
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return self._metadata[name]
+
+    def __iter__(self):
+        return iter(self._metadata)
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+    @property
+    def types(self) -> List[str]:
+        """Move types present in the catalog."""
+        return [t for t in self._names if t is not None]
+
+    def duration(self, name: str) -> Optional[float]:
+        """Duration of a move in seconds, or None if unknown."""
+        data = self._metadata.get(name)
+        return float(data['duration']) if data else None
+
+    def sorted_moves(self, move_type: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Moves of a type (None = all) sorted by duration.
+
+        Returns:
+            (names, durations) arrays; treat as read-only
+        """
+        if move_type not in self._names:
+            return np.array([], dtype=object), np.array([], dtype=np.float64)
+        return self._names[move_type], self._durations[move_type]
+
+    def field_values(self, field: str, move_type: Optional[str] = None) -> np.ndarray:
+        """
+        A numeric field for the moves of sorted_moves(move_type), in the same order.
+
+        Returns:
+            float array, NaN for moves without the field (e.g. no descriptors)
+        """
+        key = (field, move_type)
+        if key not in self._fields:
+            self._fields[key] = np.array([self._metadata[name].get(field, np.nan)
+                                          for name in self._name_lists.get(move_type, [])],
+                                         dtype=np.float64)
+        return self._fields[key]
+
+    def has_field(self, field: str) -> bool:
+        """True if any move has the numeric field."""
+        return bool(np.isfinite(self.field_values(field)).any())
+
+    def names_where(self, field: str, min_value: float, max_value: float,
+                    move_type: Optional[str] = None) -> List[str]:
+        """Names of moves with min_value <= field <= max_value, shortest first."""
+        values = self.field_values(field, move_type)
+        mask = (values >= min_value) & (values <= max_value)
+        return list(self.sorted_moves(move_type)[0][mask])
+
+    @property
+    def has_similarity(self) -> bool:
+        """True if a similarity matrix covers at least one move."""
+        return bool(self._matrix_rows)
+
+    def similarity(self, a: str, b: str) -> Optional[float]:
+        """Similarity of two moves (0-1, 1 = same motion), or None if either is not covered."""
+        if a == b:
+            return 1.0
+        if a not in self._matrix_rows or b not in self._matrix_rows:
+            return None
+        return float(self._similarity[self._matrix_rows[a], self._matrix_rows[b]])
+
+    def most_similar(self, name: str, k: int = 5, move_type: Optional[str] = None,
+                     min_similarity: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        The k moves most similar to a move.
+
+        Returns:
+            [(name, similarity), ...] most similar first; empty if the move is not covered
+        """
+        if name not in self._matrix_rows:
+            return []
+        candidates = [other for other in self._name_lists.get(move_type, [])
+                      if other != name and other in self._matrix_rows]
+        if not candidates:
+            return []
+        rows = np.array([self._matrix_rows[other] for other in candidates])
+        scores = self._similarity[self._matrix_rows[name], rows]
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [(candidates[i], float(scores[i])) for i in order if scores[i] >= min_similarity]
+
+    def variety_score(self, names: List[str]) -> float:
+        """
+        Variety of a sequence of moves (0-1).
+
+        Each move scores 1 minus its highest similarity to any earlier move
+        (a repeat scores 0, a move unlike everything before scores ~1), and
+        the sequence scores the mean. Without similarity data (or for moves
+        the matrix does not cover) only identical names count as similar, so
+        this reduces to the fraction of distinct moves.
+        """
+        n = len(names)
+        if n == 0:
+            return 0.0
+
+        pairwise = np.array([[a == b for b in names] for a in names], dtype=np.float32)
+        rows = np.array([self._matrix_rows.get(name, -1) for name in names])
+        covered = np.flatnonzero(rows >= 0)
+        if self._similarity is not None and len(covered) > 1:
+            pairwise[np.ix_(covered, covered)] = self._similarity[np.ix_(rows[covered], rows[covered])]
+
+        # Only earlier moves count: mask the diagonal and everything above it
+        earlier = np.tril(pairwise, k=-1)
+        novelty = 1.0 - earlier.max(axis=1)
+        return float(novelty.mean())
+
+    @property
+    def has_transitions(self) -> bool:
+        """True if a transition-cost matrix covers at least one move."""
+        return self._transition is not None and bool(self._matrix_rows)
+
+    def transition_cost(self, a: str, b: str) -> Optional[float]:
+        """Cost of playing b right after a, or None if either move is not covered."""
+        if self._transition is None or a not in self._matrix_rows or b not in self._matrix_rows:
+            return None
+        return float(self._transition[self._matrix_rows[a], self._matrix_rows[b]])
+
+    def transition_costs(self, a: str, names: List[str]) -> np.ndarray:
+        """
+        Costs of playing each of `names` right after a.
+
+        Returns:
+            float array aligned with names, NaN where a move is not covered
+        """
+        costs = np.full(len(names), np.nan)
+        if self._transition is None or a not in self._matrix_rows:
+            return costs
+        rows = np.array([self._matrix_rows.get(name, -1) for name in names], dtype=np.int64)
+        covered = rows >= 0
+        costs[covered] = self._transition[self._matrix_rows[a], rows[covered]]
+        return costs
+
+    def chain_costs(self, names: List[str]) -> List[Optional[float]]:
+        """Cost of each transition in a sequence of moves (len(names) - 1 entries, None if unknown)."""
+        return [self.transition_cost(a, b) for a, b in zip(names, names[1:])]
+
+    def smoothest_next(self, name: str, k: int = 5, move_type: Optional[str] = None,
+                       max_cost: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        The k moves with the cheapest transition out of a move.
+
+        Returns:
+            [(name, cost), ...] cheapest first; empty if the move is not covered
+        """
+        if self._transition is None or name not in self._matrix_rows:
+            return []
+        candidates = [other for other in self._name_lists.get(move_type, [])
+                      if other in self._matrix_rows]
+        costs = self.transition_costs(name, candidates)
+        order = np.argsort(costs, kind='stable')[:k]
+        return [(candidates[i], float(costs[i])) for i in order
+                if max_cost is None or costs[i] <= max_cost]
+
+    def smooth_order(self, names: List[str]) -> List[int]:
+        """
+        Order for playing a set of moves with cheap transitions.
+
+        Builds a greedy cheapest-next chain from every possible first move and
+        keeps the cheapest chain (O(n^3), for the handful of moves in one
+        solution). Without transition data for all of them the order is kept.
+
+        Returns:
+            Indices into names
+        """
+        n = len(names)
+        rows = [self._matrix_rows.get(name) for name in names]
+        if self._transition is None or n < 2 or None in rows:
+            return list(range(n))
+
+        costs = self._transition[np.ix_(rows, rows)].astype(np.float64)
+        np.fill_diagonal(costs, np.inf)
+        best_total, best_order = np.inf, list(range(n))
+        for first in range(n):
+            order, total = [first], 0.0
+            remaining = [i for i in range(n) if i != first]
+            while remaining:
+                following = min(remaining, key=lambda i: costs[order[-1], i])
+                total += costs[order[-1], following]
+                order.append(following)
+                remaining.remove(following)
+            if total < best_total:
+                best_total, best_order = total, order
+        return best_order
+
+    def names_by_type(self, move_type: str) -> List[str]:
+        """Names of all moves of a type, shortest first."""
+        return list(self._name_lists.get(move_type, ()))
+
+    def _range(self, min_dur: float, max_dur: float, move_type: Optional[str]) -> Tuple[int, int]:
+        durations = self._duration_lists.get(move_type, [])
+        lo = bisect_left(durations, min_dur)
+        hi = bisect_right(durations, max_dur)
+        return lo, max(lo, hi)
+
+    def names_in_range(self, min_dur: float, max_dur: float,
+                       move_type: Optional[str] = None) -> List[str]:
+        """Names of moves with min_dur <= duration <= max_dur, shortest first."""
+        lo, hi = self._range(min_dur, max_dur, move_type)
+        return self._name_lists.get(move_type, [])[lo:hi]
+
+    def count_in_range(self, min_dur: float, max_dur: float,
+                       move_type: Optional[str] = None) -> int:
+        """Number of moves with min_dur <= duration <= max_dur."""
+        lo, hi = self._range(min_dur, max_dur, move_type)
+        return hi - lo
+
+    def count_at_most(self, max_dur: float, move_type: Optional[str] = None) -> int:
+        """Number of moves no longer than max_dur (they are the first entries of sorted_moves)."""
+        return bisect_right(self._duration_lists.get(move_type, []), max_dur)
+
+    def nearest(self, duration: float, k: int = 1, move_type: Optional[str] = None,
+                max_duration: Optional[float] = None, exclude: Iterable[str] = ()) -> List[str]:
+        """
+        The k moves whose durations are closest to `duration`.
+
+        Args:
+            duration: Target duration in seconds
+            k: Number of moves to return
+            move_type: Restrict to one type (None = all)
+            max_duration: Only consider moves no longer than this
+            exclude: Names to skip
+
+        Returns:
+            Names ordered by distance to `duration` (ties: shorter first)
+        """
+        names = self._name_lists.get(move_type, [])
+        durations = self._duration_lists.get(move_type, [])
+        hi = len(durations) if max_duration is None else self.count_at_most(max_duration, move_type)
+        exclude = set(exclude)
+
+        # Walk outwards from the insertion point, taking the closer side each step
+        right = bisect_left(durations, duration, 0, hi)
+        left = right - 1
+        result = []
+        while len(result) < k and (left >= 0 or right < hi):
+            take_left = right >= hi or (left >= 0 and duration - durations[left] <= durations[right] - duration)
+            if take_left:
+                index, left = left, left - 1
+            else:
+                index, right = right, right + 1
+            if names[index] not in exclude:
+                result.append(names[index])
+        return result
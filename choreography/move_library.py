@@ -0,0 +1,295 @@
+"""
+Local Move Library Mirror
+
+Exports the HuggingFace move libraries to a compact local format and loads
+them back without network access, for offline venue machines:
+
+    python -m choreography.move_library export          # both libraries, needs network once
+    python -m choreography.move_library info
+
+Layout (one directory per library):
+
+    move_library/<org>__<dataset>/index.json      library, revision, per-move offsets/hashes
+    move_library/<org>__<dataset>/times.npy       (frames,) float64
+    move_library/<org>__<dataset>/head.npy        (frames, 4, 4) float32
+    move_library/<org>__<dataset>/antennas.npy    (frames, 2) float32
+    move_library/<org>__<dataset>/body_yaw.npy    (frames,) float32
+    move_library/<org>__<dataset>/sounds/<move>.<ext>
+
+All moves of a library share the arrays; the index gives each move's frame
+range. LocalRecordedMoves memory-maps the arrays, so opening a library reads
+only the index - frames are paged in when a move is played or analyzed,
+instead of parsing every move's JSON up front.
+
+LocalRecordedMoves has the RecordedMoves interface used in this project
+(.moves, .sounds, .get(), .list_moves(), .local_path); open_library()
+returns the mirror when one is exported and falls back to HuggingFace.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping, Sequence
+from glob import glob
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from reachy_mini.motion.recorded_move import RecordedMove, RecordedMoves
+
+
+LIBRARY_DIR = Path(os.environ.get('REACHY_MOVE_LIBRARY_DIR', Path(__file__).parent / "move_library"))
+
+LIBRARIES = (
+    "pollen-robotics/reachy-mini-dances-library",
+    "pollen-robotics/reachy-mini-emotions-library",
+)
+
+# Bump when the exported layout changes
+FORMAT_VERSION = 1
+
+# Raw move keys stored as arrays; other top-level keys go to the index
+TRAJECTORY_KEYS = ('time', 'set_target_data')
+
+
+def library_dir(library: str, root: Optional[Path] = None) -> Path:
+    """Mirror directory of a library ('org/dataset' -> root/org__dataset)."""
+    return Path(root or LIBRARY_DIR) / library.replace('/', '__')
+
+
+def has_mirror(library: str, root: Optional[Path] = None) -> bool:
+    """True if the library has been exported."""
+    return (library_dir(library, root) / 'index.json').exists()
+
+
+def move_files(local_path) -> Dict[str, Path]:
+    """Move name -> JSON file in a library snapshot (same lookup as RecordedMoves.process)."""
+    paths = glob(f"{local_path}/*.json") + glob(f"{local_path}/data/*.json")
+    return {Path(path).stem: Path(path) for path in paths}
+
+
+def file_hash(path) -> str:
+    """Short SHA-1 of a move file's content."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class _Frames(Sequence):
+    """set_target_data view over the mirror arrays (one dict per frame, built on access)."""
+
+    def __init__(self, head: np.ndarray, antennas: np.ndarray, body_yaw: np.ndarray):
+        self.head = head
+        self.antennas = antennas
+        self.body_yaw = body_yaw
+
+    def __len__(self) -> int:
+        return len(self.head)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _Frames(self.head[index], self.antennas[index], self.body_yaw[index])
+        return {
+            'head': self.head[index],
+            'antennas': self.antennas[index],
+            'body_yaw': float(self.body_yaw[index]),
+        }
+
+
+class _MoveTable(Mapping):
+    """name -> raw move dict (as in RecordedMoves.moves), assembled from array slices."""
+
+    def __init__(self, entries: Dict[str, Dict[str, Any]], arrays: Dict[str, np.ndarray]):
+        self._entries = entries
+        self._arrays = arrays
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        entry = self._entries[name]
+        frames = slice(entry['start'], entry['start'] + entry['length'])
+        return {
+            **entry.get('extra', {}),
+            'description': entry.get('description', ''),
+            'time': self._arrays['times'][frames],
+            'set_target_data': _Frames(self._arrays['head'][frames],
+                                       self._arrays['antennas'][frames],
+                                       self._arrays['body_yaw'][frames]),
+        }
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LocalRecordedMoves:
+    """A move library loaded from the local mirror (drop-in for RecordedMoves)."""
+
+    def __init__(self, hf_dataset_name: str, root: Optional[Path] = None):
+        """
+        Open an exported library.
+
+        Args:
+            hf_dataset_name: Library name, e.g. "pollen-robotics/reachy-mini-dances-library"
+            root: Mirror root (default LIBRARY_DIR)
+        """
+        self.hf_dataset_name = hf_dataset_name
+        self.local_path = str(library_dir(hf_dataset_name, root))
+        path = Path(self.local_path)
+
+        with open(path / 'index.json', 'r') as f:
+            index = json.load(f)
+        if index.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported move library format in {path} "
+                             f"(version {index.get('format_version')}, expected {FORMAT_VERSION})")
+
+        self.revision: str = index['revision']
+        entries = index['moves']
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode='r')
+                  for name in ('times', 'head', 'antennas', 'body_yaw')}
+
+        self.moves = _MoveTable(entries, arrays)
+        self.sounds: Dict[str, Optional[Path]] = {
+            name: (path / entry['sound']) if entry.get('sound') else None
+            for name, entry in entries.items()
+        }
+        # Content hashes of the original move files (see move_metadata_cache)
+        self.move_hashes: Dict[str, str] = {name: entry['hash'] for name, entry in entries.items()}
+
+    def get(self, move_name: str) -> RecordedMove:
+        """Get a recorded move by name."""
+        if move_name not in self.moves:
+            raise ValueError(
+                f"Move {move_name} not found in local move library {self.hf_dataset_name}"
+            )
+        return RecordedMove(self.moves[move_name], self.sounds[move_name])
+
+    def list_moves(self) -> List[str]:
+        """List all moves in the loaded library."""
+        return list(self.moves.keys())
+
+
+def open_library(library: str, prefer_local: bool = True, root: Optional[Path] = None):
+    """
+    Open a move library: the local mirror if exported, else HuggingFace.
+
+    Args:
+        library: Library name
+        prefer_local: Use the mirror when it exists (set False to force HuggingFace)
+        root: Mirror root (default LIBRARY_DIR)
+
+    Returns:
+        LocalRecordedMoves or RecordedMoves
+    """
+    if prefer_local and has_mirror(library, root):
+        try:
+            return LocalRecordedMoves(library, root)
+        except Exception as e:
+            print(f"[MoveLibrary] Could not open local mirror of {library}: {e}")
+    return RecordedMoves(library)
+
+
+def export_library(library: str, root: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Export one HuggingFace library to the local mirror.
+
+    The mirror is written to a temporary directory and swapped into place:
+    the previous mirror is renamed aside, the new one renamed in, and only
+    then is the previous one deleted. An interrupted export leaves the
+    previous mirror intact (renamed aside only for the instant between the
+    two renames, when open_library() falls back to HuggingFace).
+
+    Returns:
+        {'library', 'revision', 'moves', 'frames', 'bytes', 'path'}
+    """
+    print(f"[MoveLibrary] Exporting {library}...")
+    source = RecordedMoves(library)
+    files = move_files(source.local_path)
+    revision = Path(source.local_path).name
+
+    names = sorted(source.moves)
+    times, head, antennas, body_yaw = [], [], [], []
+    entries = {}
+    start = 0
+    for name in names:
+        move = source.moves[name]
+        frames = move['set_target_data']
+        times.append(np.asarray(move['time'], dtype=np.float64))
+        head.append(np.asarray([frame['head'] for frame in frames], dtype=np.float32).reshape(-1, 4, 4))
+        antennas.append(np.asarray([frame['antennas'] for frame in frames], dtype=np.float32).reshape(-1, 2))
+        body_yaw.append(np.asarray([frame.get('body_yaw', 0.0) for frame in frames], dtype=np.float32))
+        entries[name] = {
+            'start': start,
+            'length': len(frames),
+            'description': move.get('description', ''),
+            'hash': file_hash(files[name]) if name in files else None,
+            'extra': {key: value for key, value in move.items()
+                      if key not in TRAJECTORY_KEYS and key != 'description'},
+        }
+        start += len(frames)
+
+    root = Path(root or LIBRARY_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+    target = library_dir(library, root)
+    tmp = Path(tempfile.mkdtemp(dir=root, prefix=f".{target.name}-"))
+    try:
+        for key, parts in (('times', times), ('head', head), ('antennas', antennas), ('body_yaw', body_yaw)):
+            np.save(tmp / f"{key}.npy", np.concatenate(parts) if parts else np.zeros(0))
+
+        (tmp / 'sounds').mkdir()
+        for name in names:
+            sound = source.sounds.get(name)
+            if sound is not None and Path(sound).exists():
+                relative = Path('sounds') / f"{name}{Path(sound).suffix}"
+                shutil.copyfile(sound, tmp / relative)
+                entries[name]['sound'] = str(relative)
+
+        with open(tmp / 'index.json', 'w') as f:
+            json.dump({'library': library, 'revision': revision,
+                       'format_version': FORMAT_VERSION, 'moves': entries}, f, indent=2)
+
+        old = None
+        if target.exists():
+            old = tmp.with_name(f"{tmp.name}-old")
+            os.replace(target, old)
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            if old is not None:
+                os.replace(old, target)
+            raise
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+    size = sum(p.stat().st_size for p in target.rglob('*') if p.is_file())
+    print(f"[MoveLibrary] Exported {len(names)} moves ({start} frames, "
+          f"{size / (1024 * 1024):.1f} MB) to {target}")
+    return {'library': library, 'revision': revision, 'moves': len(names),
+            'frames': start, 'bytes': size, 'path': str(target)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or inspect the local move library mirror")
+    parser.add_argument('command', choices=['export', 'info'])
+    parser.add_argument('--root', type=str, default=None, help=f'Mirror directory (default {LIBRARY_DIR})')
+    parser.add_argument('--libraries', nargs='+', default=list(LIBRARIES))
+    args = parser.parse_args()
+
+    for library in args.libraries:
+        if args.command == 'export':
+            export_library(library, args.root)
+        elif has_mirror(library, args.root):
+            local = LocalRecordedMoves(library, args.root)
+            print(f"{library}: {len(local.moves)} moves, revision {local.revision[:12]}, {local.local_path}")
+        else:
+            print(f"{library}: not exported")
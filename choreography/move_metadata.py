@@ -1,8 +1,14 @@
 """
 Move Metadata: Beat counts and characteristics for choreography generation
 Beat count = number of distinct movement phrases in the move
+
+Beat counts measured from the move trajectories (beat_count in
+move_metadata.json, see move_trajectories) take precedence; the tables below
+are the fallback for moves the cache does not cover yet.
 """
 
+from .move_metadata_cache import get_beat_count as get_measured_beat_count
+
 # Dance moves with their beat counts
 DANCE_BEAT_COUNTS = {
     # Based on move descriptions and rhythmic structure
@@ -19,7 +25,6 @@ DANCE_BEAT_COUNTS = {
     "groovy_sway_and_roll": 4,        # Sway left, sway right, roll left, roll right
     "jackson_square": 4,              # 4 corners of square pattern
     "chin_lead": 2,                   # Lead forward, return
-    "head_tilt_roll": 2,              # Tilt one way, tilt other
     "grid_snap": 4,                   # 4 grid positions
     "polyrhythm_combo": 4,            # Multiple overlapping rhythms
     "interwoven_spirals": 4,          # Complex multi-beat pattern
@@ -34,17 +39,27 @@ EMOTION_BEAT_COUNTS = {
     # This is a reasonable default for all emotions
 }
 
-def get_beat_count(move_name: str, move_type: str = "dance") -> int:
+def get_beat_count(move_name: str, move_type: str = "dance", metadata=None) -> int:
     """
     Get the beat count for a move.
 
     Args:
         move_name: Name of the move
         move_type: "dance" or "emotion"
+        metadata: Optional pre-loaded move metadata (shared catalog if not provided)
 
     Returns:
-        Beat count (default 1 for emotions, must be defined for dances)
+        Measured beat count if cached, else the table value (default 1 for
+        emotions, 2 for unlisted dances)
     """
+    try:
+        measured = get_measured_beat_count(move_name, metadata)
+    except Exception as e:
+        print(f"[MoveMetadata] Could not read measured beat counts: {e}")
+        measured = None
+    if measured is not None:
+        return measured
+
     if move_type == "emotion":
         # Emotions are typically single expressions = 1 beat
         return EMOTION_BEAT_COUNTS.get(move_name, 1)
@@ -1,20 +1,44 @@
 """
 Move Metadata Cache System
 
-Builds and maintains a cache of move metadata (actual SDK durations, types, etc.)
-This is expensive to build but fast to load once cached.
+Builds and maintains a cache of move metadata (actual SDK durations, types,
+motion descriptors and beat counts from move_trajectories, etc.)
+This is expensive to build but fast to load once cached. get_catalog() returns
+a process-wide indexed MoveCatalog that is parsed once and reloaded only when
+the cache file changes.
 """
 
 import json
 import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from reachy_mini.motion.recorded_move import RecordedMoves
+
+import numpy as np
+
+from .move_catalog import MoveCatalog
+from .move_library import open_library, has_mirror, LocalRecordedMoves, move_files, file_hash
+from .move_trajectories import (compute_descriptors, add_motion_energy, move_features,
+                                similarity_matrix, transition_matrix, DESCRIPTOR_FIELDS, BEAT_FIELDS)
 
 CACHE_FILE = Path(__file__).parent / "move_metadata.json"
 
+# Sidecar of CACHE_FILE: per-move signatures and boundary poses, and the
+# move-to-move similarity and transition-cost matrices
+MATRIX_FILE_NAME = "move_matrices.npz"
+
+# Per-move sidecar arrays (see move_trajectories.move_features)
+FEATURE_KEYS = ('signature', 'start_pose', 'end_pose')
+MATRIX_KEYS = ('names', 'hashes', 'signatures', 'start_poses', 'end_poses', 'similarity', 'transition')
+
 DANCE_LIBRARY = "pollen-robotics/reachy-mini-dances-library"
 EMOTION_LIBRARY = "pollen-robotics/reachy-mini-emotions-library"
 
+# Process-wide catalog: (file stamp, MoveCatalog), replaced as one tuple on reload
+_shared_catalog = (None, None)
+_catalog_lock = threading.Lock()
+
 # Moves that cause mechanical collisions on physical Reachy Mini hardware
 FORBIDDEN_MOVES = {
     'headbanger_combo', # Excessive strain, collision risk
@@ -24,74 +48,325 @@ FORBIDDEN_MOVES = {
 }
 
 
-def build_cache():
+LIBRARIES = (
+    (DANCE_LIBRARY, 'dance'),
+    (EMOTION_LIBRARY, 'emotion'),
+)
+
+
+def _snapshot_path(library):
+    """Local snapshot of a library, resolved the way RecordedMoves does (cache first)."""
+    from huggingface_hub import snapshot_download
+    from huggingface_hub.errors import LocalEntryNotFoundError
+
+    try:
+        return snapshot_download(library, repo_type="dataset", local_files_only=True)
+    except LocalEntryNotFoundError:
+        return snapshot_download(library, repo_type="dataset")
+
+
+def _library_revision(local_path):
+    """Dataset revision of a snapshot (HF snapshots live in snapshots/<commit>)."""
+    return Path(local_path).name
+
+
+def _library_hashes(moves):
+    """
+    Revision and per-move content hashes of a loaded library.
+
+    The local mirror (move_library) stores the hashes of the original move
+    files, so cache entries match whichever source a library was loaded from.
+
+    Returns:
+        (revision, {move_name: hash})
+    """
+    if isinstance(moves, LocalRecordedMoves):
+        return moves.revision, dict(moves.move_hashes)
+    files = move_files(moves.local_path)
+    return _library_revision(moves.local_path), {name: file_hash(path) for name, path in files.items()}
+
+
+def _is_current(entry, library, move_hash):
+    """True if a cached entry can be reused for a move with this content hash."""
+    return (entry is not None
+            and move_hash is not None
+            and entry.get('library') == library
+            and entry.get('hash') == move_hash
+            and all(field in entry for field in DESCRIPTOR_FIELDS + BEAT_FIELDS))
+
+
+def _add_descriptors(metadata, moves):
+    """Compute motion descriptors for the given raw moves (one vectorized pass)."""
+    if not moves:
+        return
+    try:
+        descriptors = compute_descriptors(moves)
+        for name, values in descriptors.items():
+            metadata[name].update(values)
+        print(f"[MoveCache] Computed motion descriptors for {len(descriptors)} moves")
+    except Exception as e:
+        print(f"[MoveCache] Error computing motion descriptors: {e}")
+
+
+def _load_library(library, move_type, previous, previous_features):
+    """
+    Load one library and build its cache entries.
+
+    Args:
+        library: HuggingFace dataset name
+        move_type: "dance" or "emotion"
+        previous: Existing cache entries; moves whose content hash is unchanged are reused
+        previous_features: {move_name: (hash, features)} from the existing sidecar
+
+    Returns:
+        ({move_name: entry}, {move_name: features}) for the library's (non-forbidden) moves
+    """
+    print(f"[MoveCache] Loading {library}...")
+    moves = open_library(library)
+    revision, hashes = _library_hashes(moves)
+
+    entries = {}
+    changed = {}
+    for name in moves.moves:
+        if name in FORBIDDEN_MOVES:
+            print(f"[MoveCache] Skipping forbidden move: {name}")
+            continue
+        move_hash = hashes.get(name)
+        if _is_current(previous.get(name), library, move_hash):
+            entries[name] = dict(previous[name], revision=revision)
+            continue
+        move = moves.get(name)
+        entries[name] = {
+            'duration': float(move.duration),
+            'type': move_type,
+            'library': library,
+            'revision': revision,
+            'hash': move_hash,
+        }
+        changed[name] = moves.moves[name]
+
+    _add_descriptors(entries, changed)
+
+    features = {name: previous_features[name][1] for name, entry in entries.items()
+                if name in previous_features and previous_features[name][0] == entry['hash']
+                and name not in changed}
+    try:
+        features.update(move_features(
+            {name: moves.moves[name] for name in entries if name not in features}))
+    except Exception as e:
+        print(f"[MoveCache] Error computing trajectory signatures and poses: {e}")
+
+    print(f"[MoveCache] Loaded {len(entries)} {move_type} moves "
+          f"({len(changed)} new or changed, revision {revision[:12]})")
+    return entries, features
+
+
+def build_cache(full=False):
     """
     Build the move metadata cache by loading all moves from SDK.
     This is slow (loads from HuggingFace) but only needs to run once.
+
+    Both libraries load in parallel. Unless full=True, moves whose file
+    content hash matches the existing cache keep their entry, so only new or
+    changed moves are processed.
+
+    Args:
+        full: Ignore the existing cache and process every move
     """
     print("[MoveCache] Building move metadata cache...")
-    print("[MoveCache] This will take ~30s (loading from HuggingFace)...")
+    print("[MoveCache] Loading both libraries in parallel (~30s on a first build)...")
+
+    previous = {} if full else _read_cache_file()
+    previous_features = {} if full else _read_features()
+
+    # Loading is mostly download and file I/O, so threads overlap well
+    with ThreadPoolExecutor(max_workers=len(LIBRARIES)) as pool:
+        futures = [pool.submit(_load_library, library, move_type, previous, previous_features)
+                   for library, move_type in LIBRARIES]
 
     metadata = {}
+    features = {}
+    for (library, move_type), future in zip(LIBRARIES, futures):
+        try:
+            entries, library_features = future.result()
+            metadata.update(entries)
+            features.update(library_features)
+        except Exception as e:
+            print(f"[MoveCache] Error loading {move_type} library: {e}")
+            kept = {name: data for name, data in previous.items() if data.get('library') == library}
+            if kept:
+                print(f"[MoveCache] Keeping {len(kept)} cached {move_type} moves")
+                metadata.update(kept)
+                features.update({name: previous_features[name][1] for name in kept
+                                 if name in previous_features})
+
+    # Ranked over both libraries so dance and emotion energies compare
+    add_motion_energy(metadata)
+
+    # Save to cache (matrices first: a reader seeing the new metadata also finds them)
+    _write_matrices(metadata, features)
+    print(f"[MoveCache] Saving cache to {CACHE_FILE}...")
+    _write_cache_file(metadata)
+
+    print(f"[MoveCache] Cache built successfully! Total moves: {len(metadata)}")
+    return metadata
+
 
-    # Load dance library
-    print(f"[MoveCache] Loading {DANCE_LIBRARY}...")
+def verify_cache():
+    """
+    Check whether the cache matches the library snapshots, without rebuilding.
+
+    Move files are hashed and compared with the cached hashes. Libraries are
+    resolved the way open_library() resolves them (local mirror, else the
+    HuggingFace cache first), so the check is against the moves the player
+    would actually load.
+
+    Returns:
+        {
+            'stale': bool,
+            'libraries': {library: {'revision', 'cached_revisions', 'new',
+                                    'changed', 'removed', 'missing_descriptors'}}
+        }
+    """
+    cached = _read_cache_file()
+    report = {'stale': False, 'libraries': {}}
+
+    for library, move_type in LIBRARIES:
+        if has_mirror(library):
+            revision, hashes = _library_hashes(LocalRecordedMoves(library))
+        else:
+            local_path = _snapshot_path(library)
+            revision = _library_revision(local_path)
+            hashes = {name: file_hash(path) for name, path in move_files(local_path).items()}
+        hashes = {name: value for name, value in hashes.items() if name not in FORBIDDEN_MOVES}
+        entries = {name: data for name, data in cached.items() if data.get('library') == library}
+
+        changed = [name for name in hashes if name in entries
+                   and entries[name].get('hash') != hashes[name]]
+        result = {
+            'revision': revision,
+            'cached_revisions': sorted({str(data.get('revision')) for data in entries.values()}),
+            'new': sorted(set(hashes) - set(entries)),
+            'changed': sorted(changed),
+            'removed': sorted(set(entries) - set(hashes)),
+            'missing_descriptors': sorted(name for name, data in entries.items()
+                                          if not all(field in data for field in DESCRIPTOR_FIELDS + BEAT_FIELDS)),
+        }
+        report['libraries'][library] = result
+        if result['new'] or result['changed'] or result['removed'] or result['missing_descriptors']:
+            report['stale'] = True
+
+    return report
+
+
+def _read_cache_file():
+    """Existing cache contents, or {} if there is no readable cache."""
+    if not CACHE_FILE.exists():
+        return {}
     try:
-        dances = RecordedMoves(DANCE_LIBRARY)
-        dance_names = list(dances.moves.keys())
-
-        for name in dance_names:
-            if name in FORBIDDEN_MOVES:
-                print(f"[MoveCache] Skipping forbidden move: {name}")
-                continue
-            move = dances.get(name)
-            metadata[name] = {
-                'duration': float(move.duration),
-                'type': 'dance',
-                'library': DANCE_LIBRARY
-            }
-
-        print(f"[MoveCache] Loaded {len(dance_names)} dance moves")
+        with open(CACHE_FILE, 'r') as f:
+            return json.load(f)
     except Exception as e:
-        print(f"[MoveCache] Error loading dance library: {e}")
+        print(f"[MoveCache] Ignoring unreadable cache: {e}")
+        return {}
+
 
-    # Load emotion library
-    print(f"[MoveCache] Loading {EMOTION_LIBRARY}...")
+def _write_cache_file(metadata):
+    """Write the cache atomically, so readers never parse a half-written file."""
+    fd, tmp = tempfile.mkstemp(dir=CACHE_FILE.parent, prefix=f".{CACHE_FILE.name}-")
     try:
-        emotions = RecordedMoves(EMOTION_LIBRARY)
-        emotion_names = list(emotions.moves.keys())
-
-        for name in emotion_names:
-            if name in FORBIDDEN_MOVES:
-                print(f"[MoveCache] Skipping forbidden move: {name}")
-                continue
-            move = emotions.get(name)
-            metadata[name] = {
-                'duration': float(move.duration),
-                'type': 'emotion',
-                'library': EMOTION_LIBRARY
-            }
-
-        print(f"[MoveCache] Loaded {len(emotion_names)} emotion moves")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp, CACHE_FILE)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _matrix_file():
+    return CACHE_FILE.with_name(MATRIX_FILE_NAME)
+
+
+def _write_matrices(metadata, features):
+    """Compute the similarity and transition matrices and write the sidecar atomically."""
+    names = [name for name in metadata if name in features]
+    if not names:
+        return
+    vectors = np.stack([features[name]['signature'] for name in names])
+    start_poses = np.stack([features[name]['start_pose'] for name in names])
+    end_poses = np.stack([features[name]['end_pose'] for name in names])
+    similarity = similarity_matrix(vectors)
+    transition = transition_matrix(end_poses, start_poses)
+
+    fd, tmp = tempfile.mkstemp(dir=CACHE_FILE.parent, prefix=f".{MATRIX_FILE_NAME}-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, names=np.array(names),
+                     hashes=np.array([str(metadata[name].get('hash')) for name in names]),
+                     signatures=vectors, start_poses=start_poses, end_poses=end_poses,
+                     similarity=similarity, transition=transition)
+        os.replace(tmp, _matrix_file())
+        print(f"[MoveCache] Saved {len(names)}x{len(names)} similarity and transition matrices "
+              f"to {_matrix_file()}")
     except Exception as e:
-        print(f"[MoveCache] Error loading emotion library: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        print(f"[MoveCache] Could not write move matrices: {e}")
 
-    # Save to cache
-    print(f"[MoveCache] Saving cache to {CACHE_FILE}...")
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(metadata, f, indent=2)
 
-    print(f"[MoveCache] Cache built successfully! Total moves: {len(metadata)}")
-    return metadata
+def load_matrices():
+    """
+    Load the matrix sidecar.
+
+    Returns:
+        {'names', 'hashes', 'signatures', 'similarity', ...} arrays (sidecars
+        written before transitions were added lack 'start_poses', 'end_poses'
+        and 'transition'), or None if missing/unreadable
+    """
+    path = _matrix_file()
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as data:
+            return {key: data[key] for key in MATRIX_KEYS if key in data.files}
+    except Exception as e:
+        print(f"[MoveCache] Ignoring unreadable move matrices: {e}")
+        return None
+
+
+def _read_features():
+    """{move_name: (hash, features)} from the existing sidecar (empty if it lacks any feature)."""
+    matrices = load_matrices()
+    if matrices is None or any(f"{key}s" not in matrices for key in FEATURE_KEYS):
+        return {}
+    return {str(name): (str(move_hash), {key: matrices[f"{key}s"][i] for key in FEATURE_KEYS})
+            for i, (name, move_hash) in enumerate(zip(matrices['names'], matrices['hashes']))}
+
+
+def _cache_stamp():
+    """(mtime_ns, size) of the cache file and its sidecar, or None if there is no cache."""
+    stamps = []
+    for path in (CACHE_FILE, _matrix_file()):
+        try:
+            stat = path.stat()
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            if path == CACHE_FILE:
+                return None
+            stamps.append(None)
+    return tuple(stamps)
 
 
 def load_cache(rebuild=False):
     """
     Load move metadata from cache.
-    If cache doesn't exist or rebuild=True, builds it first.
+    If cache doesn't exist or rebuild=True, builds it first (incrementally:
+    only new or changed moves are processed).
 
     Returns:
-        dict: {move_name: {duration: float, type: str, library: str}}
+        dict: {move_name: {duration: float, type: str, library: str,
+               motion descriptors and beats (see move_trajectories), motion_energy: float}}
     """
     if rebuild or not CACHE_FILE.exists():
         return build_cache()
@@ -101,22 +376,80 @@ def load_cache(rebuild=False):
         metadata = json.load(f)
 
     print(f"[MoveCache] Loaded {len(metadata)} moves from cache")
+    if not any('motion_energy' in data for data in metadata.values()):
+        print("[MoveCache] Cache has no motion descriptors (rebuild with --rebuild to add them)")
     return metadata
 
 
+def get_catalog():
+    """
+    Process-wide MoveCatalog of the cache.
+
+    The file is parsed once; later calls cost one stat() and return the same
+    catalog until move_metadata.json changes (mtime or size), which triggers
+    a reload. The new catalog is built completely before it replaces the old
+    one, so concurrent callers see either catalog, never a partial one. If a
+    reload fails, the previous catalog stays in use until the file changes.
+
+    Returns:
+        MoveCatalog: Treat as read-only; it is shared by every caller
+    """
+    global _shared_catalog
+
+    stamp, catalog = _shared_catalog
+    current = _cache_stamp()
+    if catalog is not None and current == stamp:
+        return catalog
+
+    with _catalog_lock:
+        # Another thread may have reloaded while this one waited
+        stamp, catalog = _shared_catalog
+        current = _cache_stamp()
+        if catalog is not None and current == stamp:
+            return catalog
+        try:
+            # Stamp taken before reading: a write during the read triggers another reload
+            metadata = load_cache()
+            new_catalog = MoveCatalog(metadata, matrices=load_matrices())
+        except Exception as e:
+            if catalog is None:
+                raise
+            print(f"[MoveCache] Reload failed, keeping previous catalog: {e}")
+            # Not retried until the file changes again
+            _shared_catalog = (current, catalog)
+            return catalog
+        _shared_catalog = (current if current is not None else _cache_stamp(), new_catalog)
+        return new_catalog
+
+
+def load_catalog(rebuild=False):
+    """
+    Load move metadata as an indexed MoveCatalog (see load_cache).
+
+    Args:
+        rebuild: Rebuild the cache file first
+
+    Returns:
+        MoveCatalog: The shared catalog from get_catalog()
+    """
+    if rebuild:
+        build_cache()
+    return get_catalog()
+
+
 def get_move_duration(move_name, metadata=None):
     """
     Get the actual SDK duration for a move.
 
     Args:
         move_name: Name of the move
-        metadata: Optional pre-loaded metadata dict (loads cache if not provided)
+        metadata: Optional pre-loaded metadata dict (shared catalog if not provided)
 
     Returns:
         float: Duration in seconds, or None if move not found
     """
     if metadata is None:
-        metadata = load_cache()
+        metadata = get_catalog()
 
     move_data = metadata.get(move_name)
     if move_data:
@@ -124,20 +457,45 @@ def get_move_duration(move_name, metadata=None):
     return None
 
 
+def get_beat_count(move_name, metadata=None):
+    """
+    Get the measured beat count of a move (see move_trajectories).
+
+    Args:
+        move_name: Name of the move
+        metadata: Optional pre-loaded metadata dict (shared catalog if not provided;
+            no cache is built if none exists yet)
+
+    Returns:
+        int: Beat count, or None if the move or its measured beats are not cached
+    """
+    if metadata is None:
+        if not CACHE_FILE.exists():
+            return None
+        metadata = get_catalog()
+
+    move_data = metadata.get(move_name)
+    if move_data and 'beat_count' in move_data:
+        return int(move_data['beat_count'])
+    return None
+
+
 def get_moves_by_type(move_type, metadata=None):
     """
     Get all moves of a specific type.
 
     Args:
         move_type: "dance" or "emotion"
-        metadata: Optional pre-loaded metadata dict
+        metadata: Optional pre-loaded metadata dict or MoveCatalog (indexed lookup)
 
     Returns:
         list: Move names of the specified type
     """
     if metadata is None:
-        metadata = load_cache()
+        metadata = get_catalog()
 
+    if isinstance(metadata, MoveCatalog):
+        return metadata.names_by_type(move_type)
     return [name for name, data in metadata.items() if data['type'] == move_type]
 
 
@@ -148,14 +506,16 @@ def get_moves_by_duration(min_dur, max_dur, metadata=None):
     Args:
         min_dur: Minimum duration in seconds
         max_dur: Maximum duration in seconds
-        metadata: Optional pre-loaded metadata dict
+        metadata: Optional pre-loaded metadata dict or MoveCatalog (binary search)
 
     Returns:
         list: Move names within the duration range
     """
     if metadata is None:
-        metadata = load_cache()
+        metadata = get_catalog()
 
+    if isinstance(metadata, MoveCatalog):
+        return metadata.names_in_range(min_dur, max_dur)
     return [name for name, data in metadata.items()
             if min_dur <= data['duration'] <= max_dur]
 
@@ -172,17 +532,32 @@ def get_move_info(move_name, metadata=None):
         dict: {duration: float, type: str, library: str} or None
     """
     if metadata is None:
-        metadata = load_cache()
+        metadata = get_catalog()
 
     return metadata.get(move_name)
 
 
 if __name__ == "__main__":
     # Build/rebuild cache
+    #   --rebuild  reprocess new or changed moves
+    #   --full     reprocess every move
+    #   --verify   report whether the cache is stale (exit code 1 if so)
     import sys
-    rebuild = "--rebuild" in sys.argv
 
-    metadata = load_cache(rebuild=rebuild)
+    if "--verify" in sys.argv:
+        report = verify_cache()
+        for library, result in report['libraries'].items():
+            print(f"\n{library} (revision {result['revision'][:12]}, cached {', '.join(r[:12] for r in result['cached_revisions']) or '-'})")
+            for key in ('new', 'changed', 'removed', 'missing_descriptors'):
+                if result[key]:
+                    print(f"  {key}: {', '.join(result[key])}")
+        print(f"\nCache is {'STALE' if report['stale'] else 'up to date'}")
+        sys.exit(1 if report['stale'] else 0)
+
+    if "--full" in sys.argv:
+        metadata = build_cache(full=True)
+    else:
+        metadata = load_cache(rebuild="--rebuild" in sys.argv)
 
     # Print summary
     dances = get_moves_by_type("dance", metadata)
@@ -199,4 +574,14 @@ if __name__ == "__main__":
     print(f"  Min: {min(durations):.3f}s")
     print(f"  Max: {max(durations):.3f}s")
     print(f"  Average: {sum(durations)/len(durations):.3f}s")
+    described = [data for data in metadata.values() if 'motion_energy' in data]
+    print(f"\nMotion descriptors: {len(described)}/{len(metadata)} moves")
+    for field in DESCRIPTOR_FIELDS:
+        if described:
+            values = [data[field] for data in described]
+            print(f"  {field}: {min(values):.3f} - {max(values):.3f}")
+    beats = [data['beat_count'] for data in metadata.values() if 'beat_count' in data]
+    if beats:
+        pulsed = sum(data.get('beat_period', 0) > 0 for data in metadata.values())
+        print(f"\nBeat counts: {min(beats)} - {max(beats)} ({pulsed} moves with a measured pulse)")
     print("="*60)
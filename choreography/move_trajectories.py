@@ -0,0 +1,426 @@
+"""
+Move Trajectory Descriptors
+
+Summarizes each recorded move's trajectory as a few motion descriptors, so
+moves can be selected by how much they move rather than by name lists:
+
+- peak_angular_velocity: fastest head rotation (rad/s)
+- rms_angular_velocity: typical head rotation speed (rad/s)
+- pose_range: largest roll/pitch/yaw excursion of the head (rad)
+- translation_range: largest x/y/z excursion of the head (m)
+- antenna_activity: mean antenna speed (rad/s)
+- dominant_frequency: strongest head oscillation frequency (Hz)
+- motion_energy: 0-1 rank of the move's speed within the whole catalog
+- beat_period / beat_count: the move's rhythmic pulse, measured from the
+  autocorrelation of its motion speed (one beat per accent: a swing, a nod
+  stroke); moves without a clear pulse count as a single 1-beat gesture
+
+Descriptors are computed for a whole library at once: every move's frames are
+concatenated and per-move statistics are taken with ufunc.reduceat, and the
+frequency analysis (dominant frequency and the speed autocorrelation for
+beats) is one FFT over a zero-padded (moves x frames) matrix each.
+
+For move-to-move similarity each move also gets a fixed-length signature: its
+head angles and antenna positions (centered) resampled over the move's
+length. similarity_matrix() compares signatures at their best circular time
+alignment (all pairs and shifts at once via FFT cross-correlation), so the
+same sway started at another point of its cycle still matches, and turns the
+distances into 0-1 similarities.
+
+For transitions each move also keeps its first and last pose.
+transition_matrix() gives, for every ordered pair (a, b), the cost of going
+from a's final pose to b's first pose: the head rotation angle between them
+plus weighted head travel, antenna and body-yaw differences, in
+radian-equivalents.
+
+Moves are the raw dataset dicts (RecordedMoves.moves[name]):
+{'time': [t0, ...], 'set_target_data': [{'head': 4x4, 'antennas': [l, r], 'body_yaw': float}, ...]}
+"""
+
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+from scipy.stats import rankdata
+
+
+DESCRIPTOR_FIELDS = (
+    'peak_angular_velocity',
+    'rms_angular_velocity',
+    'pose_range',
+    'translation_range',
+    'antenna_activity',
+    'dominant_frequency',
+)
+
+# Oscillations slower than this are posture drift, not rhythm
+MIN_FREQUENCY = 0.25
+
+# Zero-padding factor of the FFT (finer frequency bins for short moves)
+FFT_PADDING = 4
+
+# Cached beat fields (in move_metadata.json next to the descriptors)
+BEAT_FIELDS = ('beat_period', 'beat_count')
+
+# Shortest beat considered (s); 0.25 s is 240 BPM
+MIN_BEAT_PERIOD = 0.25
+
+# Autocorrelation (0-1) a speed pulse needs to count as a beat
+MIN_BEAT_CORRELATION = 0.3
+
+# Samples per channel in a trajectory signature (enough for ~4 per cycle of a
+# 3 Hz move lasting 10 s)
+SIGNATURE_SAMPLES = 128
+
+# Rows of the similarity matrix computed per block (bounds the pairs x shifts buffer)
+SIMILARITY_BLOCK = 64
+
+# Distance (as a fraction of the median pairwise distance) at which similarity falls to 1/e
+SIMILARITY_WIDTH = 0.5
+
+# Pose vector layout: head rotation (9), head translation (3), antennas (2), body yaw (1)
+POSE_SIZE = 15
+
+# Weights converting pose differences into radians of head rotation
+TRANSLATION_WEIGHT = 10.0   # 1 cm of head travel counts like 0.1 rad
+ANTENNA_WEIGHT = 0.25       # antennas are light and snap quickly
+BODY_YAW_WEIGHT = 1.0
+
+# Descriptors ranked into motion_energy (equal weights)
+ENERGY_FIELDS = ('rms_angular_velocity', 'antenna_activity')
+
+
+def trajectory_arrays(move: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Convert one raw move to arrays.
+
+    Returns:
+        {'times': (n,), 'head': (n, 4, 4), 'antennas': (n, 2), 'body_yaw': (n,)}
+    """
+    frames = move['set_target_data']
+    if hasattr(frames, 'head'):
+        # Local mirror moves (move_library) already hold arrays
+        return {
+            'times': np.asarray(move['time'], dtype=np.float64),
+            'head': np.asarray(frames.head, dtype=np.float64),
+            'antennas': np.asarray(frames.antennas, dtype=np.float64),
+            'body_yaw': np.asarray(frames.body_yaw, dtype=np.float64),
+        }
+    return {
+        'times': np.asarray(move['time'], dtype=np.float64),
+        'head': np.asarray([frame['head'] for frame in frames], dtype=np.float64).reshape(-1, 4, 4),
+        'antennas': np.asarray([frame['antennas'] for frame in frames], dtype=np.float64).reshape(-1, 2),
+        'body_yaw': np.asarray([frame.get('body_yaw', 0.0) for frame in frames], dtype=np.float64),
+    }
+
+
+def rotation_angles(rotations: np.ndarray) -> np.ndarray:
+    """
+    Roll, pitch, yaw (extrinsic xyz) of rotation matrices.
+
+    Args:
+        rotations: (n, 3, 3) or (n, 4, 4) array (only the rotation block is used)
+
+    Returns:
+        (n, 3) array in radians
+    """
+    r = rotations[:, :3, :3]
+    roll = np.arctan2(r[:, 2, 1], r[:, 2, 2])
+    pitch = np.arcsin(np.clip(-r[:, 2, 0], -1.0, 1.0))
+    yaw = np.arctan2(r[:, 1, 0], r[:, 0, 0])
+    return np.stack([roll, pitch, yaw], axis=1)
+
+
+def _concatenate(moves: List[Dict[str, Any]]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Stack the frames of all moves; returns (arrays, per-move frame counts)."""
+    arrays = [trajectory_arrays(move) for move in moves]
+    counts = np.array([len(a['times']) for a in arrays], dtype=np.int64)
+    stacked = {key: np.concatenate([a[key] for a in arrays]) for key in arrays[0]}
+    return stacked, counts
+
+
+def _dominant_frequencies(signal: np.ndarray, counts: np.ndarray, offsets: np.ndarray,
+                          frame_dt: np.ndarray) -> np.ndarray:
+    """
+    Strongest oscillation frequency per move.
+
+    Args:
+        signal: (frames, channels) concatenated signal, per-move mean removed
+        counts: Frames per move
+        offsets: First frame of each move
+        frame_dt: Mean frame period of each move (s)
+
+    Returns:
+        (moves,) frequencies in Hz (0.0 when a move does not oscillate)
+    """
+    n_moves = len(counts)
+    length = FFT_PADDING * int(counts.max())
+    rows = np.repeat(np.arange(n_moves), counts)
+    cols = np.arange(len(signal)) - np.repeat(offsets, counts)
+
+    padded = np.zeros((n_moves, length, signal.shape[1]))
+    padded[rows, cols] = signal
+    power = (np.abs(np.fft.rfft(padded, axis=1)) ** 2).sum(axis=2)
+
+    # Bin k of a move sampled every dt is k / (length * dt) Hz
+    frequencies = np.arange(power.shape[1])[None, :] / (length * frame_dt[:, None])
+    power[frequencies < MIN_FREQUENCY] = 0.0
+    peak = power.argmax(axis=1)
+    dominant = frequencies[np.arange(n_moves), peak]
+    return np.where(power[np.arange(n_moves), peak] > 0, dominant, 0.0)
+
+
+def _beat_periods(speed: np.ndarray, counts: np.ndarray, offsets: np.ndarray,
+                  frame_dt: np.ndarray) -> np.ndarray:
+    """
+    Beat period per move from the autocorrelation of its motion speed.
+
+    The period is the lag of the highest autocorrelation peak between
+    MIN_BEAT_PERIOD (within half a frame) and half the move, refined between
+    frames by parabolic interpolation. The autocorrelation is the biased
+    estimate (not divided by the overlap), so a multiple of the beat never
+    outscores the beat itself.
+
+    Args:
+        speed: (frames,) concatenated motion speed
+        counts: Frames per move
+        offsets: First frame of each move
+        frame_dt: Mean frame period of each move (s)
+
+    Returns:
+        (moves,) periods in s (0.0 when a move has no clear pulse)
+    """
+    n_moves = len(counts)
+    max_count = int(counts.max())
+    rows = np.repeat(np.arange(n_moves), counts)
+    cols = np.arange(len(speed)) - np.repeat(offsets, counts)
+    means = np.add.reduceat(speed, offsets) / counts
+
+    # Padding to twice the length makes the FFT correlation linear, not circular
+    padded = np.zeros((n_moves, 2 * max_count))
+    padded[rows, cols] = speed - np.repeat(means, counts)
+    spectrum = np.fft.rfft(padded, axis=1)
+    acf = np.fft.irfft(np.abs(spectrum) ** 2, n=2 * max_count, axis=1)[:, :max_count]
+    acf /= np.maximum(acf[:, :1], 1e-12)
+
+    lags = np.arange(max_count)
+    is_peak = np.zeros_like(acf, dtype=bool)
+    is_peak[:, 1:-1] = (acf[:, 1:-1] >= acf[:, :-2]) & (acf[:, 1:-1] > acf[:, 2:])
+    # Integer lags: a period right at the limit may fall between two frames
+    allowed = (is_peak & (lags[None, :] * frame_dt[:, None] >= MIN_BEAT_PERIOD - frame_dt[:, None] / 2)
+               & (lags[None, :] <= counts[:, None] // 2))
+    scores = np.where(allowed, acf, -np.inf)
+    move = np.arange(n_moves)
+    best = scores.argmax(axis=1)
+    strength = scores[move, best]
+
+    # Vertex of the parabola through the peak and its neighbours
+    left = acf[move, np.maximum(best - 1, 0)]
+    right = acf[move, np.minimum(best + 1, max_count - 1)]
+    curvature = left - 2 * strength + right
+    shift = np.where(curvature < 0, 0.5 * (left - right) / np.where(curvature < 0, curvature, -1.0), 0.0)
+    period = (best + np.clip(shift, -0.5, 0.5)) * frame_dt
+    return np.where(strength >= MIN_BEAT_CORRELATION, period, 0.0)
+
+
+def compute_descriptors(moves: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Motion descriptors and beats of a library of moves (see module docstring).
+
+    Args:
+        moves: {move_name: raw move dict}
+
+    Returns:
+        {move_name: {field: value for field in DESCRIPTOR_FIELDS + BEAT_FIELDS}}
+        (beat_count is an int, the rest floats); moves with fewer than two
+        frames are left out
+    """
+    names = [name for name, move in moves.items() if len(move.get('time', ())) >= 2]
+    if not names:
+        return {}
+
+    frames, counts = _concatenate([moves[name] for name in names])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    times, head, antennas = frames['times'], frames['head'], frames['antennas']
+
+    # Step k -> k+1 within a move; steps across move boundaries are masked out
+    dt = np.diff(times)
+    frame_dt = (times[offsets + counts - 1] - times[offsets]) / (counts - 1)
+    move_of_step = np.repeat(np.arange(len(names)), counts)[1:]
+    valid = np.ones(len(dt), dtype=bool)
+    valid[offsets[1:] - 1] = False
+    dt = np.where(dt > 0, dt, frame_dt[move_of_step])
+
+    # Head rotation between frames: angle of R_k^T R_k+1, from its trace
+    rotations = head[:, :3, :3]
+    trace = np.einsum('nij,nij->n', rotations[:-1], rotations[1:])
+    angular_speed = np.arccos(np.clip((trace - 1.0) / 2.0, -1.0, 1.0)) / dt
+    antenna_speed = np.abs(np.diff(antennas, axis=0)).mean(axis=1) / dt
+    angular_speed[~valid] = 0.0
+    antenna_speed[~valid] = 0.0
+
+    # Step k starts at frame k, so a move's steps reduce over its frame range
+    # (padded by one masked step so step and frame arrays align)
+    n_steps = counts - 1
+    angular_speed = np.append(angular_speed, 0.0)
+    antenna_speed = np.append(antenna_speed, 0.0)
+    peak_speed = np.maximum.reduceat(angular_speed, offsets)
+    rms_speed = np.sqrt(np.add.reduceat(angular_speed ** 2, offsets) / n_steps)
+    antenna_activity = np.add.reduceat(antenna_speed, offsets) / n_steps
+
+    angles = rotation_angles(head)
+    translations = head[:, :3, 3]
+    pose_range = (np.maximum.reduceat(angles, offsets, axis=0)
+                  - np.minimum.reduceat(angles, offsets, axis=0)).max(axis=1)
+    translation_range = (np.maximum.reduceat(translations, offsets, axis=0)
+                         - np.minimum.reduceat(translations, offsets, axis=0)).max(axis=1)
+
+    centered = angles - np.repeat(np.add.reduceat(angles, offsets, axis=0) / counts[:, None], counts, axis=0)
+    dominant = _dominant_frequencies(centered, counts, offsets, frame_dt)
+
+    # Beats: pulses of the combined head and antenna speed
+    beat_periods = _beat_periods(angular_speed + ANTENNA_WEIGHT * antenna_speed,
+                                 counts, offsets, frame_dt)
+    move_durations = times[offsets + counts - 1] - times[offsets] + frame_dt
+    beat_counts = np.where(beat_periods > 0,
+                           np.maximum(np.rint(move_durations / np.maximum(beat_periods, 1e-9)), 1), 1)
+
+    columns = (peak_speed, rms_speed, pose_range, translation_range, antenna_activity, dominant)
+    descriptors = {}
+    for i, name in enumerate(names):
+        descriptors[name] = {field: round(float(values[i]), 4) for field, values in zip(DESCRIPTOR_FIELDS, columns)}
+        descriptors[name]['beat_period'] = round(float(beat_periods[i]), 4)
+        descriptors[name]['beat_count'] = int(beat_counts[i])
+    return descriptors
+
+
+def add_motion_energy(metadata: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Set metadata[name]['motion_energy'] for every move with descriptors.
+
+    motion_energy is the mean percentile rank (0 = calmest, 1 = most active)
+    of ENERGY_FIELDS across all moves, so it compares across libraries.
+
+    Returns:
+        Number of moves scored
+    """
+    names = [name for name, data in metadata.items() if all(f in data for f in ENERGY_FIELDS)]
+    if not names:
+        return 0
+
+    ranks = []
+    for field in ENERGY_FIELDS:
+        values = np.array([metadata[name][field] for name in names])
+        ranks.append((rankdata(values) - 1) / max(len(names) - 1, 1))
+    energy = np.mean(ranks, axis=0)
+
+    for name, value in zip(names, energy):
+        metadata[name]['motion_energy'] = round(float(value), 4)
+    return len(names)
+
+
+def _signature(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    """Centered head angles and antennas resampled to SIGNATURE_SAMPLES points."""
+    signal = np.concatenate([rotation_angles(arrays['head']), arrays['antennas']], axis=1)
+    signal = signal - signal.mean(axis=0)
+
+    # Linear resampling over normalized time, all channels at once
+    positions = np.linspace(0, len(signal) - 1, SIGNATURE_SAMPLES)
+    left = np.minimum(positions.astype(np.int64), len(signal) - 2)
+    fraction = (positions - left)[:, None]
+    curve = signal[left] * (1 - fraction) + signal[left + 1] * fraction
+    return curve.ravel().astype(np.float32)
+
+
+def _pose(arrays: Dict[str, np.ndarray], index: int) -> np.ndarray:
+    """Pose vector of one frame (layout in POSE_SIZE)."""
+    head = arrays['head'][index]
+    return np.concatenate([head[:3, :3].ravel(), head[:3, 3], arrays['antennas'][index],
+                           [arrays['body_yaw'][index]]]).astype(np.float32)
+
+
+def move_features(moves: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Per-move vectors for the similarity and transition matrices.
+
+    Args:
+        moves: {move_name: raw move dict}
+
+    Returns:
+        {move_name: {'signature', 'start_pose', 'end_pose'}}; moves with fewer
+        than two frames are left out
+    """
+    features = {}
+    for name, move in moves.items():
+        if len(move.get('time', ())) < 2:
+            continue
+        arrays = trajectory_arrays(move)
+        features[name] = {
+            'signature': _signature(arrays),
+            'start_pose': _pose(arrays, 0),
+            'end_pose': _pose(arrays, -1),
+        }
+    return features
+
+
+def similarity_matrix(signatures: np.ndarray) -> np.ndarray:
+    """
+    Pairwise move similarity from trajectory signatures.
+
+    similarity = exp(-(d / w)^2) with d the Euclidean distance between two
+    signatures at their best circular time shift and w = SIMILARITY_WIDTH *
+    median pairwise distance, so identical moves score 1, near-duplicates
+    stay close to 1 and typical unrelated pairs are ~0.
+
+    Args:
+        signatures: (moves, SIGNATURE_SAMPLES * channels) array
+
+    Returns:
+        (moves, moves) float32 matrix, 1 on the diagonal
+    """
+    n = len(signatures)
+    if n == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    x = np.asarray(signatures, dtype=np.float64).reshape(n, SIGNATURE_SAMPLES, -1)
+
+    # Circular cross-correlation of every pair at every shift, summed over channels
+    spectra = np.fft.rfft(x, axis=1).astype(np.complex64)
+    best_alignment = np.empty((n, n))
+    for start in range(0, n, SIMILARITY_BLOCK):
+        block = slice(start, start + SIMILARITY_BLOCK)
+        cross = np.einsum('afc,bfc->abf', spectra[block], np.conj(spectra))
+        best_alignment[block] = np.fft.irfft(cross, n=SIGNATURE_SAMPLES, axis=2).max(axis=2)
+
+    squared = (x * x).sum(axis=(1, 2))
+    distance = np.sqrt(np.maximum(squared[:, None] + squared[None, :] - 2.0 * best_alignment, 0.0))
+    off_diagonal = distance[~np.eye(n, dtype=bool)]
+    width = SIMILARITY_WIDTH * np.median(off_diagonal) if len(off_diagonal) else 1.0
+    similarity = np.exp(-(distance / max(width, 1e-9)) ** 2)
+    np.fill_diagonal(similarity, 1.0)
+    return similarity.astype(np.float32)
+
+
+def transition_matrix(end_poses: np.ndarray, start_poses: np.ndarray) -> np.ndarray:
+    """
+    Cost of every ordered transition between moves.
+
+    Args:
+        end_poses: (moves, POSE_SIZE) final pose of each move
+        start_poses: (moves, POSE_SIZE) first pose of each move
+
+    Returns:
+        (moves, moves) float32 matrix; [a, b] is the cost of playing b right
+        after a (the diagonal is the cost of repeating a move)
+    """
+    end = np.asarray(end_poses, dtype=np.float64).reshape(-1, POSE_SIZE)
+    start = np.asarray(start_poses, dtype=np.float64).reshape(-1, POSE_SIZE)
+
+    # Angle of R_a^T R_b; its trace is the elementwise product sum of R_a and R_b
+    trace = end[:, :9] @ start[:, :9].T
+    rotation = np.arccos(np.clip((trace - 1.0) / 2.0, -1.0, 1.0))
+    translation = np.linalg.norm(end[:, None, 9:12] - start[None, :, 9:12], axis=2)
+    antennas = np.abs(end[:, None, 12:14] - start[None, :, 12:14]).max(axis=2, initial=0.0)
+    yaw = np.abs(np.angle(np.exp(1j * (end[:, None, 14] - start[None, :, 14]))))
+
+    cost = (rotation + TRANSLATION_WEIGHT * translation
+            + ANTENNA_WEIGHT * antennas + BODY_YAW_WEIGHT * yaw)
+    return cost.astype(np.float32)
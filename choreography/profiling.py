@@ -0,0 +1,152 @@
+"""
+Step Profiler for Audio Analysis
+
+Records wall time, CPU time and peak memory for each named step of an
+analysis run. Disabled profilers cost nothing, so analysis code can always
+wrap its steps:
+
+    profiler = StepProfiler(enabled=profile)
+    with profiler.step('rhythm'):
+        bpm, beats, ... = self._extract_rhythm(audio)
+
+Steps may be nested; nested steps are reported as 'outer/inner'. An optional
+on_step callback is told the name of every step as it starts (also when
+measuring is disabled), which is how analysis progress is reported.
+
+Peak memory is tracked with tracemalloc, which sees NumPy buffers and Python
+objects but not allocations made inside Essentia's C++ code. The process
+max-RSS growth during each step is reported alongside to cover those.
+"""
+
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Optional
+
+
+def _max_rss_mb() -> float:
+    """Process high-water resident set size in MB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+class StepProfiler:
+    """Collects per-step timing and memory measurements."""
+
+    def __init__(self, enabled: bool = True, on_step: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled: When False, step() records nothing and report() is empty
+            on_step: Called with the full step name ('outer/inner') when a step starts
+        """
+        self.enabled = enabled
+        self.on_step = on_step
+        self._names: List[str] = []
+        self.records: List[Dict[str, Any]] = []
+        self._stack: List[Dict[str, Any]] = []
+        self._started_tracing = False
+
+    def _ensure_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @contextmanager
+    def step(self, name: str):
+        """Measure the enclosed block as one step."""
+        if self.on_step is not None:
+            self.on_step('/'.join(self._names + [name]))
+
+        if not self.enabled:
+            self._names.append(name)
+            try:
+                yield
+            finally:
+                self._names.pop()
+            return
+
+        self._ensure_tracing()
+        current_before, peak_before = tracemalloc.get_traced_memory()
+        if self._stack:
+            # reset_peak() below would lose the enclosing step's peak so far
+            parent = self._stack[-1]
+            parent['peak_abs'] = max(parent['peak_abs'], peak_before)
+        tracemalloc.reset_peak()
+
+        frame = {
+            'name': '/'.join([f['name'] for f in self._stack] + [name]),
+            'peak_abs': current_before,
+        }
+        self._stack.append(frame)
+        self._names.append(name)
+        # Appended now so nested steps are listed after their parent
+        record = {'step': frame['name']}
+        self.records.append(record)
+        rss_before = _max_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            _, peak_now = tracemalloc.get_traced_memory()
+            self._stack.pop()
+            self._names.pop()
+            peak_abs = max(frame['peak_abs'], peak_now)
+            if self._stack:
+                parent = self._stack[-1]
+                parent['peak_abs'] = max(parent['peak_abs'], peak_abs)
+
+            record.update({
+                'wall_time': wall,
+                'cpu_time': cpu,
+                'peak_memory_mb': max(peak_abs - current_before, 0) / (1024 * 1024),
+                'rss_growth_mb': max(_max_rss_mb() - rss_before, 0.0),
+            })
+
+            if not self._stack and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Get recorded steps in start order (JSON-serializable)."""
+        return [dict(record) for record in self.records]
+
+    def format_table(self) -> str:
+        """Render the recorded steps as a fixed-width text table."""
+        return format_profile_table(self.records)
+
+
+def format_profile_table(records: List[Dict[str, Any]]) -> str:
+    """
+    Render profile records (StepProfiler.report() / analysis['profile']) as a table.
+
+    Percentages are relative to the summed wall time of top-level steps.
+    """
+    if not records:
+        return "(no profile data)"
+
+    total_wall = sum(r['wall_time'] for r in records if '/' not in r['step'])
+    total_cpu = sum(r['cpu_time'] for r in records if '/' not in r['step'])
+    width = max(len('Step'), max(len(r['step']) for r in records))
+
+    lines = [
+        f"{'Step':<{width}}  {'Wall (s)':>9}  {'CPU (s)':>9}  {'Peak MB':>9}  {'RSS +MB':>9}  {'% wall':>7}",
+        "-" * (width + 55),
+    ]
+    for r in records:
+        share = (r['wall_time'] / total_wall * 100) if total_wall > 0 else 0.0
+        lines.append(
+            f"{r['step']:<{width}}  {r['wall_time']:>9.3f}  {r['cpu_time']:>9.3f}  "
+            f"{r['peak_memory_mb']:>9.1f}  {r['rss_growth_mb']:>9.1f}  {share:>6.1f}%"
+        )
+    lines.append("-" * (width + 55))
+    lines.append(f"{'TOTAL':<{width}}  {total_wall:>9.3f}  {total_cpu:>9.3f}")
+    return "\n".join(lines)
@@ -224,6 +224,8 @@ STEP-BY-STEP PROCESS:
      - Per-segment energy levels
      - Spectral characteristics
      - Beat counts
+     - repeat_group per segment, and 'repeat_groups' listing the sections that
+       repeat the same material (e.g. every chorus)
 
 2. ANALYZE EACH SECTION
    For each segment, interpret:
@@ -243,6 +245,8 @@ STEP-BY-STEP PROCESS:
      → Spectral centroid (brightness): High = sharp moves, Low = smooth moves
      → Beat count: More beats = more transitions possible
      → Duration: Longer sections allow more complex sequences
+     → Vocals: get_vocal_sections() / get_instrumental_sections() give time ranges;
+       vocal sections favor EMOTION moves, instrumental sections favor DANCE moves
 
 3. CURATE MOVE PALETTE PER SECTION
    Based on section analysis, choose:
@@ -255,12 +259,30 @@ STEP-BY-STEP PROCESS:
    - Low-energy intro (energy 0.05): Emotion moves, medium-long (6-10s), 2-3 cycles
    - Medium verse (energy 0.15): Emotion moves, short (3-6s), 1-2 cycles
 
-4. SOLVE EACH SECTION SEQUENTIALLY
-   ▶ For each segment in order:
+4. SOLVE THE WHOLE TRACK IN ONE CALL
+   ▶ Call solve_track(segment_plans) with one plan per segment:
+     {segment: index, move_type, energy_range} from your step 3 palettes
+     - Solves every segment exactly in one call, and chains them so no
+       move repeats across a seam and seams transition smoothly
+     - Returns the full sequence plus per-segment results; if it fits, go
+       straight to step 5
+     - For rhythmic music pass align='beat' (or 'bar' for downbeats): every
+       move change then lands on the beat. Keep the entries' start_time
+       fields when submitting; for single segments use
+       solve_duration_constraint(..., align='beat', start_time=segment start)
+   ▶ To rework a single segment (or one listed in 'unsolved'):
      a) Call solve_duration_constraint(segment_duration, move_type)
      b) Solver returns sequences that fit this section's duration
      c) Pick the solution that best matches section's energy/character
+        (on a tie, prefer fewer jarring_transitions; check_transitions(sequence)
+        scores a sequence's pose jumps and suggests smoother swaps)
      d) Append to full choreography sequence
+   ▶ REPEATED SECTIONS: if a segment shares its repeat_group with a segment you
+     already choreographed, do NOT solve it again. Call
+     reuse_section_choreography(previous_sequence, target_segment, variation)
+     - 'none' for a recognizable recurring chorus, 'reverse'/'rotate'/'substitute'
+       to vary it (e.g. a bigger final chorus)
+     - Only solve unique sections; repeats cost one tool call each
 
 5. STOPPING CRITERIA - SUBMIT WHEN DONE
    ✓ All sections have choreography
@@ -282,7 +304,7 @@ CRITICAL RULES
 
 DO:
   ✓ Think about musical expression and character
-  ✓ Use solve_duration_constraint() as PRIMARY tool
+  ✓ Use solve_track() as PRIMARY tool (solve_duration_constraint() per segment to refine)
   ✓ Evaluate multiple solutions for artistic quality
   ✓ Make creative choices based on audio interpretation
   ✓ Consider variety, flow, energy, expression
@@ -746,6 +768,11 @@ the seconds."""
                             self.current_sequence = result['solutions'][0]['sequence']
                             print(f"[ReAct] Updated current_sequence from solver: {len(self.current_sequence)} moves")
 
+                    elif block.name == "solve_track" and result.get('sequence'):
+                        # The joint solution already covers the whole track
+                        self.current_sequence = result['sequence']
+                        print(f"[ReAct] Updated current_sequence from track solver: {len(self.current_sequence)} moves")
+
                     elif block.name == "submit_choreography" and result.get('submitted'):
                         # Store submitted sequence
                         self.current_sequence = result['sequence']
@@ -771,6 +798,8 @@ the seconds."""
                     'bpm': bpm,
                     'sequence': final_sequence
                 }
+                if self.audio_analysis.get('beat_grid'):
+                    choreography['beat_grid'] = self.audio_analysis['beat_grid']
                 print(f"\n[ReAct] Final choreography submitted:")
                 print(f"  Moves: {len(final_sequence)}")
                 print(f"  Duration: {validation['actual_duration']:.1f}s (target: {target_duration:.1f}s)")
@@ -803,6 +832,8 @@ the seconds."""
                 'bpm': bpm,
                 'sequence': final_sequence
             }
+            if self.audio_analysis.get('beat_grid'):
+                choreography['beat_grid'] = self.audio_analysis['beat_grid']
             validation = self.tools.validate_duration(final_sequence, target_duration)
             print(f"\n[ReAct] Final choreography:")
             print(f"  Moves: {len(final_sequence)}")
@@ -825,11 +856,13 @@ the seconds."""
         # Priority:
         # 1. Last submit_choreography call
         # 2. Last validate_duration call
-        # 3. Last solve_duration_constraint solution
-        # 4. self.current_sequence as fallback
+        # 3. Last solve_track solution (whole track)
+        # 4. Last solve_duration_constraint solution
+        # 5. self.current_sequence as fallback
 
         last_submit_sequence = None
         last_validated_sequence = None
+        last_track_sequence = None
         last_solver_sequence = None
 
         # Scan backwards through conversation
@@ -849,6 +882,10 @@ the seconds."""
                             # Check for validate_duration (we need to find the sequence from assistant message)
                             # This is harder - validation doesn't return the sequence
 
+                            # Check for solve_track results (whole-track sequence)
+                            if result.get('segments') and result.get('sequence') and not last_track_sequence:
+                                last_track_sequence = result['sequence']
+
                             # Check for solve_duration_constraint solutions
                             if result.get('solutions') and not last_solver_sequence:
                                 if result['solutions']:
@@ -868,6 +905,10 @@ the seconds."""
             print(f"[ReAct] Extracted sequence from submit_choreography: {len(last_submit_sequence)} moves")
             return last_submit_sequence
 
+        if last_track_sequence:
+            print(f"[ReAct] Extracted sequence from solve_track: {len(last_track_sequence)} moves")
+            return last_track_sequence
+
         if last_solver_sequence:
             print(f"[ReAct] Extracted sequence from solve_duration_constraint: {len(last_solver_sequence)} moves")
             return last_solver_sequence
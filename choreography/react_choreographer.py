@@ -29,11 +29,14 @@ def load_audio_analysis(analysis_path: str) -> dict:
         return json.load(f)
 
 
-def analyze_audio(audio_path: str) -> dict:
-    """Analyze audio file and return analysis dict."""
+def analyze_audio(audio_path: str, profile: bool = False,
+                  start: float = None, end: float = None,
+                  chunk_duration: float = None) -> dict:
+    """Analyze audio file (or the [start, end) window of it) and return analysis dict."""
     print(f"[CLI] Analyzing audio file: {audio_path}")
     analyzer = AudioAnalyzer()
-    analysis = analyzer.analyze(audio_path)
+    analysis = analyzer.analyze(audio_path, profile=profile, start=start, end=end,
+                                chunk_duration=chunk_duration)
 
     if analysis is None:
         raise ValueError(f"Failed to analyze audio file: {audio_path}")
@@ -63,6 +66,15 @@ Examples:
 
   # Specify max iterations
   python react_choreographer.py --audio audio.wav --output choreo.json --max-iterations 30
+
+  # Choreograph minutes 12-15 of a long mix (only that window is decoded)
+  python react_choreographer.py --audio dj_set.flac --start 720 --end 900 --output choreo.json
+
+  # Analyze a very long file in 60s chunks (memory does not grow with length)
+  python react_choreographer.py --audio dj_set.flac --chunk-duration 60 --output choreo.json
+
+  # Print per-step timing/memory of the audio analysis
+  python react_choreographer.py --audio audio.wav --output choreo.json --profile
         """
     )
 
@@ -76,6 +88,14 @@ Examples:
                        help='Maximum ReAct iterations (default: 20)')
     parser.add_argument('--save-analysis', type=str,
                        help='Save audio analysis to this path (optional)')
+    parser.add_argument('--start', type=float,
+                       help='Analyze audio from this time in seconds (with --audio)')
+    parser.add_argument('--end', type=float,
+                       help='Analyze audio up to this time in seconds (with --audio)')
+    parser.add_argument('--chunk-duration', type=float,
+                       help='Stream the audio in chunks of this many seconds (bounded memory)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile each audio analysis step (time and memory)')
 
     args = parser.parse_args()
 
@@ -86,12 +106,20 @@ Examples:
     if args.audio and args.analysis:
         parser.error("Cannot specify both --audio and --analysis")
 
+    if args.profile and not args.audio:
+        parser.error("--profile requires --audio")
+
+    if (args.start is not None or args.end is not None) and not args.audio:
+        parser.error("--start/--end require --audio")
+
     try:
         # Get audio analysis
         if args.analysis:
             analysis = load_audio_analysis(args.analysis)
         else:
-            analysis = analyze_audio(args.audio)
+            analysis = analyze_audio(args.audio, profile=args.profile,
+                                     start=args.start, end=args.end,
+                                     chunk_duration=args.chunk_duration)
 
             # Save analysis if requested
             if args.save_analysis:
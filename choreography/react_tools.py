@@ -6,8 +6,43 @@ Each tool is designed to provide precise, actionable information.
 """
 
 import json
-from typing import List, Dict, Any, Optional
-from .move_metadata_cache import load_cache, get_move_duration as _get_move_duration
+import math
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from .move_catalog import JARRING_TRANSITION
+from .move_metadata_cache import get_catalog, get_move_duration as _get_move_duration
+from .move_trajectories import DESCRIPTOR_FIELDS, BEAT_FIELDS
+from .feature_store import FeatureStore
+from .beat_grid import BeatGrid
+from . import duration_solver
+
+# Moves at least this similar are reported as alternatives by get_move_info
+SIMILAR_MOVE_THRESHOLD = 0.5
+
+# solve_track: candidate solutions kept per segment, and the seam costs (in
+# seconds of fit error, like the solver costs) between consecutive segments
+SEGMENT_CANDIDATES = 5
+SEAM_REPEAT_PENALTY = 1000.0   # same move on both sides of a seam: only if unavoidable
+SHARED_MOVE_COST = 0.2         # per move used in both neighbouring segments
+SEAM_TRANSITION_WEIGHT = 1.0   # per unit of transition cost across the seam
+
+# Solver alignment modes: total seconds only, every move boundary on a beat,
+# or every move boundary on a downbeat
+ALIGN_MODES = ('none', 'beat', 'bar')
+
+# Fewest moves an energy_range filter may leave before solve_track ignores it
+MIN_ENERGY_POOL = 4
+
+# Allowed duration difference of the replacements check_transitions suggests
+REPLACEMENT_DURATION_TOLERANCE = 0.5
+
+# energy_range -> motion_energy bounds (0-1 rank from the cached trajectory descriptors)
+MOTION_ENERGY_RANGES = {
+    'low': (0.0, 0.4),
+    'moderate': (0.4, 0.7),
+    'high': (0.7, 1.0),
+}
 
 
 class ChoreographyTools:
@@ -21,7 +56,10 @@ class ChoreographyTools:
             audio_analysis: Full audio analysis dict from AudioAnalyzer
         """
         self.audio_analysis = audio_analysis
-        self.move_metadata = load_cache()
+        # Shared, parsed-once catalog; this instance keeps the version current at creation
+        self.move_metadata = get_catalog()
+        self.frame_features = FeatureStore.from_analysis(audio_analysis)
+        self.beat_grid = BeatGrid.from_analysis(audio_analysis)
         print(f"[Tools] Loaded {len(self.move_metadata)} moves from cache")
 
     def get_move_duration(self, move_name: str) -> Optional[float]:
@@ -44,26 +82,55 @@ class ChoreographyTools:
         Calculate the total duration of a choreography sequence using actual SDK durations.
 
         Args:
-            sequence: List of moves, each dict with 'move' (name) and optional 'cycles'
+            sequence: List of moves, each dict with 'move' (name), optional 'cycles'
+                and optional 'start_time' (beat-aligned solutions; the move starts
+                there, cutting or holding the previous one)
 
         Returns:
             Total duration in seconds
         """
-        total = 0.0
-        for move_info in sequence:
+        total, _ = self._sequence_timeline(sequence)
+        return total
+
+    def _sequence_timeline(self, sequence: List[Dict[str, Any]]) -> Tuple[float, Optional[str]]:
+        """
+        Play the sequence forward the way Choreography._prepare_sequence does.
+
+        Every cycle starts where the previous one ends, unless its entry has a
+        'start_time': that must come after the start of the previous cycle (of
+        any entry, aligned or not), which is cut at it or holds until it.
+
+        Returns:
+            (total duration in seconds, why the player would reject the
+            sequence or None). The duration stops at the first rejected entry.
+        """
+        current_time = 0.0
+        previous_start = None
+        for index, move_info in enumerate(sequence):
             move_name = move_info.get('move') or move_info.get('move_name')
 
             # Skip manual moves (they have variable duration)
             if move_name == 'manual' or move_name is None:
                 continue
 
-            cycles = move_info.get('cycles', 1)
+            if move_info.get('start_time') is not None:
+                start_time = float(move_info['start_time'])
+                if start_time < 0 or (previous_start is not None and start_time <= previous_start):
+                    return current_time, (
+                        f"Entry {index} ({move_name}) starts at {start_time:.3f}s, not after the "
+                        f"start of the previous move cycle ({previous_start or 0.0:.3f}s). "
+                        f"Solve each segment with its own start_time and concatenate them in order")
+                current_time = start_time
+
             duration = self.get_move_duration(move_name)
+            if duration is None:
+                continue
 
-            if duration is not None:
-                total += duration * cycles
+            for _ in range(move_info.get('cycles', 1)):
+                previous_start = current_time
+                current_time += duration
 
-        return total
+        return current_time, None
 
     def get_moves_by_duration(self, min_dur: float, max_dur: float) -> List[str]:
         """
@@ -76,12 +143,7 @@ class ChoreographyTools:
         Returns:
             List of move names that fall within the duration range
         """
-        matching_moves = []
-        for move_name, data in self.move_metadata.items():
-            if min_dur <= data['duration'] <= max_dur:
-                matching_moves.append(move_name)
-
-        return matching_moves
+        return self.move_metadata.names_in_range(min_dur, max_dur)
 
     def get_moves_by_type(self, move_type: str) -> List[str]:
         """
@@ -93,8 +155,7 @@ class ChoreographyTools:
         Returns:
             List of move names of the specified type
         """
-        return [name for name, data in self.move_metadata.items()
-                if data['type'] == move_type]
+        return self.move_metadata.names_by_type(move_type)
 
     def get_move_info(self, move_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -110,7 +171,9 @@ class ChoreographyTools:
                 'type': str ('dance' or 'emotion'),
                 'library': str ('dances' or 'emotions'),
                 'duration_category': str ('short', 'medium', 'long'),
-                'exists': bool
+                'exists': bool,
+                'motion': dict (trajectory descriptors, beats and motion_energy, if cached),
+                'similar_moves': list of {'move', 'similarity'} (if the similarity matrix is cached)
             } or None if move doesn't exist
         """
         if move_name not in self.move_metadata:
@@ -140,7 +203,7 @@ class ChoreographyTools:
             else:
                 category = 'long'
 
-        return {
+        info = {
             'exists': True,
             'name': move_name,
             'duration': duration,
@@ -148,8 +211,16 @@ class ChoreographyTools:
             'library': data['library'],
             'duration_category': category
         }
-
-    def get_music_structure(self) -> Dict[str, Any]:
+        motion = {field: data[field] for field in DESCRIPTOR_FIELDS + BEAT_FIELDS + ('motion_energy',)
+                  if field in data}
+        if motion:
+            info['motion'] = motion
+        similar = self.move_metadata.most_similar(move_name, k=3, min_similarity=SIMILAR_MOVE_THRESHOLD)
+        if similar:
+            info['similar_moves'] = [{'move': name, 'similarity': round(score, 3)} for name, score in similar]
+        return info
+
+    def get_music_structure(self, level: str = 'section') -> Dict[str, Any]:
         """
         Get the music structure analysis with labeled segments.
 
@@ -157,11 +228,22 @@ class ChoreographyTools:
         choreography planning. Use this to understand the song's structure before
         creating choreography.
 
+        Args:
+            level: 'section' (default), 'phrase' (4 bars) or 'bar'. Finer levels
+                come from the precomputed structure tree; their nodes carry the
+                section's label plus 'parent' (index into the next coarser level)
+
         Returns:
             {
                 'total_duration': float,  # Total track duration in seconds
+                'offset': float,  # File time of the analyzed window start (0 for whole tracks)
                 'bpm': float,  # Global BPM
+                'level': str,  # Level of the returned segments
                 'total_segments': int,  # Number of segments
+                'repeat_groups': [  # Sections that repeat the same material (2+ occurrences)
+                    {'repeat_group': int, 'label': str, 'segments': [int, ...]},  # Section indices
+                    ...
+                ],
                 'segments': [
                     {
                         'label': str,  # 'intro', 'verse', 'chorus', 'bridge', 'outro'
@@ -171,7 +253,8 @@ class ChoreographyTools:
                         'energy': float,  # RMS energy (0.0-1.0+)
                         'spectral_centroid': float,  # Brightness in Hz
                         'spectral_rolloff': float,  # Frequency content in Hz
-                        'beats_count': int  # Number of beats in segment
+                        'beats_count': int,  # Number of beats in segment
+                        'repeat_group': int  # Same id = repeated material (e.g. every chorus)
                     },
                     ...
                 ]
@@ -185,14 +268,205 @@ class ChoreographyTools:
                     ...
         """
         segments = self.audio_analysis.get('segments', [])
+        tree = self.audio_analysis.get('structure_tree')
+
+        if level != 'section':
+            if level not in ('phrase', 'bar'):
+                return {'error': f"Unknown level '{level}' (use 'section', 'phrase' or 'bar')"}
+            if not tree:
+                # Older analyses have no tree; sections are the finest level available
+                level = 'section'
+            else:
+                segments = tree['levels'][level]
 
         return {
             'total_duration': self.audio_analysis.get('duration', 0.0),
+            'offset': self.audio_analysis.get('offset', 0.0),
             'bpm': self.audio_analysis.get('bpm', 0.0),
+            'level': level,
             'total_segments': len(segments),
+            'repeat_groups': self._repeat_groups(),
             'segments': segments
         }
 
+    def _repeat_groups(self) -> List[Dict[str, Any]]:
+        """Section indices of every repeat group with more than one occurrence."""
+        members = {}
+        for i, segment in enumerate(self.audio_analysis.get('segments', [])):
+            group = segment.get('repeat_group')
+            if group is not None:
+                members.setdefault(group, []).append(i)
+
+        segments = self.audio_analysis.get('segments', [])
+        return [{'repeat_group': group, 'label': segments[indices[0]].get('label'), 'segments': indices}
+                for group, indices in members.items() if len(indices) > 1]
+
+    def reuse_section_choreography(
+        self,
+        sequence: List[Dict[str, Any]],
+        target_segment: int,
+        variation: str = 'none',
+        tolerance: float = 1.5
+    ) -> Dict[str, Any]:
+        """
+        Reuse the choreography of an already-solved section for a repeat of it.
+
+        Repeats (same 'repeat_group') rarely have identical lengths, so after
+        the optional variation the cycle counts are adjusted to fit the target
+        segment: extra cycles are removed from the longest repeated moves (then
+        trailing moves dropped, always keeping the first) or added where they best fill the gap, with a
+        same-type filler move appended only if no cycle fits. No solver search
+        is run.
+
+        Args:
+            sequence: Choreography used for the earlier occurrence
+            target_segment: Index of the segment to fill (from get_music_structure)
+            variation: 'none' (same moves), 'reverse' (reversed order), 'rotate'
+                (start from the second move), or 'substitute' (each move swapped
+                for the unused move of the same type with the closest duration)
+            tolerance: Acceptable error in seconds
+
+        Returns:
+            {
+                'sequence': [...],
+                'duration': float,
+                'target_duration': float,
+                'error': float,
+                'fits': bool,  # Within tolerance
+                'variation': str,
+                'is_repeat': bool  # False if the target segment repeats no other section
+            }
+        """
+        segments = self.audio_analysis.get('segments', [])
+        target_segment = int(target_segment)
+        if not 0 <= target_segment < len(segments):
+            return {'error': f'Segment {target_segment} does not exist ({len(segments)} segments)'}
+        if variation not in ('none', 'reverse', 'rotate', 'substitute'):
+            return {'error': f"Unknown variation '{variation}'"}
+
+        moves = [dict(entry) for entry in sequence
+                 if self.get_move_duration(entry.get('move') or entry.get('move_name') or '') is not None]
+        if not moves:
+            return {'error': 'Sequence has no known moves'}
+
+        if variation == 'reverse':
+            moves.reverse()
+        elif variation == 'rotate':
+            moves = moves[1:] + moves[:1]
+        elif variation == 'substitute':
+            moves = self._substitute_moves(moves)
+
+        target = float(segments[target_segment]['duration'])
+        moves = self._fit_cycles(moves, target, tolerance)
+        duration = self.calculate_sequence_duration(moves)
+
+        group = segments[target_segment].get('repeat_group')
+        is_repeat = any(g['repeat_group'] == group for g in self._repeat_groups())
+
+        return {
+            'sequence': moves,
+            'duration': duration,
+            'target_duration': target,
+            'error': abs(duration - target),
+            'fits': abs(duration - target) <= tolerance,
+            'variation': variation,
+            'is_repeat': is_repeat
+        }
+
+    def _substitute_moves(self, moves: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Swap each move for the closest-duration unused move of the same type."""
+        used = {entry.get('move') or entry.get('move_name') for entry in moves}
+        result = []
+        for entry in moves:
+            name = entry.get('move') or entry.get('move_name')
+            info = self.move_metadata[name]
+            closest = self.move_metadata.nearest(info['duration'], 1, info['type'], exclude=used)
+            if closest:
+                name = closest[0]
+                used.add(name)
+            result.append({'move': name, 'cycles': entry.get('cycles', 1)})
+        return result
+
+    def _fit_cycles(self, moves: List[Dict[str, Any]], target: float,
+                    tolerance: float) -> List[Dict[str, Any]]:
+        """
+        Adjust cycle counts (and drop trailing moves) until the sequence fits
+        target. The first move is always kept, so a too-long sequence can end
+        up as one move that still does not fit.
+        """
+        moves = [{'move': entry.get('move') or entry.get('move_name'),
+                  'cycles': int(entry.get('cycles', 1))} for entry in moves]
+        durations = [self.get_move_duration(entry['move']) for entry in moves]
+        total = sum(d * entry['cycles'] for d, entry in zip(durations, moves))
+
+        # Too long: remove cycles from the longest repeated move, then trailing moves
+        while total > target + tolerance:
+            repeated = [i for i, entry in enumerate(moves) if entry['cycles'] > 1]
+            if repeated:
+                i = max(repeated, key=lambda k: durations[k])
+                moves[i]['cycles'] -= 1
+                total -= durations[i]
+            elif len(moves) > 1:
+                total -= durations.pop() * moves.pop()['cycles']
+            else:
+                break
+
+        # Too short: add a cycle of the move that best fills the gap, or append
+        # an unused move of the same type(s) if that fills it clearly better
+        types = {self.move_metadata[entry['move']]['type'] for entry in moves}
+        while total < target - tolerance:
+            gap = target - total
+            options = [(abs(d - gap), i, None) for i, d in enumerate(durations) if d <= gap + tolerance]
+            # New moves pay a small penalty so the repeat stays recognizable
+            used = {entry['move'] for entry in moves}
+            for move_type in types:
+                for name in self.move_metadata.nearest(gap, 1, move_type, max_duration=gap + tolerance,
+                                                       exclude=used):
+                    options.append((abs(self.move_metadata.duration(name) - gap) + 0.25, len(moves), name))
+            if not options:
+                break
+            _, i, name = min(options, key=lambda option: option[0])
+            if name is None:
+                moves[i]['cycles'] += 1
+            else:
+                moves.append({'move': name, 'cycles': 1})
+                durations.append(float(self.move_metadata[name]['duration']))
+            total += durations[i]
+
+        return moves
+
+    def get_section_features(self, start: float, end: float) -> Dict[str, Any]:
+        """
+        Get frame-level audio features aggregated over a time range.
+
+        Answers per-section questions (how loud, how bright, how percussive,
+        how melodic is 45s-60s?) from the precomputed frame features without
+        re-analyzing the audio.
+
+        Args:
+            start: Range start in seconds
+            end: Range end in seconds
+
+        Returns:
+            {
+                'start': float,
+                'end': float,
+                'frames': int,
+                'features': {
+                    'energy': {'mean', 'std', 'min', 'max'},  # Frame RMS
+                    'centroid': {...},  # Brightness in Hz
+                    'pitch_salience': {...},  # Pitched/melodic content (0-1)
+                    'percussive_ratio': {...}  # Percussive share of energy (0-1)
+                }
+            }
+        """
+        if self.frame_features is None:
+            return {'error': 'No frame-level features in this analysis (re-run AudioAnalyzer)'}
+        if end <= start:
+            return {'error': f'Invalid range: end ({end}) must be after start ({start})'}
+
+        return self.frame_features.range(start, end)
+
     def suggest_moves_for_context(
         self,
         bpm_range: Optional[str] = None,
@@ -223,12 +497,9 @@ class ChoreographyTools:
         bpm = self.audio_analysis.get('bpm', 120)
         energy = self.audio_analysis.get('energy', 0.5)
 
-        # Filter moves by type
-        candidate_moves = []
-        for name, data in self.move_metadata.items():
-            if move_type and data['type'] != move_type:
-                continue
-            candidate_moves.append((name, data))
+        # Filter moves by type (catalog order: shortest first)
+        candidate_moves = [(name, self.move_metadata[name])
+                           for name in self.move_metadata.sorted_moves(move_type or None)[0]]
 
         # BPM-based filtering
         if bpm_range:
@@ -249,7 +520,18 @@ class ChoreographyTools:
             rationale = "General choreography context"
 
         # Energy-based filtering and sorting
-        if energy_range:
+        if energy_range in MOTION_ENERGY_RANGES and self.move_metadata.has_field('motion_energy'):
+            # Measured from the move trajectories (see move_trajectories.py)
+            low, high = MOTION_ENERGY_RANGES[energy_range]
+            allowed = set(self.move_metadata.names_where('motion_energy', low, high, move_type or None))
+            candidate_moves = [(n, d) for n, d in candidate_moves if n in allowed]
+            rationale += {
+                'low': ", low energy suits subtle movements",
+                'moderate': ", moderate energy allows expressive variety",
+                'high': ", high energy needs dynamic, vigorous moves",
+            }[energy_range]
+        elif energy_range:
+            # No descriptors in the cache: fall back to known calm/energetic moves
             if energy_range == "low":
                 # Prefer dance moves for precision, or calm emotion moves
                 if move_type != "emotion":
@@ -309,15 +591,16 @@ class ChoreographyTools:
                 'target_duration': float,
                 'difference': float,
                 'too_long': bool,
-                'too_short': bool
+                'too_short': bool,
+                'start_time_error': str  # Only if the player would reject a start_time
             }
         """
-        actual = self.calculate_sequence_duration(sequence)
+        actual, start_time_error = self._sequence_timeline(sequence)
         diff = actual - target_duration
         abs_diff = abs(diff)
 
-        return {
-            'valid': abs_diff <= threshold,
+        result = {
+            'valid': abs_diff <= threshold and start_time_error is None,
             'actual_duration': actual,
             'target_duration': target_duration,
             'difference': diff,
@@ -325,22 +608,41 @@ class ChoreographyTools:
             'too_short': diff < -threshold,
             'percent_off': (abs_diff / target_duration * 100) if target_duration > 0 else 0
         }
+        if start_time_error:
+            result['start_time_error'] = start_time_error
+        return result
+
+    def _section_characteristics(self, start: float, end: float) -> Dict[str, float]:
+        """Mean frame features for a time range, or {} if the analysis has none."""
+        if self.frame_features is None:
+            return {}
+        features = self.frame_features.range(start, end, aggregations=('mean',))['features']
+        percussive = features['percussive_ratio']['mean']
+        return {
+            'energy': features['energy']['mean'],
+            'harmonic_ratio': 1.0 - percussive,
+            'percussive_ratio': percussive,
+            'melodic_content': features['pitch_salience']['mean'],
+        }
 
     def get_vocal_sections(self) -> List[Dict[str, Any]]:
         """
         Identify sections of the audio with strong vocal content.
 
+        Sections come from the time-resolved vocal detection in the analysis
+        (frame-wise pitch salience + harmonic ratio, hysteresis-smoothed).
+
         Returns:
             List of sections: [{start: float, end: float, vocal_prob: float, characteristics: dict}]
         """
-        vocal_prob = self.audio_analysis.get('vocal_instrumental', {}).get('vocal_probability', 0.5)
-
-        # For MVP, treat entire audio as one section
-        # TODO: Implement actual segmentation based on time-series vocal detection
+        vocal_info = self.audio_analysis.get('vocal_instrumental', {})
+        vocal_prob = vocal_info.get('vocal_probability', 0.5)
         duration = self.audio_analysis['duration']
 
-        if vocal_prob > 0.7:
-            # Strong vocals throughout
+        if 'vocal_sections' not in vocal_info:
+            # Older analysis without time-resolved sections: whole track or nothing
+            if vocal_prob <= 0.7:
+                return []
             return [{
                 'start': 0.0,
                 'end': duration,
@@ -350,8 +652,13 @@ class ChoreographyTools:
                     'melodic_content': self.audio_analysis.get('pitch_content', {}).get('melodic_content', 0.5)
                 }
             }]
-        else:
-            return []
+
+        return [{
+            'start': section['start'],
+            'end': section['end'],
+            'vocal_prob': section['vocal_prob'],
+            'characteristics': self._section_characteristics(section['start'], section['end'])
+        } for section in vocal_info['vocal_sections']]
 
     def get_instrumental_sections(self) -> List[Dict[str, Any]]:
         """
@@ -360,11 +667,14 @@ class ChoreographyTools:
         Returns:
             List of sections: [{start: float, end: float, energy: float, percussive_ratio: float}]
         """
-        vocal_prob = self.audio_analysis.get('vocal_instrumental', {}).get('vocal_probability', 0.5)
+        vocal_info = self.audio_analysis.get('vocal_instrumental', {})
+        vocal_prob = vocal_info.get('vocal_probability', 0.5)
         duration = self.audio_analysis['duration']
 
-        if vocal_prob < 0.3:
-            # Strongly instrumental
+        if 'instrumental_sections' not in vocal_info:
+            # Older analysis without time-resolved sections: whole track or nothing
+            if vocal_prob >= 0.3:
+                return []
             return [{
                 'start': 0.0,
                 'end': duration,
@@ -372,8 +682,18 @@ class ChoreographyTools:
                 'percussive_ratio': self.audio_analysis.get('harmonic_percussive', {}).get('percussive_ratio', 0.5),
                 'bpm': self.audio_analysis['bpm']
             }]
-        else:
-            return []
+
+        sections = []
+        for section in vocal_info['instrumental_sections']:
+            characteristics = self._section_characteristics(section['start'], section['end'])
+            sections.append({
+                'start': section['start'],
+                'end': section['end'],
+                'energy': characteristics.get('energy', self.audio_analysis['energy']),
+                'percussive_ratio': characteristics.get('percussive_ratio', 0.5),
+                'bpm': self.audio_analysis['bpm']
+            })
+        return sections
 
     def get_audio_duration(self) -> float:
         """Get the actual content duration of the audio (excluding silent padding)."""
@@ -388,34 +708,55 @@ class ChoreographyTools:
         return float(self.audio_analysis['energy'])
 
     def is_vocal_content(self) -> bool:
-        """Determine if the audio has significant vocal content."""
-        vocal_prob = self.audio_analysis.get('vocal_instrumental', {}).get('vocal_probability', 0.5)
-        return vocal_prob > 0.7
+        """Determine if the audio has significant vocal content (vocals cover at least half the track)."""
+        vocal_info = self.audio_analysis.get('vocal_instrumental', {})
+        vocal_prob = vocal_info.get('vocal_probability', 0.5)
+        threshold = 0.5 if 'vocal_sections' in vocal_info else 0.7
+        return vocal_prob > threshold
 
     def is_instrumental_content(self) -> bool:
-        """Determine if the audio is primarily instrumental."""
-        vocal_prob = self.audio_analysis.get('vocal_instrumental', {}).get('vocal_probability', 0.5)
-        return vocal_prob < 0.3
+        """Determine if the audio is primarily instrumental (vocals cover under a fifth of the track)."""
+        vocal_info = self.audio_analysis.get('vocal_instrumental', {})
+        vocal_prob = vocal_info.get('vocal_probability', 0.5)
+        threshold = 0.2 if 'vocal_sections' in vocal_info else 0.3
+        return vocal_prob < threshold
 
     def solve_duration_constraint(
         self,
         target_duration: float,
         move_type: str | None = None,
         tolerance: float = 1.5,
-        num_solutions: int = 3
+        num_solutions: int = 3,
+        align: str = 'none',
+        start_time: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Solve the duration constraint by finding valid move combinations.
 
         This tool handles the combinatorial optimization so the LLM can focus on
-        creative decisions. It generates multiple valid sequences that fit the
-        duration constraint.
+        creative decisions. It returns the best move combinations that fit the
+        duration constraint, found exactly (see duration_solver): if none is
+        returned, no combination of distinct moves with 1-3 cycles fits.
+        Results are deterministic, and each solution's moves are ordered for
+        smooth transitions when transition costs are cached.
+
+        With align='beat' or 'bar' the solver works on the track's beat grid
+        instead (duration_solver.solve_beats): the window starting at
+        start_time is snapped to beats (downbeats), every move boundary lands
+        on one, and solutions are ranked by misalignment - how far each
+        move's own length is from the beats it spans. Entries then carry
+        'beats' and 'start_time' (seconds from the choreography start), and
+        the player starts each move exactly there.
 
         Args:
             target_duration: Target duration in seconds
             move_type: Optional filter - "dance" or "emotion" or None for both
-            tolerance: Acceptable error in seconds (default 1.5s)
+            tolerance: Acceptable error in seconds (default 1.5s; aligned
+                solutions always end on the window's last beat)
             num_solutions: Number of different solutions to return (default 3)
+            align: 'none' (default), 'beat' or 'bar'
+            start_time: Track time the window starts at (aligned modes; default
+                the start of the analyzed audio)
 
         Returns:
             {
@@ -424,7 +765,10 @@ class ChoreographyTools:
                         'sequence': [{'move': 'name', 'cycles': 1}, ...],
                         'duration': float,
                         'move_count': int,
-                        'variety_score': float
+                        'variety_score': float (0-1, penalizes repeated and similar moves),
+                        'max_transition': float or None (worst transition cost, if cached),
+                        'jarring_transitions': int (transitions above JARRING_TRANSITION),
+                        'misalignment': float (aligned only: summed seconds off the beats)
                     },
                     ...
                 ],
@@ -432,81 +776,368 @@ class ChoreographyTools:
                 'tolerance': float
             }
         """
-        import random
+        # Moves of the requested type, sorted by duration (catalog index)
+        names, durations = self.move_metadata.sorted_moves(move_type)
 
-        # Filter moves by type if requested
-        available_moves = []
-        for name, data in self.move_metadata.items():
-            if move_type is None or data['type'] == move_type:
-                available_moves.append((name, data['duration']))
-
-        if not available_moves:
+        if len(names) == 0:
             return {'error': f'No moves found for type={move_type}'}
 
-        # Sort by duration for greedy algorithm
-        available_moves.sort(key=lambda x: x[1])
+        if align != 'none':
+            if align not in ALIGN_MODES:
+                return {'error': f"Unknown align '{align}' (use {', '.join(ALIGN_MODES)})"}
+            if self.beat_grid is None:
+                return {'error': 'No beat grid in the audio analysis; use align=none'}
+            start = self.audio_analysis.get('offset', 0.0) if start_time is None else float(start_time)
+            solutions = [self._format_solution([entry['move'] for entry in sequence],
+                                               [entry['cycles'] for entry in sequence],
+                                               duration, target_duration, sequence=sequence,
+                                               misalignment=misalignment)
+                         for sequence, duration, misalignment, _ in
+                         self._beat_solutions(names, durations, start, target_duration, align, int(num_solutions))]
+            response = {
+                'solutions': solutions,
+                'target_duration': target_duration,
+                'align': align,
+                'found': len(solutions)
+            }
+            if not solutions:
+                response['message'] = (f'No combination of {move_type or "any"} moves fills '
+                                       f'{target_duration:.1f}s from {start:.1f}s {align} by {align}')
+            return response
+
+        solutions = [self._format_solution([names[i] for i, _ in result['entries']],
+                                           [cycles for _, cycles in result['entries']],
+                                           result['duration'], target_duration)
+                     for result in duration_solver.solve(durations, target_duration, tolerance,
+                                                         k=int(num_solutions))]
+
+        response = {
+            'solutions': solutions,
+            'target_duration': target_duration,
+            'tolerance': tolerance,
+            'found': len(solutions)
+        }
+        if not solutions:
+            response['message'] = (f'No combination of {move_type or "any"} moves fits '
+                                   f'{target_duration:.1f}s ± {tolerance:.1f}s')
+        return response
 
+    def solve_track(
+        self,
+        segment_plans: Optional[List[Dict[str, Any]]] = None,
+        tolerance: float = 1.5,
+        level: str = 'section',
+        align: str = 'none'
+    ) -> Dict[str, Any]:
+        """
+        Solve every segment of the track in one call, jointly across the seams.
+
+        Each segment is solved with the exact duration solver against its own
+        move pool (move type, optionally narrowed to an energy range), one
+        after the other (each solve takes milliseconds); identical (pool,
+        duration) pairs such as equal-length choruses are solved once.
+        A Viterbi pass over the segments then picks one candidate per segment
+        (each candidate also in reversed order) minimizing the candidates'
+        own costs plus the seam costs: never the same move on both sides of a
+        seam unless no candidate pair avoids it, few moves shared between
+        neighbouring segments, and smooth transitions across the seam.
+
+        Args:
+            segment_plans: [{'segment': int (index in get_music_structure(level)),
+                'move_type': 'dance'/'emotion'/None, 'energy_range':
+                'low'/'moderate'/'high'/None}, ...]; segments without a plan
+                use all moves. None = every segment, no preferences
+            tolerance: Acceptable error per segment in seconds
+            level: Segmentation level the indices refer to ('section', 'phrase', 'bar')
+            align: 'none', or 'beat'/'bar' to solve every segment on the beat
+                grid (see solve_duration_constraint); entries then carry
+                'beats' and 'start_time'
+
+        Returns:
+            {
+                'sequence': [{'move', 'cycles', 'segment'}, ...],  # whole track, in order
+                'segments': [{'segment', 'label', 'start', 'end', 'target_duration',
+                              'duration', 'error', 'move_type', 'energy_range',
+                              'sequence'}, ...],
+                'total_duration': float,
+                'target_duration': float,
+                'seam_repeats': int,  # seams with the same move on both sides
+                'max_transition': float or None,
+                'jarring_transitions': int,
+                'unsolved': [segment indices with no fitting combination]
+            }
+        """
+        structure = self.get_music_structure(level)
+        if 'error' in structure:
+            return structure
+        segments = structure['segments']
+        if not segments:
+            return {'error': 'No segments in the music structure'}
+        if align not in ALIGN_MODES:
+            return {'error': f"Unknown align '{align}' (use {', '.join(ALIGN_MODES)})"}
+        if align != 'none' and self.beat_grid is None:
+            return {'error': 'No beat grid in the audio analysis; use align=none'}
+
+        plans = {int(plan['segment']): plan for plan in (segment_plans or [])
+                 if 0 <= int(plan.get('segment', -1)) < len(segments)}
+        jobs = []
+        for index, segment in enumerate(segments):
+            plan = plans.get(index, {})
+            pool = self._segment_pool(plan.get('move_type'), plan.get('energy_range'))
+            target = float(segment.get('duration', segment['end'] - segment['start']))
+            jobs.append((index, plan, pool, target))
+
+        # Solve each distinct (pool, duration) once; aligned solutions also
+        # depend on where the segment sits on the beat grid
+        def key(index, pool, target):
+            start = segments[index]['start'] if align != 'none' else None
+            return tuple(pool), round(target, 2), start
+
+        candidates = {}
+        for index, _, pool, target in jobs:
+            k = key(index, pool, target)
+            if k not in candidates:
+                candidates[k] = self._segment_candidates(pool, target, tolerance, k[2], align)
+
+        solved = [(index, candidates[key(index, pool, target)]) for index, _, pool, target in jobs]
+        choice = self._choose_across_seams([options for _, options in solved if options])
+
+        track_sequence = []
+        segment_results = []
+        picked = iter(choice)
+        for (index, plan, _, target), (_, options) in zip(jobs, solved):
+            segment = segments[index]
+            sequence, duration = next(picked) if options else ([], 0.0)
+            track_sequence.extend(dict(entry, segment=index) for entry in sequence)
+            segment_results.append({
+                'segment': index,
+                'label': segment.get('label'),
+                'start': segment.get('start'),
+                'end': segment.get('end'),
+                'target_duration': target,
+                'duration': duration,
+                'error': abs(duration - target),
+                'move_type': plan.get('move_type'),
+                'energy_range': plan.get('energy_range'),
+                'sequence': sequence,
+            })
+
+        played = self._played_moves(track_sequence)
+        costs = [cost for cost in self.move_metadata.chain_costs(played) if cost is not None]
+        ends = [result['sequence'] for result in segment_results if result['sequence']]
+        return {
+            'sequence': track_sequence,
+            'segments': segment_results,
+            'total_duration': sum(result['duration'] for result in segment_results),
+            'target_duration': sum(result['target_duration'] for result in segment_results),
+            'seam_repeats': sum(a[-1]['move'] == b[0]['move'] for a, b in zip(ends, ends[1:])),
+            'max_transition': round(max(costs), 3) if costs else None,
+            'jarring_transitions': sum(cost > JARRING_TRANSITION for cost in costs),
+            'unsolved': [result['segment'] for result, (_, options) in zip(segment_results, solved)
+                         if not options],
+        }
+
+    def _segment_pool(self, move_type: Optional[str], energy_range: Optional[str]) -> List[str]:
+        """Moves a segment may use, shortest first (energy filter dropped if it leaves too few)."""
+        pool = list(self.move_metadata.sorted_moves(move_type or None)[0])
+        if energy_range in MOTION_ENERGY_RANGES and self.move_metadata.has_field('motion_energy'):
+            low, high = MOTION_ENERGY_RANGES[energy_range]
+            narrowed = self.move_metadata.names_where('motion_energy', low, high, move_type or None)
+            if len(narrowed) >= MIN_ENERGY_POOL:
+                pool = narrowed
+        return pool
+
+    def _segment_candidates(self, pool: List[str], target: float, tolerance: float,
+                            start: Optional[float] = None,
+                            align: str = 'none') -> List[Tuple[List[Dict[str, Any]], float, float]]:
+        """Solver candidates of one segment as (sequence, duration, cost), each also reversed."""
+        durations = [self.move_metadata.duration(name) for name in pool]
+        candidates = []
+        if align != 'none':
+            for sequence, duration, _, cost in self._beat_solutions(pool, durations, start, target,
+                                                                    align, SEGMENT_CANDIDATES):
+                candidates.append((sequence, duration, cost))
+                if len(sequence) > 1:
+                    reverse = [dict(entry) for entry in sequence[::-1]]
+                    self._place_on_beats(reverse, sequence[0]['start_time'])
+                    candidates.append((reverse, duration, cost))
+            return candidates
+
+        for result in duration_solver.solve(durations, target, tolerance, k=SEGMENT_CANDIDATES):
+            moves = [pool[i] for i, _ in result['entries']]
+            cycles = [c for _, c in result['entries']]
+            sequence = [{'move': moves[i], 'cycles': cycles[i]} for i in self.move_metadata.smooth_order(moves)]
+            candidates.append((sequence, result['duration'], result['cost']))
+            if len(sequence) > 1:
+                candidates.append((sequence[::-1], result['duration'], result['cost']))
+        return candidates
+
+    def _seam_cost(self, before: List[Dict[str, Any]], after: List[Dict[str, Any]]) -> float:
+        """Cost of playing `after` right after `before` (see the SEAM_* constants)."""
+        last, first = before[-1]['move'], after[0]['move']
+        cost = SEAM_REPEAT_PENALTY if last == first else 0.0
+        shared = {entry['move'] for entry in before} & {entry['move'] for entry in after}
+        cost += SHARED_MOVE_COST * len(shared)
+        transition = self.move_metadata.transition_cost(last, first)
+        return cost + SEAM_TRANSITION_WEIGHT * (transition or 0.0)
+
+    def _choose_across_seams(self, options: List[List[Tuple[List[Dict[str, Any]], float, float]]]
+                             ) -> List[Tuple[List[Dict[str, Any]], float]]:
+        """Viterbi over consecutive segments' candidates; returns the (sequence, duration) picked per segment."""
+        if not options:
+            return []
+        best = np.array([cost for _, _, cost in options[0]])
+        pointers = []
+        for previous, current in zip(options, options[1:]):
+            seams = np.array([[self._seam_cost(before, after) for after, _, _ in current]
+                              for before, _, _ in previous])
+            total = best[:, None] + seams
+            pointers.append(total.argmin(axis=0))
+            best = total.min(axis=0) + np.array([cost for _, _, cost in current])
+
+        picks = [int(best.argmin())]
+        for pointer in reversed(pointers):
+            picks.append(int(pointer[picks[-1]]))
+        picks.reverse()
+        return [(candidates[i][0], candidates[i][1]) for candidates, i in zip(options, picks)]
+
+    def _beat_solutions(self, names, durations, start: float, target: float, align: str,
+                        k: int) -> List[Tuple[List[Dict[str, Any]], float, float, float]]:
+        """
+        Beat-aligned solutions for the window [start, start + target] (track time).
+
+        Returns:
+            [(sequence, duration, misalignment, cost), ...] with each sequence
+            smooth-ordered and placed on the grid ('beats', 'start_time')
+        """
+        unit = self.beat_grid.beats_per_bar if align == 'bar' else 1
+        result = duration_solver.solve_beats(durations, self.beat_grid, start, start + target,
+                                             k=k, beats_per_unit=unit)
+        first_time = self.beat_grid.beat_to_time(result['first_beat']) - self.audio_analysis.get('offset', 0.0)
+        duration = (self.beat_grid.beat_to_time(result['first_beat'] + result['beats'])
+                    - self.beat_grid.beat_to_time(result['first_beat']))
         solutions = []
+        for solution in result['solutions']:
+            entries = [{'move': names[i], 'cycles': cycles, 'beats': beats}
+                       for (i, cycles), beats in zip(solution['entries'], solution['beats'])]
+            sequence = [entries[i] for i in self.move_metadata.smooth_order([entry['move'] for entry in entries])]
+            self._place_on_beats(sequence, first_time)
+            solutions.append((sequence, duration, solution['misalignment'], solution['cost']))
+        return solutions
+
+    def _place_on_beats(self, sequence: List[Dict[str, Any]], start_time: float):
+        """Set each entry's 'start_time' (s from the choreography start) from its 'beats', in order."""
+        offset = self.audio_analysis.get('offset', 0.0)
+        beat = self.beat_grid.time_to_beat(start_time + offset)
+        for entry in sequence:
+            entry['start_time'] = round(self.beat_grid.beat_to_time(beat) - offset, 3)
+            beat += entry['beats']
+
+    def _format_solution(self, moves: List[str], cycles: List[int], duration: float,
+                         target: float, sequence: Optional[List[Dict[str, Any]]] = None,
+                         misalignment: Optional[float] = None) -> Dict[str, Any]:
+        """Solver result as a tool solution, moves ordered for smooth transitions (unless sequence is given)."""
+        if sequence is None:
+            order = self.move_metadata.smooth_order(moves)
+            sequence = [{'move': moves[i], 'cycles': cycles[i]} for i in order]
+        costs = [cost for cost in self.move_metadata.chain_costs(self._played_moves(sequence))
+                 if cost is not None]
+        return {
+            'sequence': sequence,
+            'duration': duration,
+            'move_count': len(sequence),
+            # Higher = more different moves; near-identical moves count as
+            # repeats when the similarity matrix is available
+            'variety_score': self.move_metadata.variety_score([entry['move'] for entry in sequence]),
+            'max_transition': round(max(costs), 3) if costs else None,
+            'jarring_transitions': sum(cost > JARRING_TRANSITION for cost in costs),
+            'error': abs(duration - target),
+            **({'misalignment': round(misalignment, 3)} if misalignment is not None else {})
+        }
 
-        # Generate multiple solutions using randomized greedy approach
-        for attempt in range(num_solutions * 3):  # Try 3x more to get variety
-            sequence = []
-            current_duration = 0.0
-            used_moves = set()
-
-            # Greedy fill with randomization
-            while current_duration < target_duration - tolerance:
-                remaining = target_duration - current_duration
-
-                # Find moves that could fit in remaining time
-                candidates = [(name, dur) for name, dur in available_moves if dur <= remaining + tolerance]
-
-                if not candidates:
-                    break
-
-                # Add randomization to get variety across solutions
-                if random.random() < 0.7:  # 70% pick from best fits
-                    # Pick moves close to remaining duration
-                    candidates.sort(key=lambda x: abs(x[1] - remaining))
-                    move_name, move_dur = random.choice(candidates[:min(5, len(candidates))])
-                else:  # 30% pick random
-                    move_name, move_dur = random.choice(candidates)
-
-                # Determine cycles
-                max_cycles = int((remaining + tolerance) / move_dur)
-                cycles = random.randint(1, min(3, max_cycles)) if max_cycles > 1 else 1
-
-                sequence.append({'move': move_name, 'cycles': cycles})
-                current_duration += move_dur * cycles
-                used_moves.add(move_name)
-
-            # Validate solution
-            actual_duration = self.calculate_sequence_duration(sequence)
-            if abs(actual_duration - target_duration) <= tolerance and len(sequence) > 0:
-                # Calculate variety score (higher = more different moves)
-                variety_score = len(used_moves) / len(sequence) if sequence else 0
-
-                solutions.append({
-                    'sequence': sequence,
-                    'duration': actual_duration,
-                    'move_count': len(sequence),
-                    'variety_score': variety_score,
-                    'error': abs(actual_duration - target_duration)
-                })
-
-            if len(solutions) >= num_solutions:
-                break
+    @staticmethod
+    def _played_moves(sequence: List[Dict[str, Any]]) -> List[str]:
+        """Move names in playback order (each entry repeated per cycle)."""
+        return [entry['move'] for entry in sequence for _ in range(max(1, int(entry.get('cycles', 1))))]
+
+    def check_transitions(self, sequence: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Check the transitions of a sequence for abrupt pose jumps.
 
-        # Sort by error (best fit first)
-        solutions.sort(key=lambda x: x['error'])
+        Every boundary (between entries, and between the cycles of a repeated
+        move) is scored with the cached end-pose/start-pose transition cost.
+        Jarring boundaries get replacement suggestions for the incoming move:
+        moves of the same type and similar duration that make the transitions
+        on both sides cheaper.
 
+        Args:
+            sequence: List of {'move': str, 'cycles': int} dicts
+
+        Returns:
+            {
+                'transitions': [{'index', 'from', 'to', 'cost', 'jarring'}, ...],
+                'jarring_count': int,
+                'max_cost': float or None,
+                'suggestions': [{'index', 'replace', 'alternatives': [{'move', 'cost'}]}, ...]
+            }
+        """
+        if not self.move_metadata.has_transitions:
+            return {'error': 'Transition costs are not cached; rebuild the move cache'}
+
+        transitions = []
+        suggestions = []
+        previous = None
+        for index, entry in enumerate(sequence):
+            move = entry['move']
+            cycles = max(1, int(entry.get('cycles', 1)))
+            boundaries = ([(previous, 'from')] if previous is not None else []) + \
+                         ([(move, 'cycle')] if cycles > 1 else [])
+            for source, kind in boundaries:
+                cost = self.move_metadata.transition_cost(source, move)
+                if cost is None:
+                    continue
+                jarring = cost > JARRING_TRANSITION
+                transitions.append({'index': index, 'from': source, 'to': move,
+                                    'cost': round(cost, 3), 'jarring': jarring})
+                if jarring and kind == 'from':
+                    following = sequence[index + 1]['move'] if index + 1 < len(sequence) else None
+                    alternatives = self._smoother_replacements(previous, move, following)
+                    if alternatives:
+                        suggestions.append({'index': index, 'replace': move, 'alternatives': alternatives})
+            previous = move
+
+        costs = [t['cost'] for t in transitions]
         return {
-            'solutions': solutions[:num_solutions],
-            'target_duration': target_duration,
-            'tolerance': tolerance,
-            'found': len(solutions)
+            'transitions': transitions,
+            'jarring_count': sum(t['jarring'] for t in transitions),
+            'max_cost': max(costs) if costs else None,
+            'suggestions': suggestions,
         }
 
+    def _smoother_replacements(self, previous: str, move: str, following: Optional[str],
+                               k: int = 3) -> List[Dict[str, Any]]:
+        """Same-type moves of similar duration whose in (and out) transitions cost less than move's."""
+        data = self.move_metadata.get(move)
+        if data is None:
+            return []
+        duration = data['duration']
+        candidates = [name for name in self.move_metadata.names_in_range(
+                          duration - REPLACEMENT_DURATION_TOLERANCE,
+                          duration + REPLACEMENT_DURATION_TOLERANCE, data['type'])
+                      if name not in (move, previous)]
+        if not candidates:
+            return []
+
+        def chain_cost(costs_in, name):
+            cost_out = self.move_metadata.transition_cost(name, following) if following else 0.0
+            return costs_in + (cost_out or 0.0)
+
+        current = chain_cost(self.move_metadata.transition_cost(previous, move), move)
+        costs_in = self.move_metadata.transition_costs(previous, candidates)
+        scored = sorted((chain_cost(cost, name), name) for cost, name in zip(costs_in, candidates)
+                        if not math.isnan(cost))
+        return [{'move': name, 'cost': round(cost, 3)} for cost, name in scored[:k] if cost < current]
+
     def submit_choreography(self, sequence: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Submit the final choreography sequence.
@@ -566,18 +1197,53 @@ class ChoreographyTools:
             },
             {
                 "name": "solve_duration_constraint",
-                "description": "**PRIMARY TOOL** Solves the duration constraint mathematically and returns multiple valid move sequences. Use this to get choreography options that fit the target duration, then evaluate them for artistic merit. This handles all the math - you focus on creative decisions.",
+                "description": "**PRIMARY TOOL** Solves the duration constraint exactly and returns the best valid move sequences (deterministic; if none are returned, no combination fits). Use this to get choreography options that fit the target duration, then evaluate them for artistic merit. This handles all the math - you focus on creative decisions.",
                 "input_schema": {
                     "type": "object",
                     "properties": {
                         "target_duration": {"type": "number", "description": "Target duration in seconds"},
                         "move_type": {"type": "string", "enum": ["dance", "emotion", None], "description": "Optional filter: 'dance', 'emotion', or null for both"},
                         "tolerance": {"type": "number", "description": "Acceptable error in seconds (default 1.5)"},
-                        "num_solutions": {"type": "number", "description": "Number of different solutions to generate (default 3)"}
+                        "num_solutions": {"type": "number", "description": "Number of different solutions to generate (default 3)"},
+                        "align": {"type": "string", "enum": ["none", "beat", "bar"], "description": "'beat'/'bar': every move boundary lands on a beat/downbeat of the track, ranked by misalignment; entries get start_time (default 'none')"},
+                        "start_time": {"type": "number", "description": "Track time (s) the aligned window starts at, e.g. the segment start (default: start of the audio)"}
                     },
                     "required": ["target_duration"]
                 }
             },
+            {
+                "name": "solve_track",
+                "description": "**WHOLE-TRACK SOLVER** Solves every segment of get_music_structure in one call. Give each segment's move_type and energy_range; the segments are solved exactly and chained so no move repeats across a seam and transitions stay smooth. Returns the full sequence plus per-segment results. Prefer this over one solve_duration_constraint call per segment.",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "segment_plans": {
+                            "type": "array",
+                            "description": "Per-segment preferences: [{segment: index, move_type: 'dance'|'emotion'|null, energy_range: 'low'|'moderate'|'high'|null}]. Segments without a plan use all moves.",
+                            "items": {"type": "object"}
+                        },
+                        "tolerance": {"type": "number", "description": "Acceptable error per segment in seconds (default 1.5)"},
+                        "level": {"type": "string", "enum": ["section", "phrase", "bar"], "description": "Segmentation level the indices refer to (default 'section')"},
+                        "align": {"type": "string", "enum": ["none", "beat", "bar"], "description": "'beat'/'bar': every move boundary lands on a beat/downbeat (default 'none')"}
+                    },
+                    "required": []
+                }
+            },
+            {
+                "name": "check_transitions",
+                "description": "Score the transitions of a sequence by how far each move's end pose is from the next move's start pose. Flags jarring transitions and suggests same-type, similar-duration replacements that chain more smoothly. Use on a chosen solver solution before appending it.",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "sequence": {
+                            "type": "array",
+                            "description": "List of {move, cycles} entries",
+                            "items": {"type": "object"}
+                        }
+                    },
+                    "required": ["sequence"]
+                }
+            },
             {
                 "name": "get_moves_by_duration",
                 "description": "Find all moves within a specific duration range. Useful for finding moves that fit a time gap.",
@@ -621,13 +1287,53 @@ class ChoreographyTools:
             },
             {
                 "name": "get_music_structure",
-                "description": "**CALL THIS FIRST** Get the music structure with labeled segments (intro/verse/chorus/bridge/outro) and per-segment features (energy, spectral characteristics, beats). Use this to understand the song's structure before creating choreography. This enables section-by-section planning instead of whole-track solving.",
+                "description": "**CALL THIS FIRST** Get the music structure with labeled segments (intro/verse/chorus/bridge/outro) and per-segment features (energy, spectral characteristics, beats). Use this to understand the song's structure before creating choreography. This enables section-by-section planning instead of whole-track solving. Pass level='phrase' (4 bars) or level='bar' for a finer breakdown; those nodes reference their parent section/phrase.",
                 "input_schema": {
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "level": {
+                            "type": "string",
+                            "enum": ["section", "phrase", "bar"],
+                            "description": "Granularity (default 'section')"
+                        }
+                    },
                     "required": []
                 }
             },
+            {
+                "name": "reuse_section_choreography",
+                "description": "Reuse the choreography you already chose for a section on a later repeat of it (same repeat_group in get_music_structure, e.g. the second chorus). Adapts cycle counts to the target segment's duration, optionally with a variation. Use this instead of solve_duration_constraint for repeated sections.",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "sequence": {
+                            "type": "array",
+                            "description": "Sequence used for the earlier occurrence ('move' and 'cycles' keys)",
+                            "items": {"type": "object"}
+                        },
+                        "target_segment": {"type": "number", "description": "Index of the segment to fill"},
+                        "variation": {
+                            "type": "string",
+                            "enum": ["none", "reverse", "rotate", "substitute"],
+                            "description": "none = same moves, reverse/rotate = reordered, substitute = similar-length moves of the same type (default none)"
+                        },
+                        "tolerance": {"type": "number", "description": "Acceptable error in seconds (default 1.5)"}
+                    },
+                    "required": ["sequence", "target_segment"]
+                }
+            },
+            {
+                "name": "get_section_features",
+                "description": "Get audio features (energy, brightness, pitch salience, percussive ratio) aggregated over any time range as mean/std/min/max. Use this to inspect a specific part of a section without re-analyzing the audio.",
+                "input_schema": {
+                    "type": "object",
+                    "properties": {
+                        "start": {"type": "number", "description": "Range start in seconds"},
+                        "end": {"type": "number", "description": "Range end in seconds"}
+                    },
+                    "required": ["start", "end"]
+                }
+            },
             {
                 "name": "suggest_moves_for_context",
                 "description": "Get move recommendations based on musical context (BPM, energy, type). Use when you want ideas for what moves would fit the music well.",
@@ -676,7 +1382,7 @@ class ChoreographyTools:
             },
             {
                 "name": "get_vocal_sections",
-                "description": "Identify sections of the audio with strong vocal content. Returns timing and characteristics.",
+                "description": "Identify time ranges of the audio with vocal content (singing). Returns start/end, vocal probability and per-section characteristics. Use it to pick EMOTION moves for vocal passages.",
                 "input_schema": {
                     "type": "object",
                     "properties": {},
@@ -685,7 +1391,7 @@ class ChoreographyTools:
             },
             {
                 "name": "get_instrumental_sections",
-                "description": "Identify instrumental/non-vocal sections. Returns timing, energy, and percussive characteristics.",
+                "description": "Identify instrumental/non-vocal time ranges. Returns start/end, energy, and percussive ratio per section. Use it to pick DANCE moves for instrumental passages.",
                 "input_schema": {
                     "type": "object",
                     "properties": {},
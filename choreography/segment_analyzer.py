@@ -6,201 +6,678 @@ Combines spectral clustering with Essentia's feature analysis to:
 2. Characterize each segment with energy, spectral, and rhythmic features
 3. Infer musical structure labels (intro/verse/chorus/bridge/outro)
 
+Clustering runs on beat-synchronous features (frame MFCCs averaged between
+consecutive beats) with a chain connectivity constraint, so only neighbouring
+beats can merge. Every cluster is then one contiguous segment, and Ward's cost
+is near-linear in the number of beats instead of quadratic in frames.
+
+Repeated sections (e.g. every chorus) are found by comparing segments on a
+beat-level self-similarity matrix. The matrix is never materialized: each
+segment pair is scored block by block along its diagonals, so memory stays
+bounded by SSM_BLOCK_SIZE rows. Segments of one repeat group share a
+'repeat_group' id.
+
+Sections are subdivided into phrases and bars (structure tree) in the same
+pass; features of every node come from prefix sums over the frame features.
+
+Unless a target is given, the number of segments is the number of peaks in a
+novelty curve over the beat features, plus one. Frame features and beats of
+recent files are cached in memory and persisted as memory-mapped .npy files
+(segmentation_cache), so re-segmenting the same audio at another granularity
+(target_segments), also in a later session, skips the audio passes.
+
 This replaces the fake percentage-based segmentation with real analysis.
 Uses sklearn + Essentia (no librosa to avoid lzma dependency issues).
+
+Run from the repository root (the module uses package-relative imports):
+
+    python -m choreography.segment_analyzer song.wav [target_segments] [--profile]
 """
 
+import os
+from collections import OrderedDict
+
 import numpy as np
-import soundfile as sf
 import essentia.standard as es
 from sklearn.cluster import AgglomerativeClustering
 from sklearn.preprocessing import StandardScaler
-from scipy.ndimage import uniform_filter1d
-from typing import List, Dict, Any
+from scipy.sparse import diags
+from scipy.signal import find_peaks
+from typing import List, Dict, Any, Tuple
 import json
 
+from .profiling import StepProfiler
+from .audio_io import load_mono, get_duration
+from . import segmentation_cache
+
+
+# STFT parameters of the segmentation features
+SEGMENT_FRAME_SIZE = 2048
+SEGMENT_HOP_SIZE = 512
+
+# Everything that changes the frame features; part of the disk cache key
+SEGMENT_FEATURE_PARAMS = {
+    'sample_rate': 44100,
+    'frame_size': SEGMENT_FRAME_SIZE,
+    'hop_size': SEGMENT_HOP_SIZE,
+    'n_mfcc': 13,
+    'rhythm': 'RhythmExtractor2013',
+}
+
+# Clustering unit length (seconds) used when too few beats were detected
+FALLBACK_UNIT_DURATION = 0.5
+
+# Rows of the beat self-similarity matrix computed at once
+SSM_BLOCK_SIZE = 256
+
+# Mean cosine similarity along the best diagonal for two segments to repeat
+REPEAT_SIMILARITY = 0.6
+
+# A diagonal must cover this fraction of the shorter segment to count
+REPEAT_MIN_OVERLAP = 0.6
+
+# Beats compared on each side of a candidate boundary in the novelty curve
+NOVELTY_WINDOW_BEATS = 16
+
+# Minimum beats between novelty peaks (= shortest auto-detected segment)
+NOVELTY_MIN_DISTANCE = 16
+
+# Peak prominence needed, in standard deviations of the novelty curve
+NOVELTY_PROMINENCE = 1.0
+
+# Levels of the structure tree, coarse to fine
+STRUCTURE_LEVELS = ('section', 'phrase', 'bar')
+
+# Beats per bar and bars per phrase when subdividing sections
+BEATS_PER_BAR = 4
+BARS_PER_PHRASE = 4
+
+# Files whose segmentation features are kept in memory
+FEATURE_CACHE_SIZE = 4
 
-def analyze_segments(audio_path: str, target_segments: int = None) -> List[Dict[str, Any]]:
+# (path, mtime, size, start, end) -> (features, beats, duration)
+_feature_cache = OrderedDict()
+
+
+def analyze_segments(audio_path: str, target_segments: int = None,
+                     profile: bool = False, profiler: StepProfiler = None,
+                     start: float = None, end: float = None,
+                     audio: np.ndarray = None, use_cache: bool = True,
+                     return_tree: bool = False):
     """
     Analyze audio file and return labeled segments with per-segment features.
 
     Args:
         audio_path: Path to audio file
-        target_segments: Target number of segments (default: auto-detect 4-6 segments)
+        target_segments: Target number of segments (default: one more than the
+            number of novelty peaks)
+        profile: Time each segmentation phase and print a profile table
+        profiler: Existing StepProfiler to record phases into (e.g. AudioAnalyzer's);
+            phases are recorded as nested steps of whatever step is active
+        start: Only analyze from this time in seconds (the file is seeked, not decoded from 0)
+        end: Only analyze up to this time in seconds
+        audio: Already-decoded mono 44.1 kHz samples of the window (skips loading)
+        use_cache: Reuse frame features and beats from an earlier call on the
+            same file and window, in memory or from the disk cache (the audio
+            is then not loaded at all); new results are stored in both
+        return_tree: Also return the section -> phrase -> bar tree
+            (see build_structure_tree)
 
     Returns:
-        List of segment dictionaries with:
-        - start: Start time in seconds
+        List of segment dictionaries (or (segments, tree) with return_tree) with:
+        - start: Start time in seconds (absolute file time, also for windows)
         - end: End time in seconds
         - label: Inferred structural label (intro/verse/chorus/bridge/outro)
         - energy: Average RMS energy for this segment
         - spectral_centroid: Average spectral centroid (brightness)
         - spectral_rolloff: Average spectral rolloff (frequency content)
         - beats_per_segment: Number of beats in this segment
+        - repeat_group: Id shared by segments that repeat the same material
     """
 
+    if profiler is None:
+        profiler = StepProfiler(enabled=profile)
+
+    offset = float(start or 0.0)
+    cache_key = _feature_cache_key(audio_path, offset, end, audio) if use_cache else None
+
+    if cache_key in _feature_cache:
+        _feature_cache.move_to_end(cache_key)
+        features, beats, duration = _feature_cache[cache_key]
+        print(f"[SegmentAnalyzer] Using cached features for {audio_path}")
+    else:
+        cached, disk_key = None, None
+        if cache_key is not None:
+            with profiler.step('cache_load'):
+                disk_key = segmentation_cache.cache_key(audio_path, offset, cache_key[-1],
+                                                        SEGMENT_FEATURE_PARAMS)
+                cached = segmentation_cache.load(disk_key) if disk_key else None
+
+        if cached is not None:
+            features, beats, duration = cached
+            print(f"[SegmentAnalyzer] Loaded cached features for {audio_path} ({disk_key})")
+        else:
+            features, beats, duration = _extract_features_and_beats(audio_path, offset, end, audio, profiler)
+            if disk_key is not None:
+                segmentation_cache.save(disk_key, features, beats, duration, SEGMENT_FEATURE_PARAMS)
+
+        if cache_key is not None:
+            _feature_cache[cache_key] = (features, beats, duration)
+            while len(_feature_cache) > FEATURE_CACHE_SIZE:
+                _feature_cache.popitem(last=False)
+
+    # ====================
+    # 3. BOUNDARIES, SEGMENT OBJECTS, LABELS
+    # ====================
+    result = segment_from_features(features, beats, duration, target_segments,
+                                   offset=offset, profiler=profiler, return_tree=return_tree)
+
+    if profile:
+        print("\n[SegmentAnalyzer] Profile:")
+        print(profiler.format_table())
+    return result
+
+
+def _extract_features_and_beats(audio_path: str, offset: float, end: float,
+                                audio: np.ndarray, profiler: StepProfiler):
+    """Load the window (unless given) and run the frame and rhythm passes."""
     print(f"[SegmentAnalyzer] Loading audio: {audio_path}")
 
-    # Load audio with soundfile
-    y, sr = sf.read(audio_path)
-    # Convert to mono if stereo
-    if len(y.shape) > 1:
-        y = np.mean(y, axis=1)
+    # Load audio (mono, 44.1 kHz - the rate RhythmExtractor2013 assumes)
+    with profiler.step('load'):
+        if audio is not None:
+            y, sr = np.asarray(audio, dtype=np.float32), 44100
+        else:
+            y, sr = load_mono(audio_path, start=offset or None, end=end)
     duration = len(y) / sr
 
     print(f"[SegmentAnalyzer] Duration: {duration:.2f}s, Sample rate: {sr}Hz")
 
     # ====================
-    # 1. EXTRACT FEATURES FOR CLUSTERING
+    # 1. EXTRACT FRAME FEATURES
     # ====================
     print("[SegmentAnalyzer] Extracting features for segmentation...")
 
-    frame_size = 2048
-    hop_size = 512
+    with profiler.step('features'):
+        features = extract_segmentation_features(y, sr, offset)
+
+    print(f"[SegmentAnalyzer] Extracted {len(features['times'])} frames")
+
+    # ====================
+    # 2. EXTRACT GLOBAL FEATURES
+    # ====================
+    print("[SegmentAnalyzer] Extracting rhythm and beat information...")
+
+    with profiler.step('rhythm'):
+        rhythm_extractor = es.RhythmExtractor2013()
+        bpm, beats, _, _, _ = rhythm_extractor(y)
+        beats = beats + offset
+
+    return features, beats, duration
+
+
+def _feature_cache_key(audio_path: str, offset: float, end: float, audio: np.ndarray):
+    """
+    Memory cache key of a file window (None if the file cannot be stat'ed).
+
+    The last element is the window end in seconds (None if unknown).
+    """
+    try:
+        stat = os.stat(audio_path)
+    except OSError:
+        return None
+    if end is None:
+        # Same key whether the window end comes from decoded audio or the header
+        end = offset + len(audio) / 44100 if audio is not None else get_duration(audio_path)
+    return (os.path.abspath(audio_path), stat.st_mtime_ns, stat.st_size,
+            round(offset, 3), None if end is None else round(end, 3))
+
+
+def clear_feature_cache(disk: bool = False):
+    """Drop cached segmentation features from memory (and the disk cache with disk=True)."""
+    _feature_cache.clear()
+    if disk:
+        segmentation_cache.clear()
+
+
+def extract_segmentation_features(y: np.ndarray, sr: int = 44100,
+                                  offset: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Compute per-frame MFCCs, RMS energy, spectral centroid and rolloff in one pass.
+
+    Args:
+        y: Mono audio samples
+        sr: Sample rate in Hz
+        offset: File time in seconds of the first sample
+
+    Returns:
+        {'times': (n,), 'mfcc': (n, 13), 'energy': (n,), 'centroid': (n,), 'rolloff': (n,)}
+        with float32 arrays and file times
+    """
+    frame_size = SEGMENT_FRAME_SIZE
+    hop_size = SEGMENT_HOP_SIZE
 
     # Windowing and spectral analysis
     window = es.Windowing(type='hann')
     spectrum = es.Spectrum()
     mfcc_extractor = es.MFCC(numberCoefficients=13)
+    rms_extractor = es.RMS()
+    centroid_extractor = es.Centroid(range=sr//2)
+    rolloff_extractor = es.RollOff()
 
-    # Extract frame-by-frame MFCCs for clustering
-    mfccs_list = []
-    frame_times = []
+    starts = range(0, len(y) - frame_size, hop_size)
+    n_frames = len(starts)
+    mfccs = np.empty((n_frames, 13), dtype=np.float32)
+    energies = np.empty(n_frames, dtype=np.float32)
+    centroids = np.empty(n_frames, dtype=np.float32)
+    rolloffs = np.empty(n_frames, dtype=np.float32)
 
-    for i in range(0, len(y) - frame_size, hop_size):
+    for n, i in enumerate(starts):
         frame = y[i:i+frame_size]
-        windowed = window(frame)
-        spec = spectrum(windowed)
+        spec = spectrum(window(frame))
 
         # MFCC bands and coefficients
-        bands, mfccs = mfcc_extractor(spec)
-        mfccs_list.append(mfccs)
-        frame_times.append(i / sr)
+        bands, mfccs[n] = mfcc_extractor(spec)
+        energies[n] = rms_extractor(frame)
+        centroids[n] = centroid_extractor(spec)
+        rolloffs[n] = rolloff_extractor(spec)
+
+    return {
+        'times': (offset + np.arange(n_frames) * hop_size / sr).astype(np.float64),
+        'mfcc': mfccs,
+        'energy': energies,
+        'centroid': centroids,
+        'rolloff': rolloffs,
+    }
+
+
+def concat_segmentation_features(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Join feature dicts of consecutive, non-overlapping time ranges (chunked analysis)."""
+    if not parts:
+        return {'times': np.zeros(0), 'mfcc': np.zeros((0, 13), dtype=np.float32),
+                'energy': np.zeros(0, dtype=np.float32), 'centroid': np.zeros(0, dtype=np.float32),
+                'rolloff': np.zeros(0, dtype=np.float32)}
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def beat_sync_features(values: np.ndarray, times: np.ndarray, beats: np.ndarray,
+                       start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Average frame rows between consecutive beats.
 
-    mfccs_array = np.array(mfccs_list)
-    frame_times = np.array(frame_times)
+    Args:
+        values: (n_frames, d) frame features
+        times: (n_frames,) sorted frame times
+        beats: Beat times; with fewer than two inside [start, end) a fixed
+            FALLBACK_UNIT_DURATION grid is used instead
+        start: Analyzed range start (file time)
+        end: Analyzed range end (file time)
 
-    print(f"[SegmentAnalyzer] Extracted {len(mfccs_array)} frames")
+    Returns:
+        (unit_values (n_units, d), unit_start_times (n_units,)); the first unit
+        starts at `start`, units without frames are dropped
+    """
+    beats = np.asarray(beats, dtype=np.float64)
+    beats = beats[(beats > start) & (beats < end)]
+    if len(beats) < 2:
+        beats = np.arange(start + FALLBACK_UNIT_DURATION, end, FALLBACK_UNIT_DURATION)
+
+    bounds = np.concatenate([[start], beats])
+    first_frame = np.searchsorted(times, bounds)
+    counts = np.diff(np.append(first_frame, len(times)))
+    keep = counts > 0
+    if not np.any(keep):
+        return np.zeros((0, values.shape[1]), dtype=np.float64), np.zeros(0)
+
+    # Units without frames are dropped, so each kept unit sums up to the next kept one
+    sums = np.add.reduceat(values.astype(np.float64), first_frame[keep], axis=0)
+    unit_times = bounds[keep]
+    unit_times[0] = start
+    return sums / counts[keep][:, None], unit_times
+
+
+class _RangeIndex:
+    """Prefix sums over the segmentation frames for O(1) per-range means."""
+
+    def __init__(self, features: Dict[str, np.ndarray], beats: np.ndarray):
+        self.times = features['times']
+        self.beats = beats
+        self.sums = {
+            name: np.concatenate([[0.0], np.cumsum(features[name], dtype=np.float64)])
+            for name in ('energy', 'centroid', 'rolloff')
+        }
+
+    def nodes(self, starts, ends) -> List[Dict[str, Any]]:
+        """Feature dicts of the time ranges [starts[i], ends[i]) (vectorized)."""
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        lo = np.searchsorted(self.times, starts)
+        hi = np.searchsorted(self.times, ends)
+        count = hi - lo
+        means = {name: np.where(count > 0, (prefix[hi] - prefix[lo]) / np.maximum(count, 1), 0.0)
+                 for name, prefix in self.sums.items()}
+        beats_count = np.searchsorted(self.beats, ends) - np.searchsorted(self.beats, starts)
+
+        return [{
+            'start': float(starts[i]),
+            'end': float(ends[i]),
+            'duration': float(ends[i] - starts[i]),
+            'energy': float(means['energy'][i]),
+            'spectral_centroid': float(means['centroid'][i]),
+            'spectral_rolloff': float(means['rolloff'][i]),
+            'beats_count': int(beats_count[i]),
+        } for i in range(len(starts))]
+
+
+def build_structure_tree(sections: List[Dict[str, Any]], index: _RangeIndex,
+                         beats: np.ndarray) -> Dict[str, Any]:
+    """
+    Subdivide labeled sections into phrases and bars.
 
-    # ====================
-    # 2. BOUNDARY DETECTION VIA CLUSTERING
-    # ====================
-    print("[SegmentAnalyzer] Detecting segment boundaries...")
+    Bars are BEATS_PER_BAR beats counted from the first beat of each section
+    (section boundaries fall on beats); phrases are BARS_PER_PHRASE bars. Without beats
+    a section is one phrase of one bar.
 
-    # Normalize features
-    scaler = StandardScaler()
-    mfccs_normalized = scaler.fit_transform(mfccs_array)
+    Args:
+        sections: Labeled segments (segment_from_features output)
+        index: Prefix sums of the frame features
+        beats: Sorted beat times
 
-    # Apply smoothing to reduce noise
-    smoothed = uniform_filter1d(mfccs_normalized, size=9, axis=0)
+    Returns:
+        {'levels': {'section': [...], 'phrase': [...], 'bar': [...]}}; every
+        node has the segment feature keys plus 'parent' (index into the next
+        coarser level, None for sections) and 'first_child'/'n_children'
+        (range in the next finer level). Phrases and bars carry their
+        section's 'label' and 'repeat_group'.
+    """
+    phrase_bounds, phrase_parent = [], []
+    bar_bounds, bar_parent = [], []
+
+    for s_idx, section in enumerate(sections):
+        start, end = section['start'], section['end']
+        inside = beats[(beats >= start - 1e-3) & (beats < end - 1e-3)]
+        # Bar k starts at the section's (k * BEATS_PER_BAR)-th beat; bar 0 at the section start
+        bar_starts = np.concatenate([[start], inside[BEATS_PER_BAR::BEATS_PER_BAR]])
+        bar_ends = np.append(bar_starts[1:], end)
+
+        for p_start in range(0, len(bar_starts), BARS_PER_PHRASE):
+            p_end = min(p_start + BARS_PER_PHRASE, len(bar_starts))
+            phrase_idx = len(phrase_bounds)
+            phrase_bounds.append((bar_starts[p_start], bar_ends[p_end - 1]))
+            phrase_parent.append(s_idx)
+            for b in range(p_start, p_end):
+                bar_bounds.append((bar_starts[b], bar_ends[b]))
+                bar_parent.append(phrase_idx)
+
+    levels = {
+        'section': [dict(section) for section in sections],
+        'phrase': index.nodes([b[0] for b in phrase_bounds], [b[1] for b in phrase_bounds]),
+        'bar': index.nodes([b[0] for b in bar_bounds], [b[1] for b in bar_bounds]),
+    }
+    parents = {'section': [None] * len(sections), 'phrase': phrase_parent, 'bar': bar_parent}
+
+    for level, finer in zip(STRUCTURE_LEVELS, STRUCTURE_LEVELS[1:] + (None,)):
+        for node, parent in zip(levels[level], parents[level]):
+            node['parent'] = parent
+            node['first_child'], node['n_children'] = None, 0
+        if finer is None:
+            continue
+        # Children are contiguous and in order, so one pass finds each range
+        for child_idx, parent in enumerate(parents[finer]):
+            node = levels[level][parent]
+            if node['first_child'] is None:
+                node['first_child'] = child_idx
+            node['n_children'] += 1
+
+    # Phrases and bars inherit their section's label
+    for level in STRUCTURE_LEVELS[1:]:
+        coarser = levels[STRUCTURE_LEVELS[STRUCTURE_LEVELS.index(level) - 1]]
+        for node in levels[level]:
+            parent = coarser[node['parent']]
+            node['label'] = parent.get('label')
+            node['repeat_group'] = parent.get('repeat_group')
+
+    return {'levels': levels}
+
+
+def diagonal_similarity(a: np.ndarray, b: np.ndarray,
+                        block_size: int = SSM_BLOCK_SIZE) -> float:
+    """
+    Best mean similarity along one diagonal of the a x b self-similarity block.
 
-    # Determine number of clusters
-    if target_segments is None:
-        # Auto-detect: aim for 4-6 segments for typical songs
-        n_segments = max(3, min(6, int(duration / 10)))  # Roughly 10s per segment
-    else:
-        n_segments = target_segments
+    A repeated passage shows up as a stripe of high similarity parallel to the
+    main diagonal. The block is computed SSM_BLOCK_SIZE rows at a time and
+    summed per diagonal, so memory is O(block_size * len(b)).
 
-    print(f"[SegmentAnalyzer] Clustering into {n_segments} segments...")
+    Args:
+        a: (n, d) unit-normalized beat features of one segment
+        b: (m, d) unit-normalized beat features of another segment
 
-    # Agglomerative clustering
-    clustering = AgglomerativeClustering(n_clusters=n_segments, linkage='ward')
-    labels = clustering.fit_predict(smoothed)
+    Returns:
+        Highest mean cosine similarity over diagonals covering at least
+        REPEAT_MIN_OVERLAP of the shorter segment (-1 if none does)
+    """
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return -1.0
+
+    # Diagonal index k = column - row + (n - 1), in [0, n + m - 2]
+    sums = np.zeros(n + m - 1)
+    cols = np.arange(m)
+    for lo in range(0, n, block_size):
+        block = a[lo:lo + block_size] @ b.T
+        rows = np.arange(lo, lo + len(block))
+        k = (cols[None, :] - rows[:, None] + n - 1).ravel()
+        sums += np.bincount(k, weights=block.ravel(), minlength=n + m - 1)
+
+    k = np.arange(n + m - 1)
+    lengths = np.minimum.reduce([k + 1, n + m - 1 - k, np.full_like(k, min(n, m))])
+    valid = lengths >= max(1, REPEAT_MIN_OVERLAP * min(n, m))
+    return float(np.max(sums[valid] / lengths[valid])) if np.any(valid) else -1.0
+
+
+def find_repeat_groups(unit_features: np.ndarray, boundaries: List[int]) -> List[int]:
+    """
+    Group segments that repeat the same material.
 
-    # Find boundaries where cluster labels change
-    boundaries = [0]
-    for i in range(1, len(labels)):
-        if labels[i] != labels[i-1]:
-            boundaries.append(i)
-    boundaries.append(len(labels))
+    Segments are compared pairwise with diagonal_similarity(); pairs above
+    REPEAT_SIMILARITY (and within a factor of two in length) are joined, and
+    groups are the connected components.
 
-    # Convert frame indices to times
-    boundary_times = [frame_times[b] for b in boundaries[:-1]]
-    boundary_times.append(duration)
+    Args:
+        unit_features: (n_units, d) normalized beat-synchronous features
+        boundaries: Unit index where each segment starts, plus the end index
 
-    print(f"[SegmentAnalyzer] Found {len(boundary_times)-1} segments")
+    Returns:
+        Group id per segment, numbered in order of first appearance; segments
+        that repeat share an id
+    """
+    n_segments = len(boundaries) - 1
+    norms = np.linalg.norm(unit_features, axis=1, keepdims=True)
+    units = unit_features / np.maximum(norms, 1e-9)
+    parts = [units[boundaries[i]:boundaries[i + 1]] for i in range(n_segments)]
 
-    # ====================
-    # 3. EXTRACT GLOBAL FEATURES
-    # ====================
-    print("[SegmentAnalyzer] Extracting rhythm and beat information...")
+    parent = list(range(n_segments))
 
-    # Load with Essentia for rhythm analysis
-    loader = es.MonoLoader(filename=audio_path, sampleRate=sr)
-    y_essentia = loader()
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
 
-    rhythm_extractor = es.RhythmExtractor2013()
-    bpm, beats, _, _, _ = rhythm_extractor(y_essentia)
+    for i in range(n_segments):
+        for j in range(i + 1, n_segments):
+            shorter, longer = sorted((len(parts[i]), len(parts[j])))
+            if shorter == 0 or longer > 2 * shorter:
+                continue
+            if diagonal_similarity(parts[i], parts[j]) >= REPEAT_SIMILARITY:
+                parent[find(j)] = find(i)
 
-    # ====================
-    # 4. PER-SEGMENT FEATURE EXTRACTION
-    # ====================
-    print("[SegmentAnalyzer] Extracting per-segment features...")
+    group_ids = {}
+    return [group_ids.setdefault(find(i), len(group_ids)) for i in range(n_segments)]
 
-    # Frame-based features for segments
-    rms_extractor = es.RMS()
-    centroid_extractor = es.Centroid(range=sr//2)
-    rolloff_extractor = es.RollOff()
 
-    frame_energies = []
-    frame_centroids = []
-    frame_rolloffs = []
-    frame_times_detailed = []
+def novelty_curve(unit_features: np.ndarray, window: int = NOVELTY_WINDOW_BEATS) -> np.ndarray:
+    """
+    How much the music changes at each beat.
+
+    Novelty at unit i is the distance between the mean features of the
+    `window` units before it and the `window` units from it on (windows are
+    clipped at the edges). Means come from prefix sums, so the curve is O(n).
+
+    Args:
+        unit_features: (n_units, d) normalized beat-synchronous features
+        window: Units averaged on each side
+
+    Returns:
+        (n_units,) novelty; 0 at unit 0
+    """
+    n = len(unit_features)
+    prefix = np.vstack([np.zeros((1, unit_features.shape[1])), np.cumsum(unit_features, axis=0)])
+    i = np.arange(n)
+    lo = np.maximum(i - window, 0)
+    hi = np.minimum(i + window, n)
+
+    before = (prefix[i] - prefix[lo]) / np.maximum(i - lo, 1)[:, None]
+    after = (prefix[hi] - prefix[i]) / np.maximum(hi - i, 1)[:, None]
+    novelty = np.linalg.norm(after - before, axis=1)
+    novelty[0] = 0.0
+    return novelty
 
-    for i in range(0, len(y_essentia) - frame_size, hop_size):
-        frame = y_essentia[i:i+frame_size]
-        windowed = window(frame)
-        spec = spectrum(windowed)
 
-        frame_energies.append(rms_extractor(frame))
-        frame_centroids.append(centroid_extractor(spec))
-        frame_rolloffs.append(rolloff_extractor(spec))
-        frame_times_detailed.append(i / sr)
+def count_segments(novelty: np.ndarray) -> int:
+    """
+    Number of segments implied by the novelty peaks.
 
-    frame_energies = np.array(frame_energies)
-    frame_centroids = np.array(frame_centroids)
-    frame_rolloffs = np.array(frame_rolloffs)
-    frame_times_detailed = np.array(frame_times_detailed)
+    Peaks must stand NOVELTY_PROMINENCE standard deviations above their
+    surroundings and be NOVELTY_MIN_DISTANCE units apart.
+    """
+    if len(novelty) < 3 or np.std(novelty) == 0:
+        return 1
+    peaks, _ = find_peaks(novelty, distance=NOVELTY_MIN_DISTANCE,
+                          prominence=NOVELTY_PROMINENCE * np.std(novelty))
+    return len(peaks) + 1
+
+
+def segment_from_features(features: Dict[str, np.ndarray], beats: np.ndarray,
+                          duration: float, target_segments: int = None,
+                          offset: float = 0.0,
+                          profiler: StepProfiler = None,
+                          return_tree: bool = False):
+    """
+    Cluster beat-synchronous features into contiguous labeled segments.
+
+    Args:
+        features: extract_segmentation_features() output (file times)
+        beats: Beat times in seconds (file times)
+        duration: Length of the analyzed audio in seconds
+        target_segments: Target number of segments (default: auto-detect)
+        offset: File time of the analyzed audio's start
+        profiler: Optional StepProfiler for the phases
+        return_tree: Also return the section/phrase/bar tree (build_structure_tree)
+
+    Returns:
+        Labeled segments (see analyze_segments), or (segments, tree) with return_tree
+    """
+    if profiler is None:
+        profiler = StepProfiler(enabled=False)
+
+    beats = np.sort(np.asarray(beats, dtype=np.float64))
 
     # ====================
-    # 5. BUILD SEGMENT OBJECTS
+    # BOUNDARY DETECTION VIA CLUSTERING
     # ====================
-    segments = []
+    print("[SegmentAnalyzer] Detecting segment boundaries...")
+
+    # Beat-synchronous, normalized features
+    with profiler.step('normalize'):
+        mfccs_array, frame_times = beat_sync_features(features['mfcc'], features['times'], beats,
+                                                      offset, offset + duration)
+
+        scaler = StandardScaler()
+        mfccs_normalized = scaler.fit_transform(mfccs_array) if len(mfccs_array) > 1 else mfccs_array
+
+    if len(mfccs_normalized) < max(1, target_segments or 1):
+        # Silent or very short audio: too few units to cluster, one segment for the whole range
+        print(f"[SegmentAnalyzer] Only {len(mfccs_normalized)} beat units; using one segment")
+        index = _RangeIndex(features, beats)
+        segments = index.nodes([offset], [offset + duration])
+        segments[0].update(label='full', repeat_group=0)
+        if not return_tree:
+            return segments
+        return segments, build_structure_tree(segments, index, beats)
+
+    # Determine number of clusters
+    if target_segments is None:
+        # Auto-detect: one segment per significant change in the music
+        with profiler.step('novelty'):
+            n_segments = count_segments(novelty_curve(mfccs_normalized))
+        print(f"[SegmentAnalyzer] Novelty peaks suggest {n_segments} segments")
+    else:
+        n_segments = target_segments
+    n_segments = max(1, min(n_segments, len(mfccs_normalized)))
+
+    print(f"[SegmentAnalyzer] Clustering {len(mfccs_normalized)} beats into {n_segments} segments...")
+
+    # Agglomerative clustering; the chain connectivity only lets neighbouring
+    # beats merge, so every cluster is one contiguous segment
+    with profiler.step('clustering'):
+        if n_segments > 1:
+            n_units = len(mfccs_normalized)
+            connectivity = diags([np.ones(n_units - 1), np.ones(n_units - 1)], [-1, 1])
+            clustering = AgglomerativeClustering(n_clusters=n_segments, linkage='ward',
+                                                 connectivity=connectivity)
+            labels = clustering.fit_predict(mfccs_normalized)
+        else:
+            labels = np.zeros(len(mfccs_normalized), dtype=np.int64)
+
+    # Find boundaries where cluster labels change
+    boundaries = [0] + list(np.flatnonzero(np.diff(labels)) + 1) + [len(labels)]
 
-    for i in range(len(boundary_times) - 1):
-        start = boundary_times[i]
-        end = boundary_times[i + 1]
+    # Convert unit indices to times
+    boundary_times = [frame_times[b] for b in boundaries[:-1]]
+    boundary_times.append(offset + duration)
 
-        # Find frames in this segment
-        segment_mask = (frame_times_detailed >= start) & (frame_times_detailed < end)
+    print(f"[SegmentAnalyzer] Found {len(boundary_times)-1} segments")
 
-        # Average features for this segment
-        segment_energy = np.mean(frame_energies[segment_mask]) if np.any(segment_mask) else 0.0
-        segment_centroid = np.mean(frame_centroids[segment_mask]) if np.any(segment_mask) else 0.0
-        segment_rolloff = np.mean(frame_rolloffs[segment_mask]) if np.any(segment_mask) else 0.0
+    # ====================
+    # BUILD SEGMENT OBJECTS
+    # ====================
+    print("[SegmentAnalyzer] Extracting per-segment features...")
 
-        # Count beats in this segment
-        beats_in_segment = np.sum((beats >= start) & (beats < end))
+    # Prefix sums: each segment mean is O(1) after a binary search for its frames
+    index = _RangeIndex(features, beats)
+    segments = index.nodes(boundary_times[:-1], boundary_times[1:])
 
-        segments.append({
-            'start': float(start),
-            'end': float(end),
-            'duration': float(end - start),
-            'energy': float(segment_energy),
-            'spectral_centroid': float(segment_centroid),
-            'spectral_rolloff': float(segment_rolloff),
-            'beats_count': int(beats_in_segment),
-        })
+    # ====================
+    # REPEATED SECTIONS
+    # ====================
+    with profiler.step('repeats'):
+        groups = find_repeat_groups(mfccs_normalized, boundaries)
+    for segment, group in zip(segments, groups):
+        segment['repeat_group'] = group
+    print(f"[SegmentAnalyzer] {len(set(groups))} distinct sections "
+          f"({len(groups) - len(set(groups))} repeats)")
 
     # ====================
-    # 6. LABEL INFERENCE
+    # LABEL INFERENCE
     # ====================
     print("[SegmentAnalyzer] Inferring structural labels...")
 
-    segments = infer_labels(segments, duration)
+    with profiler.step('labels'):
+        segments = infer_labels(segments, duration)
+
+    if not return_tree:
+        print("[SegmentAnalyzer] Segmentation complete")
+        return segments
+
+    with profiler.step('structure_tree'):
+        tree = build_structure_tree(segments, index, beats)
+    print(f"[SegmentAnalyzer] Structure tree: {len(tree['levels']['phrase'])} phrases, "
+          f"{len(tree['levels']['bar'])} bars")
 
     print("[SegmentAnalyzer] Segmentation complete")
-    return segments
+    return segments, tree
 
 
 def infer_labels(segments: List[Dict], total_duration: float) -> List[Dict]:
@@ -213,6 +690,8 @@ def infer_labels(segments: List[Dict], total_duration: float) -> List[Dict]:
     - High energy segments in middle: Likely chorus
     - Lower energy segments: Likely verse or bridge
     - Very short segments: Transition or bridge
+    - Repeated sections (shared 'repeat_group'): all chorus if the group is
+      louder than average, otherwise all verse
     """
 
     if not segments:
@@ -223,9 +702,20 @@ def infer_labels(segments: List[Dict], total_duration: float) -> List[Dict]:
     mean_energy = np.mean(energies)
     std_energy = np.std(energies)
 
+    # Segments of a windowed analysis start at the window offset
+    origin = segments[0]['start']
+
+    # Mean energy z-score of every group that occurs more than once
+    group_scores = {}
+    for segment, energy in zip(segments, energies):
+        group = segment.get('repeat_group')
+        if group is not None:
+            group_scores.setdefault(group, []).append((energy - mean_energy) / (std_energy + 1e-6))
+    repeated = {g: float(np.mean(scores)) for g, scores in group_scores.items() if len(scores) > 1}
+
     for i, segment in enumerate(segments):
         # Position in track (0.0 = start, 1.0 = end)
-        position = segment['start'] / total_duration
+        position = (segment['start'] - origin) / total_duration
 
         # Energy relative to mean (z-score)
         energy_score = (segment['energy'] - mean_energy) / (std_energy + 1e-6)
@@ -268,6 +758,11 @@ def infer_labels(segments: List[Dict], total_duration: float) -> List[Dict]:
                 else:
                     label = 'bridge'
 
+            # Repeated material: the louder recurring section is the chorus
+            group = segment.get('repeat_group')
+            if group in repeated:
+                label = 'chorus' if repeated[group] > 0 else 'verse'
+
         segment['label'] = label
 
     return segments
@@ -285,14 +780,17 @@ def save_analysis(segments: List[Dict], output_path: str):
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) < 2:
-        print("Usage: python segment_analyzer.py <audio_file> [target_segments]")
+    args = [a for a in sys.argv[1:] if a != '--profile']
+    profile = len(args) != len(sys.argv) - 1
+
+    if len(args) < 1:
+        print("Usage: python -m choreography.segment_analyzer <audio_file> [target_segments] [--profile]")
         sys.exit(1)
 
-    audio_path = sys.argv[1]
-    target = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    audio_path = args[0]
+    target = int(args[1]) if len(args) > 1 else None
 
-    segments = analyze_segments(audio_path, target)
+    segments = analyze_segments(audio_path, target, profile=profile)
 
     print("\n" + "="*80)
     print("SEGMENTATION RESULTS")
@@ -305,6 +803,7 @@ if __name__ == "__main__":
         print(f"  Spectral Centroid: {seg['spectral_centroid']:.2f} Hz")
         print(f"  Spectral Rolloff: {seg['spectral_rolloff']:.2f} Hz")
         print(f"  Beats: {seg['beats_count']}")
+        print(f"  Repeat group: {seg['repeat_group']}")
 
     # Save to file
     from pathlib import Path
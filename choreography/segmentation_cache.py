@@ -0,0 +1,180 @@
+"""
+Segmentation Feature Cache
+
+Persists the frame features and beats computed by analyze_segments() as .npy
+files, so segmenting a file again (another target_segments, a new session)
+only redoes clustering and labeling. Arrays are loaded memory-mapped: nothing
+is read from disk until a range of it is used.
+
+Entries are keyed by a hash of the audio content, the analyzed window and the
+frame parameters, so renamed or copied files hit the cache and edited files
+or changed parameters miss it. Layout:
+
+    <CACHE_DIR>/<key>/times.npy, mfcc.npy, energy.npy, ..., beats.npy, meta.json
+
+CACHE_DIR is a per-user cache directory ($REACHY_SEGMENTATION_CACHE_DIR, else
+$XDG_CACHE_HOME or ~/.cache, under reachy-mini-choreography/segmentation), so
+read-only installs work. The cache is capped at MAX_CACHE_BYTES: after each
+write the least recently used entries (by meta.json mtime, refreshed on every
+hit) are evicted.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+CACHE_DIR = Path(os.environ.get(
+    'REACHY_SEGMENTATION_CACHE_DIR',
+    Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / ".cache") / "reachy-mini-choreography" / "segmentation"))
+
+# Total size kept on disk ($REACHY_SEGMENTATION_CACHE_MB); least recently used entries are evicted beyond it
+MAX_CACHE_BYTES = int(float(os.environ.get('REACHY_SEGMENTATION_CACHE_MB', 1024)) * (1 << 20))
+
+# Bump when the stored features change meaning
+CACHE_VERSION = 1
+
+# (path, mtime_ns, size) -> content hash
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_hash(audio_path: str) -> str:
+    """SHA-1 of the file content (memoized per path, mtime and size)."""
+    stat = os.stat(audio_path)
+    memo_key = (os.path.abspath(audio_path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _hash_memo:
+        digest = hashlib.sha1()
+        with open(audio_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def cache_key(audio_path: str, start: float, end: Optional[float],
+              params: Dict[str, Any]) -> Optional[str]:
+    """
+    Key of one file window analyzed with the given frame parameters.
+
+    Returns:
+        Hex key, or None if the file cannot be read
+    """
+    try:
+        content = file_hash(audio_path)
+    except OSError:
+        return None
+    spec = {
+        'audio': content,
+        'start': round(float(start), 3),
+        'end': None if end is None else round(float(end), 3),
+        'version': CACHE_VERSION,
+        **params,
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def load(key: str):
+    """
+    Load a cached entry with memory-mapped (read-only) arrays.
+
+    Returns:
+        (features, beats, duration) or None if the entry does not exist
+    """
+    entry = CACHE_DIR / key
+    meta_path = entry / 'meta.json'
+    if not meta_path.exists():
+        return None
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        features = {name: np.load(entry / f"{name}.npy", mmap_mode='r') for name in meta['features']}
+        beats = np.load(entry / 'beats.npy', mmap_mode='r')
+    except Exception as e:
+        print(f"[SegmentationCache] Ignoring unreadable entry {key}: {e}")
+        return None
+    try:
+        # Mark as recently used for eviction
+        os.utime(meta_path)
+    except OSError:
+        pass
+    return features, beats, meta['duration']
+
+
+def save(key: str, features: Dict[str, np.ndarray], beats: np.ndarray,
+         duration: float, params: Dict[str, Any]) -> bool:
+    """
+    Store an entry. Written to a temporary directory and renamed into place,
+    so readers never see a partial entry; older entries are then evicted
+    down to MAX_CACHE_BYTES.
+
+    Returns:
+        True if the entry was written
+    """
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=CACHE_DIR, prefix=f".{key}-"))
+        for name, values in features.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(values))
+        np.save(tmp / 'beats.npy', np.asarray(beats, dtype=np.float64))
+        with open(tmp / 'meta.json', 'w') as f:
+            json.dump({'features': list(features), 'duration': float(duration),
+                       'params': params, 'version': CACHE_VERSION}, f, indent=2)
+        try:
+            os.rename(tmp, CACHE_DIR / key)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+        evict(keep=key)
+        return True
+    except Exception as e:
+        print(f"[SegmentationCache] Could not write entry {key}: {e}")
+        return False
+
+
+def evict(max_bytes: Optional[int] = None, keep: Optional[str] = None) -> int:
+    """
+    Delete least recently used entries until the cache fits in max_bytes.
+
+    Args:
+        max_bytes: Size limit (default MAX_CACHE_BYTES)
+        keep: Entry never evicted (the one just written)
+
+    Returns:
+        Number of entries deleted
+    """
+    limit = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    entries = []
+    try:
+        for entry in CACHE_DIR.iterdir():
+            meta_path = entry / 'meta.json'
+            if entry.name.startswith('.') or not meta_path.exists():
+                continue
+            size = sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+            entries.append((meta_path.stat().st_mtime, size, entry))
+    except OSError:
+        return 0
+
+    total = sum(size for _, size, _ in entries)
+    deleted = 0
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= limit:
+            break
+        if entry.name == keep:
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        deleted += 1
+    if deleted:
+        print(f"[SegmentationCache] Evicted {deleted} least recently used entries")
+    return deleted
+
+
+def clear():
+    """Delete all cached entries."""
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
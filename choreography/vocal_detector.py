@@ -0,0 +1,160 @@
+"""
+Time-Resolved Vocal/Instrumental Segmentation
+
+Derives vocal and instrumental intervals from the frame-level features that
+AudioAnalyzer already computes (see feature_store.py), so no extra pass over
+the audio is needed:
+
+1. Frame vocal score from pitch salience (sung melody is strongly pitched)
+   and harmonic ratio (1 - percussive ratio)
+2. Moving-average smoothing over ~1 second
+3. Hysteresis thresholding (enter vocal above ON, leave below OFF)
+4. Merge intervals shorter than a minimum duration into their neighbours
+"""
+
+import numpy as np
+from scipy.ndimage import uniform_filter1d
+from typing import List, Dict, Any, Optional
+
+from .feature_store import FeatureStore
+
+
+# Pitch salience / harmonic ratio ranges mapped to a 0-1 score
+SALIENCE_FLOOR = 0.2
+SALIENCE_CEIL = 0.45
+HARMONIC_FLOOR = 0.5
+HARMONIC_CEIL = 0.8
+SALIENCE_WEIGHT = 0.65
+
+# Hysteresis thresholds on the smoothed vocal score
+ON_THRESHOLD = 0.55
+OFF_THRESHOLD = 0.4
+
+# Frames quieter than this fraction of the loudest frames never count as vocal
+SILENCE_RATIO = 0.05
+
+
+def frame_vocal_scores(store: FeatureStore, smoothing: float = 1.0) -> np.ndarray:
+    """
+    Compute a smoothed 0-1 vocal likelihood for every frame.
+
+    Args:
+        store: Frame features with 'pitch_salience' and 'percussive_ratio'
+        smoothing: Moving-average window in seconds
+
+    Returns:
+        float32 array, one score per frame
+    """
+    salience = store.column('pitch_salience')
+    harmonic = 1.0 - store.column('percussive_ratio')
+
+    salience_score = np.clip((salience - SALIENCE_FLOOR) / (SALIENCE_CEIL - SALIENCE_FLOOR), 0.0, 1.0)
+    harmonic_score = np.clip((harmonic - HARMONIC_FLOOR) / (HARMONIC_CEIL - HARMONIC_FLOOR), 0.0, 1.0)
+    scores = SALIENCE_WEIGHT * salience_score + (1.0 - SALIENCE_WEIGHT) * harmonic_score
+
+    if 'energy' in store and len(scores):
+        energy = store.column('energy')
+        loud = np.percentile(energy, 95)
+        scores = np.where(energy < loud * SILENCE_RATIO, 0.0, scores)
+
+    window = max(1, int(round(smoothing / store.frame_period)))
+    return uniform_filter1d(scores.astype(np.float32), size=window, mode='nearest')
+
+
+def _hysteresis(scores: np.ndarray, on: float, off: float) -> np.ndarray:
+    """Binary vocal mask: switch on above `on`, stay on until below `off`."""
+    mask = np.zeros(len(scores), dtype=bool)
+    active = False
+    # Only frames that cross a threshold can change state, so walk those
+    for i in np.flatnonzero((scores >= on) | (scores < off)):
+        if not active and scores[i] >= on:
+            active = True
+            start = i
+        elif active and scores[i] < off:
+            mask[start:i] = True
+            active = False
+    if active:
+        mask[start:] = True
+    return mask
+
+
+def _mask_to_runs(mask: np.ndarray) -> List[List[int]]:
+    """Convert a boolean mask into [value, start_frame, end_frame] runs."""
+    if len(mask) == 0:
+        return []
+    change = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [len(mask)]))
+    return [[bool(mask[s]), int(s), int(e)] for s, e in zip(starts, ends)]
+
+
+def detect_vocal_sections(store: FeatureStore,
+                          end_time: Optional[float] = None,
+                          min_duration: float = 2.0,
+                          smoothing: float = 1.0,
+                          on_threshold: float = ON_THRESHOLD,
+                          off_threshold: float = OFF_THRESHOLD) -> Dict[str, Any]:
+    """
+    Split the track into alternating vocal and instrumental intervals.
+
+    Args:
+        store: Frame features from the shared analysis pass
+        end_time: Content end in seconds (frames after it are ignored)
+        min_duration: Intervals shorter than this are merged into neighbours
+        smoothing: Score smoothing window in seconds
+        on_threshold: Score above which a vocal interval starts
+        off_threshold: Score below which a vocal interval ends
+
+    Returns:
+        {
+            'vocal_sections': [{'start', 'end', 'duration', 'vocal_prob'}],
+            'instrumental_sections': [{'start', 'end', 'duration', 'vocal_prob'}],
+            'vocal_fraction': float  # Share of the content covered by vocals
+        }
+    """
+    empty = {'vocal_sections': [], 'instrumental_sections': [], 'vocal_fraction': 0.0}
+    if store is None or len(store) == 0:
+        return empty
+
+    n_frames = len(store)
+    if end_time is not None:
+        n_frames = max(1, min(n_frames, store.frame_index(end_time)))
+
+    scores = frame_vocal_scores(store, smoothing)[:n_frames]
+    runs = _mask_to_runs(_hysteresis(scores, on_threshold, off_threshold))
+
+    # Absorb short runs into the previous run (or the next one at the start)
+    min_frames = max(1, int(round(min_duration / store.frame_period)))
+    merged = []
+    for run in runs:
+        if merged and (run[2] - run[1] < min_frames or run[0] == merged[-1][0]):
+            merged[-1][2] = run[2]
+        else:
+            merged.append(run)
+    if len(merged) > 1 and merged[0][2] - merged[0][1] < min_frames:
+        merged[1][1] = merged[0][1]
+        merged.pop(0)
+
+    period = store.frame_period
+    last_time = end_time if end_time is not None else store.offset + n_frames * period
+    result = dict(empty, vocal_sections=[], instrumental_sections=[])
+    vocal_time = 0.0
+
+    for is_vocal, lo, hi in merged:
+        start = store.offset + lo * period
+        end = last_time if hi >= n_frames else store.offset + hi * period
+        section = {
+            'start': float(start),
+            'end': float(end),
+            'duration': float(end - start),
+            'vocal_prob': float(np.mean(scores[lo:hi])),
+        }
+        if is_vocal:
+            result['vocal_sections'].append(section)
+            vocal_time += end - start
+        else:
+            result['instrumental_sections'].append(section)
+
+    total = last_time - store.offset
+    result['vocal_fraction'] = float(vocal_time / total) if total > 0 else 0.0
+    return result
@@ -9,10 +9,13 @@ import numpy.typing as npt
 from reachy_mini.motion.move import Move
 from reachy_mini.motion.recorded_move import RecordedMoves, RecordedMove
 
+from choreography.beat_grid import BeatGrid
+
 class Choreography(Move):
     """A composite move that sequences multiple RecordedMove objects based on a JSON definition."""
 
-    def __init__(self, choreography_path: str, dances_library: RecordedMoves, emotions_library: RecordedMoves):
+    def __init__(self, choreography_path: str, dances_library: RecordedMoves, emotions_library: RecordedMoves,
+                 beat_grid: BeatGrid | None = None):
         """
         Initialize the Choreography move.
 
@@ -20,11 +23,16 @@ class Choreography(Move):
             choreography_path (str): Path to the choreography JSON file.
             dances_library (RecordedMoves): An instance of RecordedMoves for dances.
             emotions_library (RecordedMoves): An instance of RecordedMoves for emotions.
+            beat_grid (BeatGrid | None): Detected beats of the track. Defaults to the
+                'beat_grid' stored in the choreography JSON, if any.
         """
         with open(choreography_path, 'r') as f:
             choreography_data = json.load(f)
 
         self.bpm = choreography_data['bpm']
+        if beat_grid is None and choreography_data.get('beat_grid'):
+            beat_grid = BeatGrid.from_dict(choreography_data['beat_grid'])
+        self.beat_grid = beat_grid
         self.sequence_data = choreography_data['sequence']
         self.dances_library = dances_library
         self.emotions_library = emotions_library
@@ -55,6 +63,25 @@ class Choreography(Move):
             # but the _total_duration is already set.
             self._prepare_sequence_with_fixed_duration()
 
+    def _start_move_at(self, move_info: Dict[str, Any], current_time: float) -> float:
+        """
+        Start time of the next move. Beat-aligned entries carry a 'start_time'
+        (seconds from the choreography start); the previous move is cut at it,
+        or holds its last pose until it. Start times must increase: an entry
+        starting before the previous move began is rejected.
+        """
+        if move_info.get('start_time') is None:
+            return current_time
+        start_time = float(move_info['start_time'])
+        previous = self.start_times[-1] if self.start_times else 0.0
+        if start_time < 0 or (self.start_times and start_time <= previous):
+            move_name = move_info.get('move') or move_info.get('move_name')
+            raise ValueError(f"Move '{move_name}' starts at {start_time:.3f}s, not after the previous "
+                             f"move ({previous:.3f}s); start times must increase through the sequence")
+        if self.durations:
+            self.durations[-1] = start_time - previous
+        return start_time
+
     def _prepare_sequence(self):
         """
         Load the moves from the library and calculate durations and start times.
@@ -80,6 +107,7 @@ class Choreography(Move):
                 raise ValueError(f"Move '{move_name}' not found in any known move list.")
 
             base_move = library.get(move_name)
+            current_time = self._start_move_at(move_info, current_time)
 
             cycle_duration = base_move.duration
 
@@ -114,6 +142,7 @@ class Choreography(Move):
                 raise ValueError(f"Move '{move_name}' not found in any known move list.")
 
             base_move = library.get(move_name)
+            current_time = self._start_move_at(move_info, current_time)
             
             cycle_duration = base_move.duration
             
@@ -165,6 +194,12 @@ class Choreography(Move):
                     move_name = move_info.get('move') or move_info.get('move_name', 'unknown')
                     return move_name, i, start_time, self.durations[i]
 
+        # Before a beat-aligned first move, report the move about to start
+        if self.moves and self.sequence_data and t < self.start_times[0]:
+            move_info = self.sequence_data[0]
+            move_name = move_info.get('move') or move_info.get('move_name', 'unknown')
+            return move_name, 0, self.start_times[0], self.durations[0]
+
         # If past the last move, return info for the last move
         if self.moves:
             last_idx = len(self.moves) - 1
@@ -176,6 +211,15 @@ class Choreography(Move):
 
         return "", -1, 0.0, 0.0
 
+    def get_beat_position(self, t: float) -> dict | None:
+        """
+        Returns the musical position (beat, bar, beat_in_bar, phase) at time t,
+        or None if no beat grid is available.
+        """
+        if self.beat_grid is None:
+            return None
+        return self.beat_grid.position(t)
+
     @property
     def duration(self) -> float:
         """Return the total duration of the choreography."""
@@ -198,6 +242,10 @@ class Choreography(Move):
                 active_move_index = i
                 break
         
+        if active_move_index == -1 and self.moves and t < self.start_times[0]:
+            # Before a beat-aligned first move: hold its first pose
+            return self.moves[0].evaluate(0.0)
+
         if active_move_index == -1:
             # This can happen at the very end of the choreography
             # Return the last pose of the last move
@@ -209,6 +257,8 @@ class Choreography(Move):
         
         # Calculate the local time for the active move
         local_time = t - move_start_time
+        # A beat-aligned move holds its last pose until the next one starts
+        local_time = min(local_time, active_move.timestamps[-1] - 1e-6)
         
         return active_move.evaluate(local_time)
 
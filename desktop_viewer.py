@@ -22,9 +22,13 @@ from reachy_mini.daemon.backend.mujoco import MujocoBackend
 
 # Import choreography modules
 from choreography.react_agent import ReActChoreographer
+from choreography.beat_grid import BeatGrid
+from choreography.analysis_worker import AnalysisJobManager, DONE
+from choreography.move_library import open_library, LocalRecordedMoves
+from choreography.move_catalog import JARRING_TRANSITION
+from choreography.move_metadata_cache import get_catalog
 from choreography_player import Choreography
 from reachy_mini import ReachyMini
-from reachy_mini.motion.recorded_move import RecordedMoves
 
 # Custom GLFW renderer using Fixed Pipeline (OpenGL 2.1 compatible)
 class GlfwFixedRenderer(FixedPipelineRenderer):
@@ -220,7 +224,7 @@ class AudioAnalysisState:
         return self._analysis_data
 
     def set_analysis(self, data):
-        """Only way to set analysis data - must be called from analyze_audio()."""
+        """Only way to set analysis data - must be called from poll_analysis()."""
         self._analysis_data = data
 
     def clear(self):
@@ -231,7 +235,7 @@ class AudioAnalysisState:
 audio_state = AudioAnalysisState()
 choreography_recommendation = None
 llm_provider = "anthropic"  # or "ollama", "huggingface"
-is_analyzing = False
+analysis_jobs = AnalysisJobManager()  # Background audio analysis (worker process)
 is_generating = False
 user_feedback = ""  # For RL training
 previous_choreography = None  # Store for feedback comparison
@@ -239,6 +243,7 @@ selected_move_index = -1
 recent_audio_files = []  # Cache of recent audio files from Downloads
 is_playing_audio = False  # Audio playback status
 audio_initialized = False  # Pygame mixer initialization status
+transition_warnings_cache = (None, {})  # (id of the move list, {index: cost}) for the shown recommendation
 
 def load_moves():
     """Load moves from moves.json."""
@@ -278,6 +283,43 @@ def load_moves():
         print(f"Error loading moves.json: {e}")
 
 
+def get_transition_warnings(choreo_moves):
+    """
+    Jarring transitions of a recommended sequence, from the cached transition costs.
+
+    Idle and manual entries move the robot to their own pose, so only
+    back-to-back library moves (and repeated cycles) are checked.
+
+    Returns:
+        {entry index: worst transition cost into or within that entry}
+    """
+    global transition_warnings_cache
+    if transition_warnings_cache[0] == id(choreo_moves):
+        return transition_warnings_cache[1]
+
+    warnings = {}
+    try:
+        catalog = get_catalog()
+        previous = None
+        for i, move in enumerate(choreo_moves):
+            name = move.get('move') or move.get('move_name')
+            if name in (None, 'idle', 'manual'):
+                previous = None
+                continue
+            costs = [catalog.transition_cost(previous, name) if previous else None]
+            if move.get('cycles', 1) > 1:
+                costs.append(catalog.transition_cost(name, name))
+            costs = [cost for cost in costs if cost is not None and cost > JARRING_TRANSITION]
+            if costs:
+                warnings[i] = max(costs)
+            previous = name
+    except Exception as e:
+        print(f"[Viewer] Could not check transitions: {e}")
+
+    transition_warnings_cache = (id(choreo_moves), warnings)
+    return warnings
+
+
 def check_daemon_connection():
     """Check if daemon is responding."""
     global daemon_connected
@@ -633,8 +675,8 @@ def import_audio_file():
         return False
 
 def analyze_audio():
-    """Analyze imported audio file by calling the standalone analysis script."""
-    global is_analyzing, status_message, status_message_time
+    """Start analyzing the imported audio file in the background worker (returns immediately)."""
+    global status_message, status_message_time
 
     if not audio_state.audio_path:
         status_message = "✗ No audio file selected"
@@ -642,45 +684,35 @@ def analyze_audio():
         return
 
     try:
-        is_analyzing = True
+        analysis_jobs.start(audio_state.audio_path)
         status_message = "Analyzing audio..."
         status_message_time = time.time()
+    except Exception as e:
+        status_message = f"✗ Analysis error: {str(e)[:30]}"
+        status_message_time = time.time()
+        print(f"Error starting audio analysis: {e}")
 
-        # Command to run the standalone analysis script
-        command = [sys.executable, "run_essentia_analysis.py", audio_state.audio_path]
-
-        # Execute the script as a subprocess
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            check=True  # This will raise a CalledProcessError if the script returns a non-zero exit code
-        )
+def poll_analysis():
+    """Collect background analysis progress/results; called once per frame from the render loop."""
+    global status_message, status_message_time
 
-        # Parse the JSON output from the script's stdout
-        analysis_result = json.loads(result.stdout)
+    finished = analysis_jobs.poll()
+    if finished is None:
+        return
 
-        is_analyzing = False
-        if analysis_result:
-            audio_state.set_analysis(analysis_result)
-            status_message = f"✓ Analysis complete: {audio_state.analysis['bpm']:.1f} BPM, {audio_state.analysis['duration']:.1f}s"
-            status_message_time = time.time()
-            print(f"Audio analysis complete: {audio_state.analysis['bpm']:.1f} BPM")
-        else:
-            status_message = "✗ Analysis failed"
-            status_message_time = time.time()
+    if finished['audio_path'] != audio_state.audio_path:
+        # A different file was selected while this one was being analyzed
+        print(f"Discarding analysis of {finished['audio_path']} (selection changed)")
+        return
 
-    except subprocess.CalledProcessError as e:
-        is_analyzing = False
-        error_output = e.stderr.strip()
-        status_message = f"✗ Analysis error: {error_output[:50]}"
+    if finished['state'] == DONE:
+        audio_state.set_analysis(finished['result'])
+        status_message = f"✓ Analysis complete: {audio_state.analysis['bpm']:.1f} BPM, {audio_state.analysis['duration']:.1f}s"
         status_message_time = time.time()
-        print(f"Error analyzing audio via subprocess: {error_output}")
-    except Exception as e:
-        is_analyzing = False
-        status_message = f"✗ Analysis error: {str(e)[:30]}"
+        print(f"Audio analysis complete: {audio_state.analysis['bpm']:.1f} BPM")
+    else:
+        status_message = f"✗ Analysis error: {(finished['error'] or 'unknown')[:50]}"
         status_message_time = time.time()
-        print(f"Error processing analysis result: {e}")
 
 def generate_choreography():
     """Generate choreography recommendation using LLM."""
@@ -825,6 +857,8 @@ def export_final_choreography():
             "bpm": choreography_recommendation.get('bpm'),
             "sequence": choreography_recommendation.get('sequence', choreography_recommendation.get('choreography', []))
         }
+        if choreography_recommendation.get('beat_grid'):
+            final_choreo["beat_grid"] = choreography_recommendation['beat_grid']
 
         # Save
         with open(export_path, 'w') as f:
@@ -896,7 +930,8 @@ def play_choreography_with_audio():
                         json.dump(choreography_recommendation, f)
 
                     # Load the choreography from the temp file
-                    choreo_move = Choreography(temp_choreography_path, dances_library, emotions_library)
+                    choreo_move = Choreography(temp_choreography_path, dances_library, emotions_library,
+                                               beat_grid=BeatGrid.from_analysis(audio_state.analysis))
 
                     # Load and play audio
                     pygame.mixer.music.load(audio_state.audio_path)
@@ -923,6 +958,9 @@ def play_choreography_with_audio():
                             move_name, move_idx, _, _ = choreo_move.get_move_at_time(elapsed_time)
                             if move_idx != -1:
                                 current_choreo_move_info = f"Move {move_idx+1}/{len(choreo_move.moves)}: {move_name}"
+                                position = choreo_move.get_beat_position(elapsed_time)
+                                if position is not None:
+                                    current_choreo_move_info += f" | bar {position['bar'] + 1}, beat {position['beat_in_bar'] + 1}"
                                 # Log when we transition to a new move
                                 if move_idx != last_logged_move:
                                     print(f"[TIMING] T={elapsed_time:.3f}s - Move {move_idx+1}/{len(choreo_move.moves)}: {move_name}")
@@ -997,10 +1035,12 @@ def initialize_sdk_in_background():
 
     try:
         reachy = ReachyMini(media_backend="no_media")
-        dances_library = RecordedMoves('pollen-robotics/reachy-mini-dances-library')
-        emotions_library = RecordedMoves('pollen-robotics/reachy-mini-emotions-library')
+        # Local mirror if exported (offline), else Hugging Face
+        dances_library = open_library('pollen-robotics/reachy-mini-dances-library')
+        emotions_library = open_library('pollen-robotics/reachy-mini-emotions-library')
         sdk_initialized = True
-        print("✓ ReachySDK and Move Libraries initialized from Hugging Face.")
+        source = "local mirror" if isinstance(dances_library, LocalRecordedMoves) else "Hugging Face"
+        print(f"✓ ReachySDK and Move Libraries initialized from {source}.")
     except Exception as e:
         print(f"✗ Failed to initialize ReachySDK: {e}")
         sdk_initialized = False
@@ -1120,6 +1160,9 @@ def main():
 
         sim_step += 1
 
+        # Pick up background audio analysis results (non-blocking)
+        poll_analysis()
+
         # --- ImGui Frame ---
         impl.process_inputs()
         imgui.new_frame()
@@ -1411,7 +1454,7 @@ def main():
 
         if choreography_expanded:
             global choreography_recommendation, recent_audio_files, user_feedback
-            global llm_provider, is_analyzing, is_generating, selected_move_index
+            global llm_provider, is_generating, selected_move_index
 
             # Audio import
             imgui.text_colored("Audio File:", 0.3, 1.0, 1.0)
@@ -1447,12 +1490,18 @@ def main():
             # Analysis section
             if audio_state.audio_path and not audio_state.analysis:
                 imgui.spacing()
-                if is_analyzing:
-                    imgui.text_colored("Analyzing...", 1.0, 1.0, 0.3)
+                if analysis_jobs.is_running:
+                    imgui.text_colored(f"Analyzing... ({analysis_jobs.stage})", 1.0, 1.0, 0.3)
+                    imgui.progress_bar(analysis_jobs.progress, (180, 0), f"{analysis_jobs.progress * 100:.0f}%")
+                    imgui.same_line()
+                    if imgui.button("Cancel##analysis", 70, 20):
+                        analysis_jobs.cancel()
+                        status_message = "Analysis cancelled"
+                        status_message_time = time.time()
                 else:
                     if imgui.button("Analyze Audio", 180, 30):
-                        # Run analysis in background thread to avoid blocking
-                        threading.Thread(target=analyze_audio, daemon=True).start()
+                        # Runs in a worker process; poll_analysis() collects the result
+                        analyze_audio()
 
             # Display analysis results (read-only access)
             if audio_state.analysis:
@@ -1574,6 +1623,7 @@ def main():
                 # Scrollable region for all moves
                 imgui.begin_child("move_list", 0, 200, border=True)
 
+                transition_warnings = get_transition_warnings(choreo_moves)
                 for i, move in enumerate(choreo_moves):
                     # Handle both old and new formats
                     move_name = move.get('move') or move.get('move_name', 'unknown')
@@ -1599,6 +1649,10 @@ def main():
                         display_str = f"{i}. {cycles}x {move_name} ({move_type})"
 
                     # Display move
+                    if i in transition_warnings:
+                        # Abrupt pose jump into (or within) this move
+                        imgui.text_colored("!", 1.0, 0.5, 0.2)
+                        imgui.same_line()
                     if imgui.selectable(display_str, selected_move_index == i)[0]:
                         selected_move_index = i
 
@@ -1608,6 +1662,8 @@ def main():
                         imgui.text(f"Type: {move_type}")
                         if move_name not in ['idle', 'manual']:
                             imgui.text(f"Cycles: {cycles}")
+                        if i in transition_warnings:
+                            imgui.text_colored(f"Jarring transition (cost {transition_warnings[i]:.2f})", 1.0, 0.5, 0.2)
                         imgui.text(f"Reasoning: {move.get('reasoning', 'N/A')}")
                         imgui.end_tooltip()
 
@@ -1711,6 +1767,7 @@ def main():
         time.sleep(max(0, model.opt.timestep - (time.time() - loop_start)))
 
     # --- Shutdown ---
+    analysis_jobs.shutdown()
     impl.shutdown()
     glfw.terminate()
 
@@ -12,6 +12,8 @@ What it does
     measures/YYYY-MM-DD_HH-MM-SS/<move>_errors.png
     measures/YYYY-MM-DD_HH-MM-SS/<move>_xyzrpy_vs_time.png
 - Logs a warning on every sample where the target pose equals the previous one.
+- Optionally follows the detected beats of an analyzed track (ANALYSIS_JSON)
+  instead of a constant BPM, so beat time tracks tempo drift.
 
 Dependencies: numpy, matplotlib, scipy, reachy_mini
 Style: ruff-compatible docstrings and type hints.
@@ -19,11 +21,13 @@ Style: ruff-compatible docstrings and type hints.
 
 from __future__ import annotations
 
+import json
 import logging
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -33,12 +37,16 @@ from scipy.spatial.transform import Rotation as R
 from reachy_mini import ReachyMini, utils
 from reachy_mini.utils.interpolation import distance_between_poses
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from choreography.beat_grid import BeatGrid  # noqa: E402
+
 # ---------------- Configuration (tweak as needed) ----------------
 BPM: float = 120.0  # tempo for all moves
 BEATS_PER_MOVE: float = 30.0  # duration per move
 SAMPLE_HZ: float = 200.0  # control + measurement rate
 NEUTRAL_POS = np.array([0.0, 0.0, 0.0])  # meters
 NEUTRAL_EUL = np.zeros(3)  # radians
+ANALYSIS_JSON: Optional[Path] = None  # AudioAnalyzer output; uses its beat grid instead of BPM
 # -----------------------------------------------------------------
 
 
@@ -245,9 +253,14 @@ def run_one_move(
     bpm: float,
     beats_total: float,
     sample_hz: float,
+    beat_grid: Optional[BeatGrid] = None,
 ) -> Tuple[Tuple[np.ndarray, ...], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """Generate targets for a single move and measure tracking until beats_total.
 
+    With a beat grid, beat time follows the detected beats from the grid's
+    first beat (elapsed seconds are mapped through the grid) instead of
+    advancing at a constant ``bpm``.
+
     Returns
     -------
     data
@@ -290,6 +303,8 @@ def run_one_move(
     t_beats = 0.0
     prev_tick = time.perf_counter()
     next_sched = prev_tick
+    start_tick = prev_tick
+    grid_origin = float(beat_grid.beats[0]) if beat_grid is not None else 0.0
 
     logging.info(
         "Move '%s' start (BPM=%.1f, duration=%.1f beats)", move_name, bpm, beats_total
@@ -351,7 +366,10 @@ def run_one_move(
         now = time.perf_counter()
         dt_real = now - prev_tick
         prev_tick = now
-        t_beats += dt_real * (bpm / 60.0)
+        if beat_grid is not None:
+            t_beats = beat_grid.time_to_beat(grid_origin + now - start_tick)
+        else:
+            t_beats += dt_real * (bpm / 60.0)
 
     # Convert to arrays
     t = np.asarray(t_list, dtype=float)
@@ -379,6 +397,13 @@ def main() -> None:
     setup_logging()
     run_dir = create_run_dir(Path("measures"))
 
+    beat_grid = None
+    if ANALYSIS_JSON is not None:
+        with open(ANALYSIS_JSON) as f:
+            beat_grid = BeatGrid.from_analysis(json.load(f))
+        if beat_grid is not None:
+            logging.info("Using beat grid from %s (%d beats)", ANALYSIS_JSON, len(beat_grid))
+
     with ReachyMini() as mini:
         mini.wake_up()
         try:
@@ -391,6 +416,7 @@ def main() -> None:
                         bpm=BPM,
                         beats_total=BEATS_PER_MOVE,
                         sample_hz=SAMPLE_HZ,
+                        beat_grid=beat_grid,
                     )
                 )
 